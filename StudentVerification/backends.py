@@ -0,0 +1,266 @@
+"""Selectable inference backends for the EasyOCR detector and recognizer.
+
+``OCR_BACKEND`` picks how the two networks run on CPU:
+
+* ``torch``     – EasyOCR as shipped: torch, with its built-in dynamic int8
+                  quantization of the recognizer (the previous behaviour).
+* ``fp32``      – torch without quantization, the accuracy reference.
+* ``onnx``      – both networks exported to ONNX and run by ONNX Runtime.
+* ``onnx-int8`` – as ``onnx``, with ONNX Runtime dynamic int8 weights for
+                  the recognizer.
+
+The ONNX backends need ``onnxruntime`` (and ``onnx`` to quantize).  Models
+are exported into ``OCR_ONNX_DIR`` the first time they are needed; run
+``python backends.py export`` at build time to avoid that at startup.
+
+Before switching backends, compare it with the current one::
+
+    python backends.py parity --backend onnx-int8 --reference torch --images samples/
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+OCR_BACKEND = os.getenv("OCR_BACKEND", "torch")
+OCR_ONNX_DIR = os.getenv("OCR_ONNX_DIR", "")
+
+BACKENDS = ("torch", "fp32", "onnx", "onnx-int8")
+ONNX_OPSET = 17
+
+
+def onnx_dir(model_dir):
+    if OCR_ONNX_DIR:
+        return OCR_ONNX_DIR
+    return os.path.join(model_dir or os.path.expanduser("~/.EasyOCR/model"), "onnx")
+
+
+class OnnxModule:
+    """Stands in for the torch module EasyOCR calls: tensors in, tensors out."""
+
+    def __init__(self, path, threads):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_names = [node.name for node in self.session.get_inputs()]
+
+    def eval(self):
+        return self
+
+    def __call__(self, *inputs):
+        import torch
+
+        # Extra arguments (the recognizer's unused ``text``) are dropped here
+        feeds = {name: value.cpu().numpy() for name, value in zip(self.input_names, inputs)}
+        outputs = [torch.from_numpy(output) for output in self.session.run(None, feeds)]
+        return outputs[0] if len(outputs) == 1 else tuple(outputs)
+
+
+def _recognizer_graph(model):
+    import torch
+
+    class RecognizerGraph(torch.nn.Module):
+        """The recognizer forward pass, written so that it exports to ONNX.
+
+        ``AdaptiveAvgPool2d((None, 1))`` has no ONNX equivalent; averaging the
+        last axis is the same operation.
+        """
+
+        def __init__(self):
+            super().__init__()
+            self.model = model
+
+        def forward(self, image):
+            visual = self.model.FeatureExtraction(image).permute(0, 3, 1, 2).mean(dim=3)
+            contextual = self.model.SequenceModeling(visual)
+            return self.model.Prediction(contextual.contiguous())
+
+    return RecognizerGraph().eval()
+
+
+def _export(module, sample, path, input_names, output_names, dynamic_axes):
+    import torch
+
+    # Export next to the target and rename, so concurrent workers never load half a file
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".onnx.tmp")
+    os.close(fd)
+    with torch.no_grad():
+        torch.onnx.export(
+            module, sample, tmp_path,
+            input_names=input_names,
+            output_names=output_names,
+            dynamic_axes=dynamic_axes,
+            opset_version=ONNX_OPSET,
+            dynamo=False,
+        )
+    os.replace(tmp_path, path)
+
+
+def _quantize(path):
+    """Dynamic int8 weights for the LSTM and linear layers.
+
+    Same policy as EasyOCR's torch quantization: convolutions stay fp32,
+    because ONNX Runtime's integer convolutions are slower than float ones.
+    """
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantized = path.replace(".onnx", ".int8.onnx")
+    if not os.path.exists(quantized):
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".onnx.tmp")
+        os.close(fd)
+        quantize_dynamic(
+            path, tmp_path,
+            weight_type=QuantType.QInt8,
+            op_types_to_quantize=["LSTM", "MatMul", "Gemm"],
+        )
+        os.replace(tmp_path, quantized)
+    return quantized
+
+
+def export_onnx(reader, directory, languages):
+    """Export the reader's fp32 networks; returns ``(detector_path, recognizer_path)``."""
+    import torch
+
+    os.makedirs(directory, exist_ok=True)
+    detector_path = os.path.join(directory, "craft_detector.onnx")
+    recognizer_path = os.path.join(directory, f"recognizer_{'-'.join(languages)}.onnx")
+
+    if not os.path.exists(detector_path):
+        _export(
+            reader.detector, (torch.randn(1, 3, 320, 480),), detector_path,
+            ["image"], ["y", "feature"],
+            {"image": {0: "batch", 2: "height", 3: "width"},
+             "y": {0: "batch", 1: "out_height", 2: "out_width"},
+             "feature": {0: "batch", 2: "out_height", 3: "out_width"}},
+        )
+    if not os.path.exists(recognizer_path):
+        _export(
+            _recognizer_graph(reader.recognizer), (torch.randn(2, 1, 64, 256),), recognizer_path,
+            ["image"], ["preds"],
+            {"image": {0: "batch", 3: "width"}, "preds": {0: "batch", 1: "steps"}},
+        )
+    return detector_path, recognizer_path
+
+
+def create_reader(languages, model_dir="", download=True, backend=OCR_BACKEND, threads=1):
+    """Build an ``easyocr.Reader`` whose networks run on ``backend``."""
+    import easyocr
+
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown OCR backend {backend!r}, expected one of {BACKENDS}")
+
+    options = {"download_enabled": download, "quantize": backend == "torch"}
+    if backend != "torch":
+        options["gpu"] = False
+    if model_dir:
+        options["model_storage_directory"] = model_dir
+    reader = easyocr.Reader(languages, **options)
+
+    if backend.startswith("onnx"):
+        detector_path, recognizer_path = export_onnx(reader, onnx_dir(model_dir), languages)
+        if backend == "onnx-int8":
+            # The detector is all convolutions, so only the recognizer has anything to quantize
+            recognizer_path = _quantize(recognizer_path)
+        reader.detector = OnnxModule(detector_path, threads)
+        reader.recognizer = OnnxModule(recognizer_path, threads)
+    return reader
+
+
+def _load_samples(path):
+    import cv2
+
+    if not path:
+        from ocr_pool import warmup_image
+
+        return [("synthetic", warmup_image())]
+    samples = []
+    for name in sorted(os.listdir(path)):
+        image = cv2.imread(os.path.join(path, name), cv2.IMREAD_COLOR)
+        if image is not None:
+            samples.append((name, image))
+    return samples
+
+
+def _timed_readtext(reader, image):
+    started = time.perf_counter()
+    results = reader.readtext(image)
+    return results, time.perf_counter() - started
+
+
+def parity(args):
+    """Compare OCR text and latency of two backends over a sample set."""
+    import torch
+    from rapidfuzz import fuzz
+
+    torch.set_num_threads(args.threads)
+    languages = args.languages.split(",")
+    samples = _load_samples(args.images)
+    if not samples:
+        print(f"❌ No readable images in {args.images}")
+        return 1
+
+    readers = {}
+    for backend in (args.reference, args.backend):
+        readers[backend] = create_reader(languages, args.model_dir, True, backend, args.threads)
+        _timed_readtext(readers[backend], samples[0][1])  # warm-up, not timed
+
+    similarities = []
+    totals = {args.reference: 0.0, args.backend: 0.0}
+    for name, image in samples:
+        texts = {}
+        for backend, reader in readers.items():
+            results, elapsed = _timed_readtext(reader, image)
+            totals[backend] += elapsed
+            texts[backend] = " ".join(text for _, text, _ in results)
+        similarity = fuzz.ratio(texts[args.reference], texts[args.backend])
+        similarities.append(similarity)
+        print(f"{name}: text similarity {similarity:.1f}")
+
+    mean_similarity = sum(similarities) / len(similarities)
+    reference_ms = totals[args.reference] / len(samples) * 1000
+    backend_ms = totals[args.backend] / len(samples) * 1000
+    print(f"\n{len(samples)} images")
+    print(f"{args.reference}: {reference_ms:.1f} ms/image")
+    print(f"{args.backend}: {backend_ms:.1f} ms/image ({reference_ms / backend_ms:.2f}x)")
+    print(f"Mean text similarity: {mean_similarity:.2f} (minimum {args.min_similarity})")
+
+    if mean_similarity < args.min_similarity:
+        print(f"❌ {args.backend} drifts too far from {args.reference}")
+        return 1
+    print(f"✅ {args.backend} is within tolerance of {args.reference}")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--languages", default=os.getenv("OCR_LANGUAGES", "en"))
+    parser.add_argument("--model-dir", default=os.getenv("OCR_MODEL_DIR", ""))
+    parser.add_argument("--threads", type=int, default=int(os.getenv("OCR_TORCH_THREADS", "1")))
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", help="export (and quantize) the ONNX models")
+    export.add_argument("--int8", action="store_true")
+
+    check = commands.add_parser("parity", help="compare a backend against a reference")
+    check.add_argument("--backend", choices=BACKENDS, required=True)
+    check.add_argument("--reference", choices=BACKENDS, default="torch")
+    check.add_argument("--images", default="", help="directory of sample ID cards")
+    check.add_argument("--min-similarity", type=float, default=98.0)
+
+    args = parser.parse_args(argv)
+    if args.command == "export":
+        create_reader(
+            args.languages.split(","), args.model_dir, True,
+            "onnx-int8" if args.int8 else "onnx", args.threads,
+        )
+        print(f"✅ ONNX models written to {onnx_dir(args.model_dir)}")
+        return 0
+    return parity(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
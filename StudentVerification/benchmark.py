@@ -0,0 +1,204 @@
+"""Latency, throughput and accuracy benchmark for ``/verify``.
+
+Synthetic cards (see ``synthetic_cards``) are posted to the FastAPI app
+in-process at several concurrency levels.  For every level the report has
+p50/p95/p99 latency, throughput, how many genuine submissions passed and
+how many forged ones (wrong name) were wrongly accepted.  A sequential pass
+then times the pipeline stages on their own: decode, resize, OCR, matching.
+
+    python benchmark.py --cards 40 --concurrency 1,4,16 --json results.json
+
+The OCR cache is turned off so every request pays for OCR.  Requires
+``httpx`` for the in-process client.
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("OCR_CACHE_SIZE", "0")
+os.environ.setdefault("OCR_CACHE_DIR", "")
+os.environ.setdefault("JOB_WORKERS", "0")
+os.environ.setdefault("JOB_DB_PATH", os.path.join(tempfile.mkdtemp(), "jobs.db"))
+
+import httpx  # noqa: E402
+
+import main  # noqa: E402
+from ingest import decode_image  # noqa: E402
+from matching import score_fields  # noqa: E402
+from preprocessing import prepare_for_ocr  # noqa: E402
+from synthetic_cards import generate_cards, load_cards  # noqa: E402
+
+FIELDS = ("name", "college_name", "academic_year", "dob")
+# Every this-many-th request claims someone else's name, to measure false accepts
+FORGERY_EVERY = 4
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def peak_rss_mb():
+    """Peak RSS of this process and of the largest OCR worker process (Linux)."""
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    worker = 0.0
+    processes = getattr(main.ocr_pool._pool, "_processes", None) or {}
+    for pid in processes:
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmHWM:"):
+                        worker = max(worker, int(line.split()[1]) / 1024)
+        except OSError:
+            pass
+    return round(own, 1), round(worker, 1)
+
+
+def forged(truth, cards):
+    other = next(t for _, t in cards if t["name"] != truth["name"])
+    return {**{field: truth[field] for field in FIELDS}, "name": other["name"]}
+
+
+async def run_level(client, cards, concurrency, requests):
+    limit = asyncio.Semaphore(concurrency)
+    latencies = []
+    outcomes = {"genuine": 0, "genuine_passed": 0, "forged": 0, "forged_passed": 0, "errors": 0}
+
+    async def one(index):
+        data, truth = cards[index % len(cards)]
+        is_forged = index % FORGERY_EVERY == FORGERY_EVERY - 1
+        form = forged(truth, cards) if is_forged else {field: truth[field] for field in FIELDS}
+        async with limit:
+            started = time.perf_counter()
+            response = await client.post(
+                "/verify", data=form, files={"id_card": ("card.jpg", data, "image/jpeg")}
+            )
+            latencies.append(time.perf_counter() - started)
+
+        if response.status_code != 200:
+            outcomes["errors"] += 1
+            return
+        passed = response.json()["status"] == "success"
+        kind = "forged" if is_forged else "genuine"
+        outcomes[kind] += 1
+        outcomes[f"{kind}_passed"] += int(passed)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[one(i) for i in range(requests)])
+    elapsed = time.perf_counter() - started
+
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "throughput_rps": round(requests / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "genuine_pass_rate": round(outcomes["genuine_passed"] / max(1, outcomes["genuine"]), 3),
+        "false_accept_rate": round(outcomes["forged_passed"] / max(1, outcomes["forged"]), 3),
+        "errors": outcomes["errors"],
+    }
+
+
+async def run_stages(cards):
+    """Time each pipeline stage on its own, one card at a time."""
+    stages = {"decode": [], "resize": [], "ocr": [], "matching": []}
+    for data, truth in cards:
+        started = time.perf_counter()
+        image = decode_image(data)
+        stages["decode"].append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        image, _ = prepare_for_ocr(image)
+        stages["resize"].append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        results = await main.ocr_pool.readtext(image)
+        stages["ocr"].append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        score_fields(*(truth[field] for field in FIELDS), results, main.college_directory)
+        stages["matching"].append(time.perf_counter() - started)
+
+    return {
+        stage: {
+            "mean_ms": round(statistics.mean(times) * 1000, 2),
+            "p95_ms": round(percentile(times, 95) * 1000, 2),
+        }
+        for stage, times in stages.items()
+    }
+
+
+async def benchmark(args):
+    if args.cards_dir:
+        cards = load_cards(args.cards_dir)
+    else:
+        cards = list(generate_cards(args.cards, seed=args.seed))
+    levels = [int(level) for level in args.concurrency.split(",")]
+
+    async with main.app.router.lifespan_context(main.app):
+        print("⏳ Waiting for OCR warm-up...")
+        while not main.startup["ready"]:
+            if main.startup["phase"] == "failed":
+                raise RuntimeError(f"OCR warm-up failed: {main.startup['error']}")
+            await asyncio.sleep(0.2)
+
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            results = []
+            for level in levels:
+                result = await run_level(client, cards, level, args.requests or len(cards))
+                results.append(result)
+                print(
+                    f"c={level:<3} {result['throughput_rps']:>7.2f} req/s"
+                    f"  p50 {result['p50_ms']:>8.1f} ms  p95 {result['p95_ms']:>8.1f} ms"
+                    f"  p99 {result['p99_ms']:>8.1f} ms  pass {result['genuine_pass_rate']:.2f}"
+                    f"  false accept {result['false_accept_rate']:.2f}  errors {result['errors']}"
+                )
+
+        stages = await run_stages(cards)
+        for stage, timing in stages.items():
+            print(f"{stage:<9} mean {timing['mean_ms']:>8.2f} ms  p95 {timing['p95_ms']:>8.2f} ms")
+        # Read while the OCR worker processes are still alive
+        own_rss, worker_rss = peak_rss_mb()
+        ocr_stats = main.ocr_pool.stats()
+
+    print(f"Peak RSS: {own_rss} MB (server), {worker_rss} MB (largest OCR worker process)")
+
+    report = {
+        "cards": len(cards),
+        "ocr": ocr_stats,
+        "levels": results,
+        "stages": stages,
+        "peak_rss_mb": {"server": own_rss, "ocr_worker": worker_rss},
+    }
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Results written to {args.json}")
+    return report
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark /verify with synthetic ID cards")
+    parser.add_argument("--cards", type=int, default=24, help="synthetic cards to generate")
+    parser.add_argument("--cards-dir", default="", help="use cards written by synthetic_cards.py")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--concurrency", default="1,4,16")
+    parser.add_argument("--requests", type=int, default=0, help="requests per level (default: one per card)")
+    parser.add_argument("--json", default="", help="write the full report here")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    asyncio.run(benchmark(parse_args()))
+    sys.exit(0)
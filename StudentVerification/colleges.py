@@ -0,0 +1,163 @@
+"""Optional directory of known colleges for canonical name matching.
+
+Point ``COLLEGE_DIRECTORY`` at a CSV with a ``name`` column and optional
+``aliases`` and ``abbreviations`` columns (several values separated by
+``;``)::
+
+    name,aliases,abbreviations
+    Veermata Jijabai Technological Institute,VJTI Mumbai,VJTI
+
+Every name and alias is normalized and indexed by character trigrams when
+the service starts.  A lookup only scores the handful of entries sharing
+the most trigrams with the query, so resolving a string stays well under a
+millisecond even with tens of thousands of entries.
+"""
+import csv
+import os
+import re
+from functools import lru_cache
+
+import numpy as np
+from rapidfuzz import fuzz, process
+
+COLLEGE_DIRECTORY = os.getenv("COLLEGE_DIRECTORY", "")
+COLLEGE_MATCH_THRESHOLD = float(os.getenv("COLLEGE_MATCH_THRESHOLD", "85"))
+
+# Candidates kept after the trigram prefilter
+SHORTLIST = 10
+# Trigrams found in more than this share of entries ("col", "ege", ...) carry
+# no signal and are skipped when rarer ones are available
+COMMON_TRIGRAM_SHARE = 0.05
+FALLBACK_TRIGRAMS = 4
+
+NON_ALNUM = re.compile(r"[^a-z0-9]+")
+EXPANSIONS = {
+    "engg": "engineering",
+    "engr": "engineering",
+    "univ": "university",
+    "inst": "institute",
+    "coll": "college",
+    "clg": "college",
+    "tech": "technology",
+    "govt": "government",
+    "st": "saint",
+}
+
+
+def normalize_name(text):
+    text = text.lower().replace("&", " and ")
+    tokens = NON_ALNUM.sub(" ", text).split()
+    return " ".join(EXPANSIONS.get(token, token) for token in tokens)
+
+
+def trigrams(text):
+    padded = f" {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _split(cell):
+    return [value.strip() for value in (cell or "").split(";") if value.strip()]
+
+
+class CollegeDirectory:
+    def __init__(self, entries):
+        """``entries`` is a list of ``(name, aliases, abbreviations)`` tuples."""
+        self.names = []
+        self.aliases = []
+        self.alias_owner = []
+        self.abbreviations = {}
+
+        for name, aliases, abbreviations in entries:
+            owner = len(self.names)
+            self.names.append(name)
+            for alias in [name, *aliases]:
+                normalized = normalize_name(alias)
+                if normalized:
+                    self.aliases.append(normalized)
+                    self.alias_owner.append(owner)
+            for abbreviation in abbreviations:
+                normalized = normalize_name(abbreviation).replace(" ", "")
+                if len(normalized) >= 3:
+                    self.abbreviations[normalized] = owner
+
+        postings = {}
+        self.alias_sizes = np.empty(len(self.aliases), dtype=np.int32)
+        for index, alias in enumerate(self.aliases):
+            grams = trigrams(alias)
+            self.alias_sizes[index] = len(grams)
+            for gram in grams:
+                postings.setdefault(gram, []).append(index)
+        self.postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+        self.common_limit = max(50, int(len(self.aliases) * COMMON_TRIGRAM_SHARE))
+        self.alias_owner = np.array(self.alias_owner, dtype=np.int32)
+
+        self._resolve_cached = lru_cache(maxsize=4096)(self._resolve)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, newline="", encoding="utf-8") as f:
+            entries = [
+                (row["name"].strip(), _split(row.get("aliases")), _split(row.get("abbreviations")))
+                for row in csv.DictReader(f)
+                if (row.get("name") or "").strip()
+            ]
+        directory = cls(entries)
+        print(f"✅ College directory loaded: {len(directory.names)} colleges, {len(directory.aliases)} names")
+        return directory
+
+    def shortlist(self, query):
+        """Alias indexes sharing the most trigrams with ``query`` (Jaccard order)."""
+        grams = [gram for gram in trigrams(query) if gram in self.postings]
+        if not grams:
+            return np.empty(0, dtype=np.int32)
+        rare = [gram for gram in grams if len(self.postings[gram]) <= self.common_limit]
+        if not rare:
+            # Only common trigrams: the rarest few still narrow things down
+            rare = sorted(grams, key=lambda gram: len(self.postings[gram]))[:FALLBACK_TRIGRAMS]
+        hits = np.bincount(
+            np.concatenate([self.postings[gram] for gram in rare]),
+            minlength=len(self.aliases),
+        )
+        ids = np.flatnonzero(hits)
+        if len(ids) == 0:
+            return ids
+        shared = hits[ids]
+        similarity = shared / (len(grams) + self.alias_sizes[ids] - shared)
+        count = min(SHORTLIST, len(ids))
+        top = np.argpartition(-similarity, count - 1)[:count]
+        return ids[top[np.argsort(-similarity[top])]]
+
+    def resolve(self, text):
+        """``(canonical_name, score)`` for ``text``, or ``None`` below the threshold."""
+        return self._resolve_cached(normalize_name(text))
+
+    def _resolve(self, query):
+        if not query:
+            return None
+
+        compact = query.replace(" ", "")
+        if compact in self.abbreviations:
+            return self.names[self.abbreviations[compact]], 100.0
+        for token in query.split():
+            if token in self.abbreviations:
+                return self.names[self.abbreviations[token]], 90.0
+
+        candidates = self.shortlist(query)
+        if len(candidates) == 0:
+            return None
+        match = process.extractOne(
+            query, [self.aliases[i] for i in candidates], scorer=fuzz.WRatio
+        )
+        if match is None or match[1] < COLLEGE_MATCH_THRESHOLD:
+            return None
+        _, score, position = match
+        return self.names[self.alias_owner[candidates[position]]], round(float(score), 2)
+
+
+def load_directory(path=COLLEGE_DIRECTORY):
+    if not path:
+        return None
+    if not os.path.exists(path):
+        print(f"⚠️ College directory {path} not found, matching college names by text only")
+        return None
+    return CollegeDirectory.load(path)
@@ -0,0 +1,191 @@
+"""Guarded upload ingest: bounded reads, header sniffing and reduced decoding.
+
+Uploads are read in chunks up to ``OCR_MAX_UPLOAD_BYTES``.  The format and
+pixel dimensions are taken from the file header before anything is decoded,
+so non-images and decompression bombs are turned away with a 4xx for the
+price of a few bytes.  Large JPEGs are decoded straight at 1/2, 1/4 or 1/8
+resolution when the full size would only be thrown away by preprocessing.
+
+PDFs (a scanned card, front and back on separate pages) are rendered page
+by page with ``pypdfium2`` (in requirements.txt; a server without it answers
+PDF uploads with 415).  PDFium is not thread-safe, so every call into it
+holds ``PDFIUM_LOCK``; pages are rendered on worker threads.
+"""
+import os
+import struct
+import threading
+
+import cv2
+import numpy as np
+
+from preprocessing import OCR_GRAYSCALE, OCR_MAX_SIDE
+
+OCR_MAX_UPLOAD_BYTES = int(os.getenv("OCR_MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+OCR_MAX_IMAGE_PIXELS = int(os.getenv("OCR_MAX_IMAGE_PIXELS", str(50_000_000)))
+
+READ_CHUNK = 256 * 1024
+
+PDFIUM_LOCK = threading.Lock()
+
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+REDUCED_COLOR = {2: cv2.IMREAD_REDUCED_COLOR_2, 4: cv2.IMREAD_REDUCED_COLOR_4, 8: cv2.IMREAD_REDUCED_COLOR_8}
+REDUCED_GRAYSCALE = {
+    2: cv2.IMREAD_REDUCED_GRAYSCALE_2,
+    4: cv2.IMREAD_REDUCED_GRAYSCALE_4,
+    8: cv2.IMREAD_REDUCED_GRAYSCALE_8,
+}
+
+
+class IngestError(Exception):
+    """An upload that should be rejected with ``status_code``."""
+
+    def __init__(self, status_code, detail):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+async def read_upload(upload, max_bytes=OCR_MAX_UPLOAD_BYTES):
+    """Read an ``UploadFile`` in chunks, giving up as soon as it exceeds the cap."""
+    if upload.size is not None and upload.size > max_bytes:
+        raise IngestError(413, f"Image is larger than {max_bytes} bytes")
+
+    chunks = []
+    total = 0
+    while True:
+        chunk = await upload.read(READ_CHUNK)
+        if not chunk:
+            break
+        total += len(chunk)
+        if total > max_bytes:
+            raise IngestError(413, f"Image is larger than {max_bytes} bytes")
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def _jpeg_size(data):
+    i = 2
+    while i + 9 <= len(data):
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:
+            # Fill byte before the real marker
+            i += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD7:
+            i += 2
+            continue
+        if marker in JPEG_SOF_MARKERS:
+            height, width = struct.unpack(">HH", data[i + 5:i + 9])
+            return width, height
+        (length,) = struct.unpack(">H", data[i + 2:i + 4])
+        i += 2 + length
+    return None
+
+
+def _webp_size(data):
+    chunk = data[12:16]
+    if chunk == b"VP8 " and len(data) >= 30:
+        width, height = struct.unpack("<HH", data[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L" and len(data) >= 25:
+        bits = int.from_bytes(data[21:25], "little")
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X" and len(data) >= 30:
+        return int.from_bytes(data[24:27], "little") + 1, int.from_bytes(data[27:30], "little") + 1
+    return None
+
+
+def sniff_image(data):
+    """Return ``(format, width, height)`` from the header without decoding."""
+    size = None
+    if data[:8] == b"\x89PNG\r\n\x1a\n" and len(data) >= 24:
+        fmt = "png"
+        size = struct.unpack(">II", data[16:24])
+    elif data[:2] == b"\xff\xd8":
+        fmt = "jpeg"
+        size = _jpeg_size(data)
+    elif data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        fmt = "webp"
+        size = _webp_size(data)
+    elif data[:2] == b"BM" and len(data) >= 26:
+        fmt = "bmp"
+        width, height = struct.unpack("<ii", data[18:26])
+        size = (width, abs(height))
+    else:
+        raise IngestError(415, "Unsupported file type, upload a JPEG, PNG, WebP or BMP image")
+
+    if size is None or min(size) <= 0:
+        raise IngestError(400, f"Could not read the {fmt.upper()} image header")
+    width, height = size
+    if width * height > OCR_MAX_IMAGE_PIXELS:
+        raise IngestError(413, f"Image is {width}x{height}, more than {OCR_MAX_IMAGE_PIXELS} pixels")
+    return fmt, width, height
+
+
+def reduction_factor(fmt, width, height, max_side=OCR_MAX_SIDE):
+    """Largest 2/4/8 reduction that still leaves at least ``max_side`` pixels.
+
+    Only JPEG benefits: libjpeg scales during the DCT, while other formats
+    would be decoded in full and shrunk afterwards anyway.
+    """
+    if fmt != "jpeg":
+        return 1
+    long_side = max(width, height)
+    for factor in (8, 4, 2):
+        if long_side // factor >= max_side:
+            return factor
+    return 1
+
+
+def is_pdf(data):
+    return data[:5] == b"%PDF-"
+
+
+def open_pdf(data):
+    """``(document, page_count)``; close the document with ``close_pdf``."""
+    try:
+        import pypdfium2 as pdfium
+    except ImportError:
+        raise IngestError(415, "PDF uploads are not supported on this server, upload images instead")
+    try:
+        with PDFIUM_LOCK:
+            pdf = pdfium.PdfDocument(data)
+            return pdf, len(pdf)
+    except pdfium.PdfiumError:
+        raise IngestError(400, "Could not read the PDF")
+
+
+def close_pdf(pdf):
+    with PDFIUM_LOCK:
+        pdf.close()
+
+
+def render_pdf_page(pdf, index, max_side=OCR_MAX_SIDE, grayscale=OCR_GRAYSCALE):
+    """Render one page with its long side at ``max_side`` pixels (BGR or gray)."""
+    with PDFIUM_LOCK:
+        page = pdf[index]
+        try:
+            width, height = page.get_size()
+            if min(width, height) <= 0:
+                raise IngestError(400, f"PDF page {index + 1} is empty")
+            scale = max_side / max(width, height)
+            return page.render(scale=scale, grayscale=grayscale).to_numpy().copy()
+        finally:
+            page.close()
+
+
+def decode_image(data, grayscale=OCR_GRAYSCALE):
+    fmt, width, height = sniff_image(data)
+    factor = reduction_factor(fmt, width, height)
+    if factor > 1:
+        flags = (REDUCED_GRAYSCALE if grayscale else REDUCED_COLOR)[factor]
+    else:
+        flags = cv2.IMREAD_GRAYSCALE if grayscale else cv2.IMREAD_COLOR
+
+    img = cv2.imdecode(np.frombuffer(data, np.uint8), flags)
+    if img is None:
+        raise IngestError(400, f"Could not decode the {fmt.upper()} image")
+    return img
@@ -0,0 +1,339 @@
+"""Asynchronous verification jobs backed by a local SQLite queue.
+
+``POST /verify/jobs`` stores the form fields and card image and returns a
+job id straight away; background workers claim queued jobs, run the normal
+verification pipeline and store the result (optionally POSTing it to a
+callback URL).  Jobs live in ``JOB_DB_PATH``, so queued work survives a
+restart.  A claimed job holds a lease; if its worker dies, the job becomes
+claimable again once the lease runs out, up to ``JOB_MAX_ATTEMPTS`` times.
+
+Callback URLs are checked when the job is created and again right before
+the POST: hosts in ``JOB_CALLBACK_HOSTS`` are trusted as configured, any
+other host must resolve only to public addresses (no loopback, private,
+link-local or reserved ranges), and redirects are never followed.
+"""
+import asyncio
+import ipaddress
+import json
+import os
+import socket
+import sqlite3
+import time
+import urllib.request
+import uuid
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+JOB_DB_PATH = os.getenv("JOB_DB_PATH", "jobs.db")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "1"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1.0"))
+# Longest pause after repeated queue errors (e.g. "database is locked")
+JOB_ERROR_BACKOFF_MAX = float(os.getenv("JOB_ERROR_BACKOFF_MAX", "30"))
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "300"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_MAX_QUEUED = int(os.getenv("JOB_MAX_QUEUED", "1000"))
+JOB_RETENTION_SECONDS = float(os.getenv("JOB_RETENTION_SECONDS", "86400"))
+JOB_CALLBACK_TIMEOUT = float(os.getenv("JOB_CALLBACK_TIMEOUT", "10"))
+JOB_CALLBACK_HOSTS = [host for host in os.getenv("JOB_CALLBACK_HOSTS", "").split(",") if host]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    fields TEXT NOT NULL,
+    image BLOB,
+    callback_url TEXT,
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_until REAL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    callback_status TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at);
+"""
+
+
+class QueueFull(Exception):
+    pass
+
+
+class RetryLater(Exception):
+    """Raised by a job handler to put the job back without spending an attempt."""
+
+    def __init__(self, delay):
+        super().__init__(f"retry in {delay}s")
+        self.delay = delay
+
+
+def _public_address(address):
+    address = ipaddress.ip_address(address.split("%")[0])
+    if address.version == 6 and address.ipv4_mapped:
+        address = address.ipv4_mapped
+    return address.is_global and not address.is_multicast
+
+
+def check_callback_url(url):
+    """Return an error message for an unacceptable callback URL, else ``None``.
+
+    Resolves the host (blocking), so call it from a thread.
+    """
+    parsed = urlparse(url)
+    if parsed.scheme not in ("http", "https") or not parsed.hostname:
+        return "callback_url must be an http(s) URL"
+    if JOB_CALLBACK_HOSTS:
+        if parsed.hostname not in JOB_CALLBACK_HOSTS:
+            return f"callback_url host must be one of: {', '.join(JOB_CALLBACK_HOSTS)}"
+        return None
+    try:
+        port = parsed.port or (443 if parsed.scheme == "https" else 80)
+        addresses = {info[4][0] for info in socket.getaddrinfo(parsed.hostname, port, proto=socket.IPPROTO_TCP)}
+    except (OSError, ValueError):
+        return "callback_url host does not resolve"
+    if not addresses or not all(_public_address(address) for address in addresses):
+        return "callback_url must point to a public address"
+    return None
+
+
+class JobQueue:
+    def __init__(self, path=JOB_DB_PATH):
+        self.path = path
+        with self._connect() as db:
+            db.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        # One short-lived connection per call: cheap for SQLite and safe across threads
+        db = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        try:
+            db.row_factory = sqlite3.Row
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            yield db
+        finally:
+            db.close()
+
+    def enqueue(self, fields, image_bytes, callback_url=None):
+        job_id = uuid.uuid4().hex
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            (queued,) = db.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()
+            if queued >= JOB_MAX_QUEUED:
+                db.execute("ROLLBACK")
+                raise QueueFull()
+            db.execute(
+                "INSERT INTO jobs (id, status, fields, image, callback_url, created_at)"
+                " VALUES (?, 'queued', ?, ?, ?, ?)",
+                (job_id, json.dumps(fields), image_bytes, callback_url, time.time()),
+            )
+            db.execute("COMMIT")
+        return job_id
+
+    def claim(self):
+        """Lease the oldest runnable job; returns ``(id, fields, image)`` or ``None``."""
+        now = time.time()
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            row = db.execute(
+                "SELECT id, fields, image, attempts FROM jobs"
+                " WHERE status = 'queued' OR (status = 'running' AND lease_until < ?)"
+                " ORDER BY created_at LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is None:
+                db.execute("COMMIT")
+                return None
+            if row["attempts"] >= JOB_MAX_ATTEMPTS:
+                db.execute(
+                    "UPDATE jobs SET status = 'failed', image = NULL, finished_at = ?,"
+                    " error = 'Gave up after repeated worker failures' WHERE id = ?",
+                    (now, row["id"]),
+                )
+                db.execute("COMMIT")
+                return self.claim()
+            db.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1,"
+                " lease_until = ?, started_at = ? WHERE id = ?",
+                (now + JOB_LEASE_SECONDS, now, row["id"]),
+            )
+            db.execute("COMMIT")
+        return row["id"], json.loads(row["fields"]), row["image"]
+
+    def release(self, job_id):
+        """Put a claimed job back in the queue without counting the attempt."""
+        with self._connect() as db:
+            db.execute(
+                "UPDATE jobs SET status = 'queued', attempts = attempts - 1, lease_until = NULL"
+                " WHERE id = ?",
+                (job_id,),
+            )
+
+    def finish(self, job_id, result=None, error=None):
+        with self._connect() as db:
+            db.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, image = NULL,"
+                " lease_until = NULL, finished_at = ? WHERE id = ?",
+                (
+                    "failed" if error else "done",
+                    json.dumps(result) if result is not None else None,
+                    error,
+                    time.time(),
+                    job_id,
+                ),
+            )
+
+    def set_callback_status(self, job_id, callback_status):
+        with self._connect() as db:
+            db.execute("UPDATE jobs SET callback_status = ? WHERE id = ?", (callback_status, job_id))
+
+    def get(self, job_id):
+        with self._connect() as db:
+            row = db.execute(
+                "SELECT id, status, result, error, created_at, started_at, finished_at,"
+                " callback_url, callback_status FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        job = {
+            "job_id": row["id"],
+            "status": row["status"],
+            "created_at": row["created_at"],
+            "started_at": row["started_at"],
+            "finished_at": row["finished_at"],
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "error": row["error"],
+        }
+        if row["callback_url"]:
+            job["callback_status"] = row["callback_status"]
+        return job
+
+    def callback_url(self, job_id):
+        with self._connect() as db:
+            row = db.execute("SELECT callback_url FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return row["callback_url"] if row else None
+
+    def prune(self):
+        cutoff = time.time() - JOB_RETENTION_SECONDS
+        with self._connect() as db:
+            db.execute(
+                "DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ?", (cutoff,)
+            )
+
+    def stats(self):
+        with self._connect() as db:
+            rows = db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        # A redirect could point the server at an address check_callback_url refused
+        return None
+
+
+_callback_opener = urllib.request.build_opener(_NoRedirect)
+
+
+def _post_callback(url, payload):
+    # Checked again: the host may resolve differently than when the job was created
+    problem = check_callback_url(url)
+    if problem:
+        raise ValueError(problem)
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(payload).encode(),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    with _callback_opener.open(request, timeout=JOB_CALLBACK_TIMEOUT) as response:
+        return response.status
+
+
+class JobWorkers:
+    """Background tasks that drain the queue through ``handler(fields, image)``.
+
+    SQLite calls run in a thread so the event loop never waits on disk.
+    """
+
+    def __init__(self, queue, handler, workers=JOB_WORKERS):
+        self.queue = queue
+        self.handler = handler
+        self.workers = workers
+        self._wakeup = asyncio.Event()
+        self._tasks = []
+
+    def start(self):
+        self._tasks = [asyncio.create_task(self._run()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._prune_periodically()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self):
+        """Wake an idle worker right away instead of at the next poll."""
+        self._wakeup.set()
+
+    async def _run(self):
+        errors = 0
+        while True:
+            try:
+                job = await asyncio.to_thread(self.queue.claim)
+                if job is not None:
+                    await self._process(*job)
+                errors = 0
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                # A locked or unavailable database must not end the worker;
+                # a job it held is claimed again once its lease runs out
+                errors += 1
+                delay = min(JOB_ERROR_BACKOFF_MAX, JOB_POLL_INTERVAL * 2 ** (errors - 1))
+                print(f"⚠️ Job worker error ({type(exc).__name__}: {exc}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                continue
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), JOB_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+
+    async def _process(self, job_id, fields, image_bytes):
+        try:
+            result = await self.handler(fields, image_bytes)
+        except RetryLater as exc:
+            await asyncio.to_thread(self.queue.release, job_id)
+            await asyncio.sleep(exc.delay)
+            return
+        except Exception as exc:
+            await asyncio.to_thread(self.queue.finish, job_id, None, str(exc) or type(exc).__name__)
+        else:
+            await asyncio.to_thread(self.queue.finish, job_id, result)
+
+        url = await asyncio.to_thread(self.queue.callback_url, job_id)
+        if url:
+            await self._callback(job_id, url)
+
+    async def _callback(self, job_id, url):
+        job = await asyncio.to_thread(self.queue.get, job_id)
+        try:
+            status = await asyncio.to_thread(_post_callback, url, job)
+            callback_status = f"delivered ({status})"
+        except Exception as exc:
+            print(f"⚠️ Callback for job {job_id} failed: {exc}")
+            callback_status = f"failed: {exc}"
+        await asyncio.to_thread(self.queue.set_callback_status, job_id, callback_status)
+
+    async def _prune_periodically(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.queue.prune)
+            except Exception as exc:
+                print(f"⚠️ Pruning finished jobs failed: {exc}")
+            await asyncio.sleep(600)
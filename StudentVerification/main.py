@@ -1,13 +1,199 @@
-from fastapi import FastAPI, Form, File, UploadFile
+import time
+
+IMPORT_STARTED = time.perf_counter()
+
+import asyncio
+import json
+import os
+from contextlib import asynccontextmanager, contextmanager
+from functools import partial
+from typing import List, Optional
+from fastapi import FastAPI, Form, File, UploadFile, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-import cv2
-import easyocr
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 import numpy as np
-from rapidfuzz import fuzz
-import re
-from datetime import datetime
 
-app = FastAPI()
+import metrics
+import preprocessing
+from colleges import load_directory
+from ingest import (
+    OCR_MAX_UPLOAD_BYTES, IngestError, close_pdf, decode_image, is_pdf, open_pdf, read_upload, render_pdf_page,
+    sniff_image,
+)
+from jobs import JobQueue, JobWorkers, QueueFull, RetryLater, check_callback_url
+from matching import match_fields, merge_matches, score_fields, verdict
+from ocr_cache import OcrCache
+from ocr_pool import OcrPool, OcrSaturated
+from preprocessing import prepare_for_ocr, preprocess_stats
+
+OCR_BATCH_SIZE = int(os.getenv("OCR_BATCH_SIZE", "8"))
+OCR_MAX_BATCH_ITEMS = int(os.getenv("OCR_MAX_BATCH_ITEMS", "500"))
+# Images plus PDF pages accepted for a single card on /verify
+OCR_MAX_IMAGES = int(os.getenv("OCR_MAX_IMAGES", "4"))
+# Room for the text form fields and multipart boundaries around the image
+FORM_OVERHEAD_BYTES = 64 * 1024
+OCR_WARMUP = os.getenv("OCR_WARMUP", "1") == "1"
+
+ocr_pool = OcrPool()
+college_directory = None
+job_queue = JobQueue()
+ocr_cache = OcrCache(namespace=repr((
+    ocr_pool.languages,
+    ocr_pool.backend,
+    preprocessing.OCR_TARGET_TEXT_HEIGHT,
+    preprocessing.OCR_MAX_UPSCALE,
+    preprocessing.OCR_MAX_SIDE,
+    preprocessing.OCR_MIN_SIDE,
+    preprocessing.OCR_CROP_CARD,
+    preprocessing.OCR_GRAYSCALE,
+)))
+
+
+startup = {
+    "ready": False,
+    "phase": "starting",
+    "timings_ms": {"imports": round((time.perf_counter() - IMPORT_STARTED) * 1000, 1)},
+    "workers": [],
+    "error": None,
+}
+
+
+@contextmanager
+def startup_phase(name):
+    started = time.perf_counter()
+    yield
+    startup["timings_ms"][name] = round((time.perf_counter() - started) * 1000, 1)
+
+
+async def warm_up():
+    startup["phase"] = "warming_up"
+    try:
+        with startup_phase("warmup_total"):
+            reports = await ocr_pool.warm_up()
+    except Exception as exc:
+        startup["phase"] = "failed"
+        startup["error"] = str(exc)
+        print(f"❌ OCR warm-up failed: {exc}")
+        return
+
+    startup["workers"] = reports
+    startup["timings_ms"]["reader_load"] = round(max(r["load_seconds"] for r in reports) * 1000, 1)
+    startup["timings_ms"]["warmup_inference"] = round(max(r["warmup_seconds"] for r in reports) * 1000, 1)
+    startup["phase"] = "ready"
+    startup["ready"] = True
+    print(f"✅ OCR ready: {startup['timings_ms']}")
+
+
+@asynccontextmanager
+async def lifespan(app):
+    global college_directory
+    with startup_phase("college_directory"):
+        college_directory = load_directory()
+    with startup_phase("pool_start"):
+        ocr_pool.start()
+    job_workers.start()
+
+    # Serve liveness straight away; /ready turns green once every worker is warm
+    warmup_task = None
+    if OCR_WARMUP:
+        warmup_task = asyncio.create_task(warm_up())
+    else:
+        startup["phase"] = "ready"
+        startup["ready"] = True
+    yield
+    if warmup_task is not None:
+        warmup_task.cancel()
+    await job_workers.stop()
+    ocr_pool.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+class UploadLimitMiddleware:
+    """Cap /verify* request bodies before the form is parsed or spooled to disk.
+
+    A declared Content-Length over the cap is refused straight away.  A body
+    sent without one (chunked transfer encoding) is counted as it arrives
+    and cut off at the cap, and the request is answered 413 all the same.
+    """
+
+    def __init__(self, app, limits):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        limit = self.limits.get(scope["path"]) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+        length = dict(scope["headers"]).get(b"content-length", b"").decode("latin-1")
+        if length.isdigit() and int(length) > limit:
+            await self.reject(scope, receive, send, limit)
+            return
+
+        received = 0
+        exceeded = False
+        responded = False
+
+        async def capped_receive():
+            nonlocal received, exceeded
+            if exceeded:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # The form parser sees a client that went away and stops reading
+                    exceeded = True
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def guarded_send(message):
+            nonlocal responded
+            if exceeded and not responded:
+                # Swap whatever the handler made of the cut-off body for a 413
+                if message["type"] == "http.response.start":
+                    responded = True
+                    await self.reject(scope, receive, send, limit)
+                return
+            if message["type"] == "http.response.start":
+                responded = True
+            if not (exceeded and message["type"] == "http.response.body"):
+                await send(message)
+
+        await self.app(scope, capped_receive, guarded_send)
+        if exceeded and not responded:
+            await self.reject(scope, receive, send, limit)
+
+    @staticmethod
+    async def reject(scope, receive, send, limit):
+        response = JSONResponse(status_code=413, content={"detail": f"Upload is larger than {limit} bytes"})
+        await response(scope, receive, send)
+
+
+# Body caps by route; the form fields add at most FORM_OVERHEAD_BYTES per image
+app.add_middleware(UploadLimitMiddleware, limits={
+    "/verify": OCR_MAX_UPLOAD_BYTES * OCR_MAX_IMAGES + FORM_OVERHEAD_BYTES,
+    "/verify/jobs": OCR_MAX_UPLOAD_BYTES + FORM_OVERHEAD_BYTES,
+    "/verify/batch": (OCR_MAX_UPLOAD_BYTES + FORM_OVERHEAD_BYTES) * OCR_MAX_BATCH_ITEMS,
+})
+
+
+@app.middleware("http")
+async def instrument_verification(request, call_next):
+    if not request.url.path.startswith("/verify"):
+        return await call_next(request)
+    started = time.perf_counter()
+    with metrics.track_request() as timings:
+        response = await call_next(request)
+    # Label by route template so job ids don't each become a series
+    route = request.scope.get("route")
+    metrics.observe_request(getattr(route, "path", "unmatched"), time.perf_counter() - started)
+    if timings is not None:
+        response.headers["Server-Timing"] = metrics.server_timing(timings)
+    return response
+
 
 app.add_middleware(
     CORSMiddleware,
@@ -17,24 +203,153 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-reader = easyocr.Reader(['en'])
+def load_image(image_bytes):
+    # ✅ Check the header, then decode at no more resolution than OCR needs
+    with metrics.stage("decode"):
+        img = decode_image(image_bytes)
+    # Large JPEGs decode reduced; the stats compare against the full size
+    _, width, height = sniff_image(image_bytes)
+    return prepare_image(img, width * height)
+
+
+def load_pdf_page(pdf, index):
+    with metrics.stage("decode"):
+        img = render_pdf_page(pdf, index)
+    return prepare_image(img)
+
+
+def prepare_image(img, source_pixels=None):
+    # Scale so text lands near the OCR sweet spot instead of a blanket 2x
+    with metrics.stage("resize"):
+        prepared, report = prepare_for_ocr(img)
+    preprocess_stats.record(report, source_pixels)
+    metrics.observe_image(img.shape, prepared.shape)
+    return prepared
 
-def normalize_dob(dob_str: str) -> str:
-    dob_str = dob_str.replace("/", "-").replace(".", "-").replace(" ", "-")
 
-    match = re.match(r"(\d{2})-(\d{2})-(\d{2,4})", dob_str)
-    if not match:
-        return dob_str  
+def card_pages(uploads, documents):
+    """``(cache_key, loader)`` for every image and PDF page, in upload order.
 
-    day, month, year = match.groups()
-    if len(year) == 2:  
-        year = "20" + year if int(year) < 50 else "19" + year
+    Headers are checked here so a bad file fails the request before any OCR;
+    opened PDFs are appended to ``documents`` for the caller to close.
+    """
+    pages = []
+    for data in uploads:
+        if is_pdf(data):
+            pdf, count = open_pdf(data)
+            documents.append(pdf)
+            if len(pages) + count > OCR_MAX_IMAGES:
+                raise IngestError(413, f"At most {OCR_MAX_IMAGES} images or PDF pages per card")
+            for index in range(count):
+                cache_key = ocr_cache.key(data + f"\0page{index}".encode())
+                pages.append((cache_key, partial(load_pdf_page, pdf, index)))
+        else:
+            sniff_image(data)
+            if len(pages) + 1 > OCR_MAX_IMAGES:
+                raise IngestError(413, f"At most {OCR_MAX_IMAGES} images or PDF pages per card")
+            pages.append((ocr_cache.key(data), partial(load_image, data)))
+    if not pages:
+        raise IngestError(400, "The PDF has no pages")
+    return pages
 
+
+async def ocr_page(cache_key, loader):
+    # ✅ Same card as before? Only the scoring needs to run again
+    with metrics.stage("cache"):
+        results = await ocr_cache.get_async(cache_key)
+    if results is None:
+        # ✅ Decoding, resizing and PDF rendering take tens of ms; keep them off the loop
+        resized = await asyncio.to_thread(loader)
+        # ✅ OCR on a pool worker so the event loop stays free
+        with metrics.stage("ocr"):
+            results = await ocr_pool.readtext(resized)
+        metrics.observe_boxes(len(results))
+        await ocr_cache.put_async(cache_key, results)
+    return results
+
+
+async def verify_pages(fields, pages):
+    """OCR several images of one card until every field is verified.
+
+    The first image starts straight away and the others join it only while
+    pool workers are idle, so a busy pool never spends OCR on an image that
+    an earlier one makes unnecessary.  Evidence is merged per field, and
+    images still waiting or running are dropped once the card passes.
+    """
+    waiting = list(enumerate(pages))
+    running = {}
+    per_image = {}
     try:
-        dob = datetime.strptime(f"{day}-{month}-{year}", "%d-%m-%Y")
-        return dob.strftime("%d-%m-%Y")
-    except ValueError:
-        return dob_str
+        while waiting or running:
+            while waiting and (not running or ocr_pool.idle_workers > 0):
+                index, (cache_key, loader) = waiting.pop(0)
+                running[asyncio.create_task(ocr_page(cache_key, loader))] = index
+                # Let the task take its worker before looking for another idle one
+                await asyncio.sleep(0)
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            with metrics.stage("scoring"):
+                for task in done:
+                    per_image[running.pop(task)] = match_fields(
+                        fields["name"], fields["college_name"], fields["academic_year"], fields["dob"],
+                        task.result(), college_directory,
+                    )
+                result = verdict(merge_matches(per_image))
+            if result["status"] == "success":
+                break
+    finally:
+        for task in running:
+            task.cancel()
+
+    result["images"] = {
+        "received": len(pages),
+        "processed": len(per_image),
+        "skipped": len(pages) - len(per_image),
+    }
+    return result
+
+
+async def run_verification(fields, uploads):
+    """Cache lookup → decode → OCR → scoring, shared by every verify route.
+
+    ``uploads`` are the raw images (or PDFs) of one card.  Raises
+    ``IngestError`` for bad files and ``OcrSaturated`` when busy.
+    """
+    documents = []
+    try:
+        # Opening a PDF waits for PDFIUM_LOCK, which a page render may hold
+        pages = await asyncio.to_thread(card_pages, uploads, documents)
+        if len(pages) > 1:
+            return await verify_pages(fields, pages)
+        results = await ocr_page(*pages[0])
+        with metrics.stage("scoring"):
+            return score_fields(
+                fields["name"], fields["college_name"], fields["academic_year"], fields["dob"],
+                results, college_directory,
+            )
+    finally:
+        for pdf in documents:
+            await asyncio.to_thread(close_pdf, pdf)
+
+
+async def run_job(fields, image_bytes):
+    try:
+        return await run_verification(fields, [image_bytes])
+    except OcrSaturated as exc:
+        # Leave the job queued; interactive requests get the pool first
+        raise RetryLater(exc.retry_after)
+    except IngestError as exc:
+        raise ValueError(exc.detail)
+
+
+job_workers = JobWorkers(job_queue, run_job)
+
+
+def busy_error(exc):
+    return HTTPException(
+        status_code=503,
+        detail="OCR service is busy, please retry shortly",
+        headers={"Retry-After": str(exc.retry_after)},
+    )
 
 
 @app.post("/verify")
@@ -43,61 +358,237 @@ async def verify_student(
     college_name: str = Form(...),
     academic_year: str = Form(...),
     dob: str = Form(...),
-    id_card: UploadFile = File(...)
+    id_card: List[UploadFile] = File(...)
 ):
-    # ✅ Read file into memory as bytes
-    image_bytes = await id_card.read()
+    """Verify a card from one image, or from several (front, back, PDF pages).
 
-    # ✅ Convert bytes → numpy array → OpenCV image
-    np_arr = np.frombuffer(image_bytes, np.uint8)
-    img = cv2.imdecode(np_arr, cv2.IMREAD_COLOR)
+    Repeat ``id_card`` to send more than one image; the response then says
+    how many were OCR'd before the card verified.
+    """
+    fields = {"name": name, "college_name": college_name, "academic_year": academic_year, "dob": dob}
+    try:
+        if len(id_card) > OCR_MAX_IMAGES:
+            raise IngestError(413, f"At most {OCR_MAX_IMAGES} images or PDF pages per card")
+        # ✅ Read files into memory as bytes, up to the upload cap
+        with metrics.stage("read"):
+            uploads = [await read_upload(upload) for upload in id_card]
+        return await run_verification(fields, uploads)
+    except IngestError as exc:
+        raise HTTPException(status_code=exc.status_code, detail=exc.detail)
+    except OcrSaturated as exc:
+        raise busy_error(exc)
 
-    # Resize for better OCR
-    scale_percent = 200
-    width = int(img.shape[1] * scale_percent / 100)
-    height = int(img.shape[0] * scale_percent / 100)
-    resized = cv2.resize(img, (width, height), interpolation=cv2.INTER_CUBIC)
 
-    # ✅ OCR directly on the in-memory image
-    results = reader.readtext(resized)
-    extracted_text = " ".join([text for (_, text, prob) in results])
+@app.post("/verify/jobs", status_code=202)
+async def create_verification_job(
+    name: str = Form(...),
+    college_name: str = Form(...),
+    academic_year: str = Form(...),
+    dob: str = Form(...),
+    id_card: UploadFile = File(...),
+    callback_url: Optional[str] = Form(None)
+):
+    """Queue a verification and return its job id without waiting for OCR."""
+    if callback_url:
+        problem = await asyncio.to_thread(check_callback_url, callback_url)
+        if problem:
+            raise HTTPException(status_code=400, detail=problem)
+    try:
+        image_bytes = await read_upload(id_card)
+        # Reject non-images now rather than after they reach a worker
+        sniff_image(image_bytes)
+    except IngestError as exc:
+        raise HTTPException(status_code=exc.status_code, detail=exc.detail)
 
-    # Normalize DoB and extracted text
-    dob_norm = normalize_dob(dob)
-    extracted_text_norm = normalize_dob(extracted_text)
+    fields = {"name": name, "college_name": college_name, "academic_year": academic_year, "dob": dob}
+    try:
+        job_id = await asyncio.to_thread(job_queue.enqueue, fields, image_bytes, callback_url)
+    except QueueFull:
+        raise HTTPException(
+            status_code=503,
+            detail="Verification queue is full, please retry later",
+            headers={"Retry-After": "30"},
+        )
+    job_workers.notify()
+    return {"job_id": job_id, "status": "queued", "status_url": f"/verify/jobs/{job_id}"}
 
-    # Fuzzy matching
-    name_score = fuzz.partial_ratio(name.lower(), extracted_text.lower())
-    college_score = fuzz.partial_ratio(college_name.lower(), extracted_text.lower())
-    year_score = fuzz.partial_ratio(academic_year.lower(), extracted_text.lower())
-    dob_score = fuzz.partial_ratio(dob_norm.lower(), extracted_text_norm.lower())
 
-    strict_threshold = 70
-    avg_threshold = 75
+@app.get("/verify/jobs/{job_id}")
+async def get_verification_job(job_id: str):
+    job = await asyncio.to_thread(job_queue.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
 
-    name_verified = name_score >= strict_threshold
-    college_verified = college_score >= strict_threshold
-    dob_verified = dob_score >= strict_threshold
 
-    avg_score = (name_score + college_score + year_score + dob_score) / 4
+def pad_batch(images):
+    """Pad images onto a shared white canvas so they can be OCR'd as one batch.
 
-    if name_verified and college_verified and dob_verified and avg_score >= avg_threshold:
-        status = "success"
-    else:
-        status = "error"
+    ``readtext_batched`` needs equally sized inputs; padding at the bottom and
+    right keeps aspect ratio and box coordinates intact.
+    """
+    height = max(img.shape[0] for img in images)
+    width = max(img.shape[1] for img in images)
+    padded = []
+    for img in images:
+        canvas = np.full((height, width) + img.shape[2:], 255, dtype=np.uint8)
+        canvas[:img.shape[0], :img.shape[1]] = img
+        padded.append(canvas)
+    return padded
 
+
+async def run_batch_chunk(chunk, forms, limit):
+    indexes = [index for index, _, _ in chunk]
+    images = pad_batch([img for _, _, img in chunk])
+    async with limit:
+        try:
+            with metrics.stage("ocr_batch"):
+                batch_results = await ocr_pool.readtext_batched(images)
+        except OcrSaturated:
+            return [
+                {"index": index, "status": "error", "detail": "OCR service is busy, please retry shortly"}
+                for index in indexes
+            ]
+        except Exception as exc:
+            # The exception can name worker internals and paths; it stays in the server log
+            print(f"❌ Batch OCR failed for items {indexes} ({type(exc).__name__}: {exc})")
+            return [{"index": index, "status": "error", "detail": "OCR failed"} for index in indexes]
+
+    items = []
+    for (index, cache_key, _), results in zip(chunk, batch_results):
+        metrics.observe_boxes(len(results))
+        await ocr_cache.put_async(cache_key, results)
+        try:
+            with metrics.stage("scoring"):
+                items.append({"index": index, **score_fields(*forms[index], results, college_directory)})
+        except Exception as exc:
+            print(f"❌ Scoring failed for batch item {index} ({type(exc).__name__}: {exc})")
+            items.append({"index": index, "status": "error", "detail": "Scoring failed"})
+    return items
+
+
+def prepare_batch_item(image_bytes):
+    """``(cache_key, cached results, None)`` or ``(cache_key, None, image)`` for one card.
+
+    Hashing, the cache lookup and decoding are all blocking; called in a thread.
+    """
+    cache_key = ocr_cache.key(image_bytes)
+    results = ocr_cache.get(cache_key)
+    if results is not None:
+        return cache_key, results, None
+    return cache_key, None, load_image(image_bytes)
+
+
+@app.post("/verify/batch")
+async def verify_batch(
+    name: List[str] = Form(...),
+    college_name: List[str] = Form(...),
+    academic_year: List[str] = Form(...),
+    dob: List[str] = Form(...),
+    id_card: List[UploadFile] = File(...)
+):
+    """Verify many cards at once, streaming one NDJSON line per card.
+
+    Fields are repeated once per card and matched up by position.  Cards are
+    grouped by size into batched OCR passes; a bad item gets an error line
+    without failing the rest of the batch.
+    """
+    count = len(id_card)
+    if not (len(name) == len(college_name) == len(academic_year) == len(dob) == count):
+        raise HTTPException(
+            status_code=400,
+            detail="name, college_name, academic_year, dob and id_card must be repeated the same number of times",
+        )
+    if count > OCR_MAX_BATCH_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {OCR_MAX_BATCH_ITEMS} cards per batch")
+
+    forms = list(zip(name, college_name, academic_year, dob))
+    # Only the bytes are read here: the form's files are closed once the handler returns
+    uploads = []
+    for index, upload in enumerate(id_card):
+        try:
+            uploads.append((index, await read_upload(upload), None))
+        except IngestError as exc:
+            uploads.append((index, None, exc.detail))
+    limit = asyncio.Semaphore(ocr_pool.workers)
+
+    async def stream():
+        # Errors and cache hits go out as they are found; decoding runs off the loop
+        decoded = []
+        for index, image_bytes, error in uploads:
+            results = None
+            if error is None:
+                try:
+                    cache_key, results, image = await asyncio.to_thread(prepare_batch_item, image_bytes)
+                except IngestError as exc:
+                    error = exc.detail
+            if error is not None:
+                yield json.dumps({"index": index, "status": "error", "detail": error}) + "\n"
+            elif results is not None:
+                yield json.dumps({"index": index, **score_fields(*forms[index], results, college_directory)}) + "\n"
+            else:
+                decoded.append((index, cache_key, image))
+
+        # Similar sizes go together so padding wastes as little as possible
+        decoded.sort(key=lambda item: item[2].shape[0] * item[2].shape[1])
+        chunks = [decoded[i:i + OCR_BATCH_SIZE] for i in range(0, len(decoded), OCR_BATCH_SIZE)]
+        tasks = [asyncio.create_task(run_batch_chunk(chunk, forms, limit)) for chunk in chunks]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                for item in await finished:
+                    yield json.dumps(item) + "\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+@app.get("/ocr/stats")
+async def ocr_stats():
     return {
-        "status": status,
-        "similarity_scores": {
-            "name": name_score,
-            "college_name": college_score,
-            "academic_year": year_score,
-            "dob": dob_score,
-            "average": round(avg_score, 2)
-        },
-        "field_status": {
-            "name": "passed" if name_verified else "failed",
-            "college_name": "passed" if college_verified else "failed",
-            "dob": "passed" if dob_verified else "failed",
-        }
+        **ocr_pool.stats(),
+        "preprocessing": preprocess_stats.snapshot(),
+        "cache": ocr_cache.stats(),
+        "jobs": await asyncio.to_thread(job_queue.stats),
     }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    pool = ocr_pool.stats()
+    cache = ocr_cache.stats()
+    jobs = await asyncio.to_thread(job_queue.stats)
+    memory = {}
+    processes = [("server", pool["memory"]["server"])]
+    processes += [("ocr_worker", worker) for worker in pool["memory"]["workers"]]
+    for role, process in processes:
+        for kind in ("rss", "shared", "private"):
+            if f"{kind}_mb" in process:
+                memory[f'process="{role}",pid="{process["pid"]}",kind="{kind}"'] = process[f"{kind}_mb"]
+    gauges = [
+        ("ocr_in_flight", "gauge", "OCR calls admitted to the pool", pool["in_flight"]),
+        ("ocr_queue_depth", "gauge", "OCR calls waiting for a free worker", pool["queue_depth"]),
+        ("ocr_capacity", "gauge", "OCR calls the pool admits before answering 503", pool["capacity"]),
+        ("ocr_completed_total", "counter", "OCR calls finished", pool["completed"]),
+        ("ocr_failed_total", "counter", "OCR calls that raised", pool["failed"]),
+        ("ocr_rejected_total", "counter", "OCR calls refused because the pool was full", pool["rejected"]),
+        ("ocr_pool_restarts_total", "counter", "OCR process pools rebuilt after a worker died", pool["restarts"]),
+        ("ocr_cache_entries", "gauge", "OCR results held in memory", cache["entries"]),
+        ("ocr_cache_hits_total", "counter", "OCR cache hits", cache["memory_hits"] + cache["disk_hits"]),
+        ("ocr_cache_misses_total", "counter", "OCR cache misses", cache["misses"]),
+        ("ocr_process_memory_mb", "gauge", "Resident memory of the server and OCR workers", memory),
+        ("verify_jobs", "gauge", "Verification jobs by status",
+         {f'status="{status}"': count for status, count in jobs.items()}),
+    ]
+    return metrics.render(gauges)
+
+
+@app.get("/health")
+async def health_check():
+    return {"status": "alive"}
+
+
+@app.get("/ready")
+async def readiness():
+    return JSONResponse(status_code=200 if startup["ready"] else 503, content=startup)
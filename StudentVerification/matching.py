@@ -0,0 +1,211 @@
+"""Box-level matching of form fields against OCR output.
+
+Each form field is compared with individual OCR boxes and with windows of
+up to ``MAX_WINDOW`` adjacent boxes (so a name split over two boxes still
+matches), using rapidfuzz's vectorized ``process.cdist``.  Dates are pulled
+out of the boxes with precompiled patterns and compared after
+normalization.  The winning box(es) are returned with every score so a
+verdict can be explained.
+"""
+import re
+from datetime import datetime
+
+import numpy as np
+from rapidfuzz import fuzz, process
+
+STRICT_THRESHOLD = 70
+AVG_THRESHOLD = 75
+MAX_WINDOW = 3
+
+LEADING_DATE = re.compile(r"(\d{2})-(\d{2})-(\d{2,4})")
+DATE_PATTERN = re.compile(r"(?<!\d)(\d{1,2})[\s./-]{1,2}(\d{1,2})[\s./-]{1,2}(\d{4}|\d{2})(?!\d)")
+
+
+def _format_date(day, month, year):
+    if len(year) == 2:
+        year = "20" + year if int(year) < 50 else "19" + year
+    try:
+        return datetime.strptime(f"{day}-{month}-{year}", "%d-%m-%Y").strftime("%d-%m-%Y")
+    except ValueError:
+        return None
+
+
+def normalize_dob(dob_str: str) -> str:
+    dob_str = dob_str.replace("/", "-").replace(".", "-").replace(" ", "-")
+
+    match = LEADING_DATE.match(dob_str)
+    if not match:
+        return dob_str
+
+    return _format_date(*match.groups()) or dob_str
+
+
+def extract_dates(text):
+    """All valid dates in ``text``, normalized to dd-mm-yyyy."""
+    dates = []
+    for match in DATE_PATTERN.finditer(text):
+        date = _format_date(*match.groups())
+        if date:
+            dates.append(date)
+    return dates
+
+
+def build_windows(results):
+    """``(text, first_box, last_box)`` for every run of 1..MAX_WINDOW adjacent boxes.
+
+    Single boxes come first so ties resolve to the tightest match.
+    """
+    texts = [text for _, text, _ in results]
+    windows = []
+    for size in range(1, MAX_WINDOW + 1):
+        for start in range(len(texts) - size + 1):
+            windows.append((" ".join(texts[start:start + size]), start, start + size - 1))
+    return windows
+
+
+def window_scores(queries, choices):
+    """Score matrix of ``queries`` against ``choices``.
+
+    ``partial_ratio`` finds a field inside a longer window, but it would also
+    give a perfect score to a window that is just a fragment of the field
+    ("Sharma" for "Priya Sharma"), so windows shorter than the field are
+    scored with plain ``ratio`` instead.
+    """
+    partial = process.cdist(queries, choices, scorer=fuzz.partial_ratio)
+    full = process.cdist(queries, choices, scorer=fuzz.ratio)
+    query_lengths = np.array([len(query) for query in queries])[:, None]
+    choice_lengths = np.array([len(choice) for choice in choices])[None, :]
+    return np.where(choice_lengths >= query_lengths, partial, full)
+
+
+def _describe(results, window, score):
+    text, first, last = window
+    boxes = results[first:last + 1]
+    return {
+        "text": text,
+        "box_indexes": list(range(first, last + 1)),
+        "boxes": [[[int(x), int(y)] for x, y in box] for box, _, _ in boxes],
+        "confidence": round(float(min(prob for _, _, prob in boxes)), 3),
+        "score": score,
+    }
+
+
+def match_college(colleges, college_name, windows):
+    """Find an OCR window naming the same known college as the form.
+
+    Returns ``(canonical_name, score, window)``; ``window`` is ``None`` when
+    the submitted name is known but no window resolves to it.
+    """
+    submitted = colleges.resolve(college_name)
+    if submitted is None:
+        return None
+    canonical = submitted[0]
+    best_score, best_window = 0.0, None
+    for window in windows:
+        resolved = colleges.resolve(window[0])
+        if resolved and resolved[0] == canonical and resolved[1] > best_score:
+            best_score, best_window = resolved[1], window
+    return canonical, best_score, best_window
+
+
+def match_fields(name, college_name, academic_year, dob, results, colleges=None):
+    """Best score and matching window for every form field."""
+    windows = build_windows(results)
+    matches = {}
+    if not windows:
+        return {field: (0.0, None) for field in ("name", "college_name", "academic_year", "dob")}
+
+    choices = [text.lower() for text, _, _ in windows]
+    fields = {"name": name, "college_name": college_name, "academic_year": academic_year}
+    scores = window_scores([value.lower() for value in fields.values()], choices)
+    for row, field in enumerate(fields):
+        best = int(scores[row].argmax())
+        score = round(float(scores[row][best]), 2)
+        matches[field] = (score, _describe(results, windows[best], score))
+
+    if colleges is not None:
+        college = match_college(colleges, college_name, windows)
+        if college is not None:
+            canonical, score, window = college
+            if window is not None and score > matches["college_name"][0]:
+                matches["college_name"] = (score, _describe(results, window, score))
+            matches["college_name"][1]["canonical"] = canonical if window is not None else None
+            matches["college_name"][1]["submitted_canonical"] = canonical
+
+    dob_norm = normalize_dob(dob)
+    dates = []
+    date_windows = []
+    seen = set()
+    for window in windows:
+        for date in extract_dates(window[0]):
+            if date not in seen:
+                seen.add(date)
+                dates.append(date)
+                date_windows.append(window)
+
+    if dates:
+        _, score, best = process.extractOne(dob_norm, dates, scorer=fuzz.ratio)
+        window = date_windows[best]
+    else:
+        # No recognizable date on the card; fall back to plain text matching
+        dob_scores = window_scores([dob_norm.lower()], choices)[0]
+        best = int(dob_scores.argmax())
+        score = dob_scores[best]
+        window = windows[best]
+    score = round(float(score), 2)
+    matches["dob"] = (score, _describe(results, window, score))
+    return matches
+
+
+def merge_matches(per_image):
+    """Best evidence for every field across several images of one card.
+
+    ``per_image`` maps an image index to its ``match_fields`` result; each
+    kept match records the ``image`` it came from.
+    """
+    merged = {}
+    for image, matches in per_image.items():
+        for field, (score, match) in matches.items():
+            if field not in merged or score > merged[field][0]:
+                merged[field] = (score, {**match, "image": image} if match else match)
+    return merged
+
+
+def score_fields(name, college_name, academic_year, dob, results, colleges=None):
+    return verdict(match_fields(name, college_name, academic_year, dob, results, colleges))
+
+
+def verdict(matches):
+    """Thresholds applied to ``match_fields`` (or ``merge_matches``) output."""
+    name_score = matches["name"][0]
+    college_score = matches["college_name"][0]
+    year_score = matches["academic_year"][0]
+    dob_score = matches["dob"][0]
+
+    name_verified = name_score >= STRICT_THRESHOLD
+    college_verified = college_score >= STRICT_THRESHOLD
+    dob_verified = dob_score >= STRICT_THRESHOLD
+
+    avg_score = (name_score + college_score + year_score + dob_score) / 4
+
+    if name_verified and college_verified and dob_verified and avg_score >= AVG_THRESHOLD:
+        status = "success"
+    else:
+        status = "error"
+
+    return {
+        "status": status,
+        "similarity_scores": {
+            "name": name_score,
+            "college_name": college_score,
+            "academic_year": year_score,
+            "dob": dob_score,
+            "average": round(avg_score, 2)
+        },
+        "field_status": {
+            "name": "passed" if name_verified else "failed",
+            "college_name": "passed" if college_verified else "failed",
+            "dob": "passed" if dob_verified else "failed",
+        },
+        "matches": {field: match for field, (_, match) in matches.items()},
+    }
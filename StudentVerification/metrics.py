@@ -0,0 +1,160 @@
+"""Per-stage timings and Prometheus metrics for the verification service.
+
+Every verification is split into stages (upload read, cache lookup, decode,
+resize, OCR, scoring) timed with ``time.perf_counter``.  Timings, image
+sizes and OCR box counts go into histograms served as Prometheus text on
+``/metrics``.  With ``SERVER_TIMING=1`` the same stage timings are also
+returned on each ``/verify*`` response as a ``Server-Timing`` header, which
+browser dev tools and ``curl -v`` show directly.
+
+``METRICS_ENABLED=0`` turns recording off; with both switches off a stage
+costs one context-variable lookup.
+"""
+import os
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+SERVER_TIMING = os.getenv("SERVER_TIMING", "0") == "1"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIDE_BUCKETS = (320, 640, 960, 1280, 1600, 2048, 3000, 4000, 6000, 8000)
+BOX_BUCKETS = (0, 1, 2, 5, 10, 20, 40, 80, 160)
+
+# Stage timings of the current request, only set when Server-Timing is on
+_request_timings = ContextVar("request_timings", default=None)
+
+
+class Histogram:
+    """A Prometheus histogram, optionally split by one label."""
+
+    def __init__(self, name, help, buckets, label=None):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self.label = label
+        # label value -> [per-bucket counts, sum, count]
+        self.series = {}
+
+    def observe(self, value, label_value=""):
+        series = self.series.get(label_value)
+        if series is None:
+            series = self.series[label_value] = [[0] * len(self.buckets), 0.0, 0]
+        index = bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            series[0][index] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for label_value, (counts, total, count) in sorted(self.series.items()):
+            labels = f'{self.label}="{label_value}",' if self.label else ""
+            cumulative = 0
+            for bound, hits in zip(self.buckets, counts):
+                cumulative += hits
+                lines.append(f'{self.name}_bucket{{{labels}le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{labels}le="+Inf"}} {count}')
+            selector = f"{{{labels.rstrip(',')}}}" if labels else ""
+            lines.append(f"{self.name}_sum{selector} {round(total, 6)}")
+            lines.append(f"{self.name}_count{selector} {count}")
+        return lines
+
+
+request_seconds = Histogram(
+    "verify_request_seconds", "Time to response headers per verification route", LATENCY_BUCKETS, "route"
+)
+stage_seconds = Histogram(
+    "verify_stage_seconds", "Time spent in each verification stage", LATENCY_BUCKETS, "stage"
+)
+image_long_side = Histogram(
+    "verify_image_long_side_pixels", "Long side of decoded uploads and of the image given to OCR",
+    SIDE_BUCKETS, "image",
+)
+ocr_boxes = Histogram("verify_ocr_boxes", "Text boxes found by OCR per card", BOX_BUCKETS)
+
+HISTOGRAMS = (request_seconds, stage_seconds, image_long_side, ocr_boxes)
+
+requests_in_flight = 0
+
+
+@contextmanager
+def stage(name):
+    """Time a block as stage ``name`` of the current verification."""
+    timings = _request_timings.get()
+    if not METRICS_ENABLED and timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        if METRICS_ENABLED:
+            stage_seconds.observe(elapsed, name)
+        if timings is not None:
+            timings[name] = timings.get(name, 0.0) + elapsed
+
+
+def observe_image(decoded_shape, ocr_shape):
+    if METRICS_ENABLED:
+        image_long_side.observe(max(decoded_shape[:2]), "decoded")
+        image_long_side.observe(max(ocr_shape[:2]), "ocr")
+
+
+def observe_boxes(count):
+    if METRICS_ENABLED:
+        ocr_boxes.observe(count)
+
+
+@contextmanager
+def track_request():
+    """Count a verification request as in flight.
+
+    Yields the dict its stage timings are collected in when Server-Timing
+    is on, else ``None``.  The caller records the route once it is known.
+    """
+    global requests_in_flight
+    timings = {} if SERVER_TIMING else None
+    token = _request_timings.set(timings)
+    requests_in_flight += 1
+    started = time.perf_counter()
+    try:
+        yield timings
+    finally:
+        requests_in_flight -= 1
+        _request_timings.reset(token)
+        if timings is not None:
+            timings["total"] = time.perf_counter() - started
+
+
+def observe_request(route, seconds):
+    if METRICS_ENABLED:
+        request_seconds.observe(seconds, route)
+
+
+def server_timing(timings):
+    return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings.items())
+
+
+def render(gauges):
+    """Prometheus text for the histograms plus ``gauges``.
+
+    ``gauges`` is a list of ``(name, type, help, value)``; ``value`` is a
+    number or a ``{label_text: number}`` dict such as ``{'status="queued"': 3}``.
+    """
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.render())
+    gauges = [("verify_requests_in_flight", "gauge", "Verification requests being handled", requests_in_flight),
+              *gauges]
+    for name, kind, help, value in gauges:
+        lines.append(f"# HELP {name} {help}")
+        lines.append(f"# TYPE {name} {kind}")
+        if isinstance(value, dict):
+            lines.extend(f"{name}{{{labels}}} {number}" for labels, number in value.items())
+        else:
+            lines.append(f"{name} {value}")
+    return "\n".join(lines) + "\n"
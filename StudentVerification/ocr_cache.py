@@ -0,0 +1,204 @@
+"""Content-addressed cache of OCR output.
+
+Users often resubmit the same card after fixing a typo in the form, so the
+OCR result (boxes, text, confidences) is cached by a hash of the uploaded
+bytes.  A retry then only pays for the rapidfuzz scoring.
+
+Entries live in an in-memory LRU bounded by ``OCR_CACHE_SIZE`` and
+``OCR_CACHE_TTL``.  When ``OCR_CACHE_DIR`` is set, entries are also written
+there as JSON so other workers (and restarts) can reuse them.
+
+Async handlers use ``get_async``/``put_async``: memory hits are answered on
+the event loop, disk reads run in a thread, and disk writes (with the
+periodic prune of expired files) run in the background.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+OCR_CACHE_SIZE = int(os.getenv("OCR_CACHE_SIZE", "256"))
+OCR_CACHE_TTL = float(os.getenv("OCR_CACHE_TTL", "900"))
+OCR_CACHE_DIR = os.getenv("OCR_CACHE_DIR", "")
+
+# Expired files in the disk tier are swept once every this many writes
+PRUNE_EVERY = 100
+
+
+def _plain(results):
+    """Convert EasyOCR output (numpy scalars inside) into JSON-friendly lists."""
+    return [
+        ([[int(x), int(y)] for x, y in box], str(text), float(prob))
+        for box, text, prob in results
+    ]
+
+
+class OcrCache:
+    def __init__(self, namespace="", size=OCR_CACHE_SIZE, ttl=OCR_CACHE_TTL, directory=OCR_CACHE_DIR):
+        self.namespace = namespace.encode()
+        self.size = size
+        self.ttl = ttl
+        self.directory = directory or None
+        self._entries = OrderedDict()
+        self._writes = 0
+        # Threads (batch decoding, disk writes) share the memory tier with the loop
+        self._lock = threading.Lock()
+        self._pruning = threading.Lock()
+        self._background = set()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+
+    @property
+    def enabled(self):
+        return self.size > 0 or self.directory is not None
+
+    def key(self, image_bytes):
+        # The namespace carries OCR settings, so changing them never reuses stale text
+        return hashlib.sha256(self.namespace + b"\0" + image_bytes).hexdigest()
+
+    def get(self, key):
+        """Blocking lookup, memory then disk; call it from a thread"""
+        if not self.enabled:
+            return None
+        now = time.time()
+        results = self._get_memory(key, now)
+        if results is not None:
+            return results
+        return self._get_disk(key, now)
+
+    async def get_async(self, key):
+        if not self.enabled:
+            return None
+        now = time.time()
+        results = self._get_memory(key, now)
+        if results is not None:
+            return results
+        if self.directory is None:
+            return self._get_disk(key, now)
+        return await asyncio.to_thread(self._get_disk, key, now)
+
+    def put(self, key, results):
+        """Blocking store, memory and disk; call it from a thread"""
+        if not self.enabled:
+            return
+        results = _plain(results)
+        self._remember(key, results, time.time())
+        self._write_disk(key, results)
+
+    async def put_async(self, key, results):
+        if not self.enabled:
+            return
+        results = _plain(results)
+        self._remember(key, results, time.time())
+        if self.directory is None:
+            return
+        # The response doesn't wait for the file; keep a reference until it is written
+        task = asyncio.create_task(asyncio.to_thread(self._write_disk, key, results))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    def _get_memory(self, key, now):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, results = entry
+                if now - stored_at <= self.ttl:
+                    self._entries.move_to_end(key)
+                    self.memory_hits += 1
+                    return results
+                del self._entries[key]
+        return None
+
+    def _get_disk(self, key, now):
+        results = self._read_disk(key, now)
+        if results is not None:
+            self.disk_hits += 1
+            self._remember(key, results, now)
+            return results
+        self.misses += 1
+        return None
+
+    def _remember(self, key, results, now):
+        if self.size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (now, results)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".json")
+
+    def _read_disk(self, key, now):
+        if not self.directory:
+            return None
+        path = self._path(key)
+        try:
+            if now - os.path.getmtime(path) > self.ttl:
+                os.remove(path)
+                return None
+            with open(path) as f:
+                return [tuple(item) for item in json.load(f)]
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, key, results):
+        if not self.directory:
+            return
+        try:
+            # Write then rename so other workers never read a half-written file
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump(results, f)
+            os.replace(tmp_path, self._path(key))
+        except OSError as exc:
+            print(f"⚠️ Could not write OCR cache entry: {exc}")
+            return
+
+        with self._lock:
+            self._writes += 1
+            due = self._writes % PRUNE_EVERY == 0
+        if due:
+            self._prune_disk()
+
+    def _prune_disk(self):
+        # One sweep at a time; a write that finds one running skips its turn
+        if not self._pruning.acquire(blocking=False):
+            return
+        try:
+            self._sweep()
+        finally:
+            self._pruning.release()
+
+    def _sweep(self):
+        cutoff = time.time() - self.ttl
+        for entry in os.scandir(self.directory):
+            try:
+                if entry.name.endswith(".json") and entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+            except OSError:
+                pass
+
+    def stats(self):
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        hits = self.memory_hits + self.disk_hits
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.size,
+            "ttl_seconds": self.ttl,
+            "disk_tier": self.directory is not None,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+        }
@@ -0,0 +1,336 @@
+"""Bounded OCR execution layer for the verification service.
+
+EasyOCR inference is CPU heavy and synchronous, so it runs in a pool of
+workers (processes by default, threads optionally) that each own their own
+``easyocr.Reader``.  Requests are admitted only while the pool has room;
+once ``workers + queue_size`` jobs are pending, new work is rejected with
+``OcrSaturated`` so the API can answer 503 straight away instead of piling
+up latency.
+
+Set ``OCR_MODEL_DIR`` to a directory holding the EasyOCR weights and
+``OCR_DOWNLOAD_MODELS=0`` to make sure nothing is fetched at runtime.
+``OCR_BACKEND`` selects how the networks run (see ``backends``).
+
+With ``OCR_PRELOAD=1`` the process pool loads the weights once in the
+server process and forks its workers from it, so every worker maps the same
+weight pages copy-on-write instead of holding a private copy.  ``stats()``
+reports each worker's shared and private memory so the saving can be
+checked (``shared_mb`` grows, ``private_mb`` shrinks).
+
+A worker process that dies (e.g. killed by the OOM killer) breaks the whole
+process pool.  The request that hit it gets ``OcrSaturated`` (so a 503 with
+Retry-After), the pool is rebuilt with fresh workers and the restart is
+counted in ``stats()``.  By then the server runs other threads, so a
+preloaded pool is not forked again: the new workers are started with
+``OCR_START_METHOD`` and load their own reader.
+"""
+import asyncio
+import gc
+import multiprocessing as mp
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+
+from backends import OCR_BACKEND
+
+OCR_EXECUTOR = os.getenv("OCR_EXECUTOR", "process")
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", str(os.cpu_count() or 1)))
+OCR_TORCH_THREADS = int(os.getenv("OCR_TORCH_THREADS", "1"))
+OCR_QUEUE_SIZE = int(os.getenv("OCR_QUEUE_SIZE", str(OCR_WORKERS * 4)))
+OCR_RETRY_AFTER = int(os.getenv("OCR_RETRY_AFTER", "2"))
+OCR_START_METHOD = os.getenv("OCR_START_METHOD", "spawn")
+OCR_LANGUAGES = os.getenv("OCR_LANGUAGES", "en").split(",")
+OCR_MODEL_DIR = os.getenv("OCR_MODEL_DIR", "")
+OCR_DOWNLOAD_MODELS = os.getenv("OCR_DOWNLOAD_MODELS", "1") == "1"
+OCR_PRELOAD = os.getenv("OCR_PRELOAD", "0") == "1"
+
+# Each worker (process or thread) keeps its own reader here.
+_local = threading.local()
+# Reader loaded by the server process before forking workers (OCR_PRELOAD)
+_preloaded = None
+
+
+def _init_worker(languages, torch_threads, model_dir, download, backend):
+    started = time.perf_counter()
+    import torch
+
+    torch.set_num_threads(torch_threads)
+    if _preloaded is not None:
+        _local.reader = _preloaded
+    else:
+        from backends import create_reader
+
+        _local.reader = create_reader(languages, model_dir, download, backend, torch_threads)
+    _local.load_seconds = time.perf_counter() - started
+
+
+def _preload(languages, model_dir, download, backend):
+    """Load the reader in the server process so forked workers share its pages.
+
+    The server never runs inference with it: a fork after torch has started
+    its intra-op thread pool can leave workers deadlocked.
+    """
+    global _preloaded
+    import torch
+    from backends import create_reader
+
+    torch.set_num_threads(1)
+    _preloaded = create_reader(languages, model_dir, download, backend, 1)
+    for module in (_preloaded.detector, _preloaded.recognizer):
+        # Weights move to shared memory, so allocator writes next to them
+        # in a worker cannot turn the pages private
+        module.share_memory()
+    # Freeze everything allocated so far so the workers' garbage collector
+    # doesn't write to (and so copy) the pages of these objects
+    gc.collect()
+    gc.freeze()
+
+
+def process_memory(pid):
+    """RSS of a process split into shared and private pages, in MB (Linux)."""
+    fields = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if value.strip().endswith("kB"):
+                    fields[key] = int(value.split()[0])
+    except OSError:
+        return {"pid": pid}
+    return {
+        "pid": pid,
+        "rss_mb": round(fields.get("Rss", 0) / 1024, 1),
+        # PSS divides shared pages among their users; summed it is the real footprint
+        "pss_mb": round(fields.get("Pss", 0) / 1024, 1),
+        "shared_mb": round((fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0)) / 1024, 1),
+        "private_mb": round((fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)) / 1024, 1),
+    }
+
+
+def _run_warmup(image):
+    started = time.perf_counter()
+    _local.reader.readtext(image)
+    return {
+        "worker": f"{os.getpid()}/{threading.current_thread().name}",
+        "load_seconds": round(_local.load_seconds, 3),
+        "warmup_seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def warmup_image():
+    """A small synthetic card, enough to exercise detector and recognizer."""
+    import cv2
+    import numpy as np
+
+    image = np.full((400, 640, 3), 255, dtype=np.uint8)
+    for line, text in enumerate(["SAMPLE COLLEGE OF ENGINEERING", "Name: Test Student", "DOB: 01/01/2000"]):
+        cv2.putText(image, text, (30, 90 + line * 90), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 0), 2)
+    return image
+
+
+def _run_reader(method, *args, **kwargs):
+    started = time.perf_counter()
+    results = getattr(_local.reader, method)(*args, **kwargs)
+    return results, time.perf_counter() - started
+
+
+class OcrSaturated(Exception):
+    """Raised when the OCR queue is full and the request should be retried."""
+
+    def __init__(self, retry_after):
+        super().__init__("OCR queue is full")
+        self.retry_after = retry_after
+
+
+class OcrPool:
+    def __init__(
+        self,
+        executor=OCR_EXECUTOR,
+        workers=OCR_WORKERS,
+        torch_threads=OCR_TORCH_THREADS,
+        queue_size=OCR_QUEUE_SIZE,
+        retry_after=OCR_RETRY_AFTER,
+        languages=OCR_LANGUAGES,
+        start_method=OCR_START_METHOD,
+        model_dir=OCR_MODEL_DIR,
+        download=OCR_DOWNLOAD_MODELS,
+        backend=OCR_BACKEND,
+        preload=OCR_PRELOAD,
+    ):
+        if executor not in ("process", "thread"):
+            raise ValueError(f"Unknown OCR executor: {executor}")
+        self.executor = executor
+        self.workers = max(1, workers)
+        self.torch_threads = max(1, torch_threads)
+        self.queue_size = max(0, queue_size)
+        self.retry_after = retry_after
+        self.languages = languages
+        self.start_method = start_method
+        self.model_dir = model_dir
+        self.download = download
+        self.backend = backend
+        self.preload = preload and executor == "process"
+        if self.preload and backend.startswith("onnx"):
+            # ONNX Runtime sessions own threads that do not survive a fork
+            print(f"⚠️ OCR_PRELOAD is not supported with the {backend} backend, loading per worker")
+            self.preload = False
+        self._pool = None
+        self._restart_lock = threading.Lock()
+        self.restarts = 0
+
+        self._pending = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._run_total = 0.0
+
+    @property
+    def capacity(self):
+        return self.workers + self.queue_size
+
+    @property
+    def idle_workers(self):
+        return max(0, self.workers - self._pending)
+
+    def start(self):
+        if self._pool is None:
+            self._pool = self._create_pool(self.preload)
+
+    def _create_pool(self, preload):
+        initargs = (self.languages, self.torch_threads, self.model_dir, self.download, self.backend)
+        if self.executor == "thread":
+            return ThreadPoolExecutor(
+                max_workers=self.workers,
+                thread_name_prefix="ocr",
+                initializer=_init_worker,
+                initargs=initargs,
+            )
+        start_method = self.start_method
+        if preload:
+            _preload(self.languages, self.model_dir, self.download, self.backend)
+            start_method = "fork"
+        pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=mp.get_context(start_method),
+            initializer=_init_worker,
+            initargs=initargs,
+        )
+        if preload:
+            # A fork pool starts all its workers on the first submit; do
+            # that now, before the server has started other threads
+            pool.submit(os.getpid).result()
+        return pool
+
+    def _restart(self, broken):
+        """Replace ``broken`` with a new pool, unless another request already did"""
+        with self._restart_lock:
+            if self._pool is not broken:
+                return
+            broken.shutdown(wait=False, cancel_futures=True)
+            # Requests keep failing fast on the broken pool until the new one is ready.
+            # Forking the threaded server could deadlock the new workers, and
+            # preloading again would pin a second reader, so they load their own
+            self._pool = self._create_pool(preload=False)
+            self.restarts += 1
+        print(f"⚠️ OCR worker died, process pool restarted ({self.restarts} restarts so far)")
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def warm_up(self):
+        """Have every worker load its reader and run one synthetic inference.
+
+        Returns one timing report per job; all jobs are submitted at once so
+        each idle worker picks one up.
+        """
+        if self._pool is None:
+            raise RuntimeError("OCR pool is not started")
+        loop = asyncio.get_running_loop()
+        image = warmup_image()
+        return await asyncio.gather(*[
+            loop.run_in_executor(self._pool, _run_warmup, image) for _ in range(self.workers)
+        ])
+
+    async def readtext(self, image):
+        """Run ``reader.readtext`` on a worker, or raise ``OcrSaturated``."""
+        return await self._submit("readtext", image)
+
+    async def readtext_batched(self, images):
+        """Run one batched detector/recognizer pass over equally sized images.
+
+        A batch takes a single admission slot, like a single image does.
+        """
+        return await self._submit("readtext_batched", images, batch_size=len(images))
+
+    async def _submit(self, method, *args, **kwargs):
+        if self._pool is None:
+            raise RuntimeError("OCR pool is not started")
+        if self._pending >= self.capacity:
+            self._rejected += 1
+            raise OcrSaturated(self.retry_after)
+
+        self._pending += 1
+        loop = asyncio.get_running_loop()
+        submitted = time.perf_counter()
+        pool = self._pool
+        try:
+            results, run_time = await loop.run_in_executor(
+                pool, partial(_run_reader, method, *args, **kwargs)
+            )
+        except BrokenProcessPool:
+            self._failed += 1
+            # Loading the weights again takes seconds; keep the loop free meanwhile
+            await asyncio.to_thread(self._restart, pool)
+            raise OcrSaturated(self.retry_after)
+        except Exception:
+            self._failed += 1
+            raise
+        finally:
+            self._pending -= 1
+
+        # Wait time is whatever part of the round trip was not spent in OCR
+        wait_time = max(0.0, time.perf_counter() - submitted - run_time)
+        self._completed += 1
+        self._wait_total += wait_time
+        self._wait_max = max(self._wait_max, wait_time)
+        self._run_total += run_time
+        return results
+
+    def stats(self):
+        done = self._completed or 1
+        return {
+            "executor": self.executor,
+            "backend": self.backend,
+            "workers": self.workers,
+            "torch_threads": self.torch_threads,
+            "capacity": self.capacity,
+            "in_flight": self._pending,
+            "queue_depth": max(0, self._pending - self.workers),
+            "completed": self._completed,
+            "failed": self._failed,
+            "rejected": self._rejected,
+            "avg_wait_ms": round(self._wait_total / done * 1000, 2),
+            "max_wait_ms": round(self._wait_max * 1000, 2),
+            "avg_ocr_ms": round(self._run_total / done * 1000, 2),
+            "preload": self.preload,
+            "restarts": self.restarts,
+            "memory": self.memory(),
+        }
+
+    def memory(self):
+        """Shared and private memory of the server and each worker process."""
+        server = process_memory(os.getpid())
+        # The pool's worker processes are the server's only children
+        workers = [process_memory(child.pid) for child in sorted(mp.active_children(), key=lambda child: child.pid)]
+        return {
+            "server": server,
+            "workers": workers,
+            "total_pss_mb": round(sum(p.get("pss_mb", 0) for p in [server, *workers]), 1),
+        }
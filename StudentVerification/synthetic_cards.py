@@ -0,0 +1,139 @@
+"""Synthetic student ID cards with known ground truth, for benchmarks.
+
+Cards are drawn with OpenCV's Hershey fonts, so nothing has to be
+downloaded, and can be degraded the way real uploads are: different
+resolutions, a slight rotation, blur, sensor noise and JPEG compression.
+
+    python synthetic_cards.py --out cards/ --count 50
+"""
+import argparse
+import json
+import os
+import random
+
+import cv2
+import numpy as np
+
+FIRST_NAMES = ["Aarav", "Priya", "Rohan", "Ananya", "Vikram", "Sneha", "Arjun", "Kavya", "Rahul", "Meera"]
+LAST_NAMES = ["Sharma", "Patel", "Iyer", "Deshmukh", "Reddy", "Kulkarni", "Singh", "Nair", "Joshi", "Gupta"]
+COLLEGES = [
+    "Government College of Engineering Pune",
+    "Veermata Jijabai Technological Institute",
+    "St Xavier's College Mumbai",
+    "National Institute of Technology Nagpur",
+    "Shri Ram College of Commerce",
+    "Indian Institute of Science Bangalore",
+]
+YEARS = ["1st Year", "2nd Year", "3rd Year", "4th Year"]
+
+# Base card size; other resolutions are produced by scaling it
+CARD_WIDTH = 1012
+CARD_HEIGHT = 638
+
+DEFAULT_LONG_SIDES = (640, 1280, 2560, 4000)
+
+
+def random_identity(rng):
+    day, month, year = rng.randint(1, 28), rng.randint(1, 12), rng.randint(1998, 2006)
+    return {
+        "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+        "college_name": rng.choice(COLLEGES),
+        "academic_year": rng.choice(YEARS),
+        "dob": f"{day:02d}-{month:02d}-{year}",
+    }
+
+
+def draw_card(identity):
+    card = np.full((CARD_HEIGHT, CARD_WIDTH, 3), 250, dtype=np.uint8)
+    cv2.rectangle(card, (0, 0), (CARD_WIDTH, 120), (120, 60, 20), -1)
+    college = identity["college_name"].upper()
+    scale = min(1.1, (CARD_WIDTH - 60) / cv2.getTextSize(college, cv2.FONT_HERSHEY_DUPLEX, 1.0, 2)[0][0])
+    cv2.putText(card, college, (30, 75), cv2.FONT_HERSHEY_DUPLEX, scale, (255, 255, 255), 2, cv2.LINE_AA)
+
+    # Photo placeholder
+    cv2.rectangle(card, (40, 170), (260, 450), (200, 200, 200), -1)
+    cv2.circle(card, (150, 270), 60, (160, 160, 160), -1)
+
+    lines = [
+        f"Name: {identity['name']}",
+        f"DOB: {identity['dob'].replace('-', '/')}",
+        f"Course: B.Tech {identity['academic_year']}",
+        f"ID No: {random.Random(identity['name']).randint(100000, 999999)}",
+    ]
+    for row, text in enumerate(lines):
+        cv2.putText(card, text, (300, 220 + row * 70), cv2.FONT_HERSHEY_SIMPLEX, 1.1, (20, 20, 20), 2, cv2.LINE_AA)
+    cv2.putText(card, "STUDENT IDENTITY CARD", (300, 560), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (120, 60, 20), 2, cv2.LINE_AA)
+    return card
+
+
+def degrade(card, rng, long_side, rotation=0.0, blur=0.0, noise=0.0):
+    scale = long_side / max(card.shape[:2])
+    interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_CUBIC
+    image = cv2.resize(card, None, fx=scale, fy=scale, interpolation=interpolation)
+
+    if rotation:
+        height, width = image.shape[:2]
+        matrix = cv2.getRotationMatrix2D((width / 2, height / 2), rotation, 1.0)
+        image = cv2.warpAffine(image, matrix, (width, height), borderValue=(255, 255, 255))
+    if blur:
+        image = cv2.GaussianBlur(image, (0, 0), blur * scale)
+    if noise:
+        grain = np.random.default_rng(rng.randint(0, 2**31)).normal(0, noise, image.shape)
+        image = np.clip(image + grain, 0, 255).astype(np.uint8)
+    return image
+
+
+def generate_cards(count, seed=0, long_sides=DEFAULT_LONG_SIDES, jpeg_qualities=(95, 75, 50)):
+    """Yield ``(jpeg_bytes, truth)`` pairs; ``truth`` holds the form fields and distortions."""
+    rng = random.Random(seed)
+    for index in range(count):
+        identity = random_identity(rng)
+        params = {
+            "long_side": long_sides[index % len(long_sides)],
+            "rotation": round(rng.uniform(-3, 3), 2),
+            "blur": round(rng.choice([0.0, 0.0, 0.8, 1.5]), 2),
+            "noise": round(rng.choice([0.0, 4.0, 10.0]), 1),
+            "jpeg_quality": rng.choice(jpeg_qualities),
+        }
+        image = degrade(
+            draw_card(identity), rng, params["long_side"],
+            params["rotation"], params["blur"], params["noise"],
+        )
+        ok, encoded = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, params["jpeg_quality"]])
+        if not ok:
+            raise RuntimeError("JPEG encoding failed")
+        yield encoded.tobytes(), {**identity, **params, "width": image.shape[1], "height": image.shape[0]}
+
+
+def write_cards(out_dir, count, seed=0):
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = []
+    for index, (data, truth) in enumerate(generate_cards(count, seed)):
+        filename = f"card_{index:04d}.jpg"
+        with open(os.path.join(out_dir, filename), "wb") as f:
+            f.write(data)
+        manifest.append({"file": filename, **truth})
+    with open(os.path.join(out_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def load_cards(directory):
+    """Read cards written by ``write_cards`` back as ``(jpeg_bytes, truth)`` pairs."""
+    with open(os.path.join(directory, "manifest.json")) as f:
+        manifest = json.load(f)
+    cards = []
+    for truth in manifest:
+        with open(os.path.join(directory, truth["file"]), "rb") as f:
+            cards.append((f.read(), truth))
+    return cards
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic student ID cards")
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--count", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    written = write_cards(args.out, args.count, args.seed)
+    print(f"✅ Wrote {len(written)} cards and manifest.json to {args.out}")
@@ -0,0 +1,38 @@
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+
+import main
+
+FORMS = [("Aarav Sharma", "X", "1st Year", "01/01/2000")] * 2
+
+
+def chunk():
+    return [(index, f"key{index}", np.zeros((32, 32, 3), dtype=np.uint8)) for index in range(2)]
+
+
+def run_chunk():
+    return asyncio.run(main.run_batch_chunk(chunk(), FORMS, asyncio.Semaphore(1)))
+
+
+def test_ocr_failure_detail_is_generic(monkeypatch, capsys):
+    async def readtext_batched(images):
+        raise RuntimeError("/opt/models/craft_mlt_25k.pth: worker 4121 crashed")
+    monkeypatch.setattr(main, "ocr_pool", SimpleNamespace(readtext_batched=readtext_batched))
+
+    assert run_chunk() == [{"index": index, "status": "error", "detail": "OCR failed"} for index in range(2)]
+    assert "craft_mlt_25k.pth" in capsys.readouterr().out
+
+
+def test_scoring_failure_detail_is_generic(monkeypatch, capsys):
+    async def readtext_batched(images):
+        return [[] for _ in images]
+
+    def score_fields(*args):
+        raise KeyError("/srv/colleges.csv row 12")
+    monkeypatch.setattr(main, "ocr_pool", SimpleNamespace(readtext_batched=readtext_batched))
+    monkeypatch.setattr(main, "score_fields", score_fields)
+
+    assert run_chunk() == [{"index": index, "status": "error", "detail": "Scoring failed"} for index in range(2)]
+    assert "colleges.csv" in capsys.readouterr().out
@@ -0,0 +1,6 @@
+from colleges import normalize_name
+
+
+def test_ampersand_reads_as_and():
+    assert normalize_name("Arts&Science Coll.") == "arts and science college"
+    assert normalize_name("Arts & Science College") == normalize_name("Arts and Science College")
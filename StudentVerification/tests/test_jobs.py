@@ -0,0 +1,112 @@
+import asyncio
+import sqlite3
+import threading
+import urllib.error
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+import jobs
+
+
+@pytest.mark.parametrize("url", [
+    "http://127.0.0.1/hook",
+    "http://localhost:8000/hook",
+    "http://169.254.169.254/latest/meta-data",
+    "http://10.0.0.5/hook",
+    "http://192.168.1.1/hook",
+    "http://[::1]/hook",
+    "http://[::ffff:127.0.0.1]/hook",
+    "http://0.0.0.0/hook",
+])
+def test_callback_to_internal_address_is_refused(monkeypatch, url):
+    monkeypatch.setattr(jobs, "JOB_CALLBACK_HOSTS", [])
+    assert jobs.check_callback_url(url) == "callback_url must point to a public address"
+
+
+def test_callback_url_checks(monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_CALLBACK_HOSTS", [])
+    assert jobs.check_callback_url("ftp://example.com/hook") == "callback_url must be an http(s) URL"
+    assert jobs.check_callback_url("http://93.184.216.34/hook") is None
+
+    monkeypatch.setattr(jobs, "JOB_CALLBACK_HOSTS", ["hooks.internal"])
+    assert jobs.check_callback_url("http://hooks.internal/done") is None
+    assert "must be one of" in jobs.check_callback_url("http://93.184.216.34/hook")
+
+
+def test_callback_is_checked_again_before_sending(monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_CALLBACK_HOSTS", [])
+    with pytest.raises(ValueError):
+        jobs._post_callback("http://127.0.0.1:9/hook", {"job_id": "x"})
+
+
+def test_callback_redirects_are_not_followed(monkeypatch):
+    followed = []
+
+    class Redirecting(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.send_response(302)
+            self.send_header("Location", "/internal")
+            self.end_headers()
+
+        def do_GET(self):
+            followed.append(self.path)
+            self.send_response(200)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Redirecting)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(jobs, "JOB_CALLBACK_HOSTS", ["127.0.0.1"])
+    try:
+        with pytest.raises(urllib.error.HTTPError):
+            jobs._post_callback(f"http://127.0.0.1:{server.server_port}/hook", {"job_id": "x"})
+    finally:
+        server.shutdown()
+    assert followed == []
+
+
+class FlakyQueue:
+    """A queue whose first claim fails like a locked SQLite database."""
+
+    def __init__(self):
+        self.claims = 0
+        self.finished = []
+
+    def claim(self):
+        self.claims += 1
+        if self.claims == 1:
+            raise sqlite3.OperationalError("database is locked")
+        if self.claims == 2:
+            return "job-1", {"name": "A"}, b"image"
+        return None
+
+    def finish(self, job_id, result=None, error=None):
+        self.finished.append((job_id, result, error))
+
+    def callback_url(self, job_id):
+        return None
+
+
+def test_worker_survives_a_failed_claim(monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_POLL_INTERVAL", 0.01)
+    queue = FlakyQueue()
+
+    async def handler(fields, image):
+        return {"status": "verified", "name": fields["name"]}
+
+    async def run():
+        workers = jobs.JobWorkers(queue, handler, workers=1)
+        task = asyncio.create_task(workers._run())
+        for _ in range(200):
+            if queue.finished:
+                break
+            await asyncio.sleep(0.01)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(run())
+    assert queue.claims >= 2
+    assert queue.finished == [("job-1", {"status": "verified", "name": "A"}, None)]
@@ -0,0 +1,61 @@
+import asyncio
+import os
+
+import pytest
+
+import ocr_pool
+
+
+class FakeReader:
+    def readtext(self, image):
+        if image == "die":
+            # Like the OOM killer: the worker is gone mid-job
+            os._exit(1)
+        return [image]
+
+
+def fake_init(*args):
+    # Forked workers inherit the patched module, so they get this reader
+    if ocr_pool._preloaded is not None:
+        ocr_pool._local.reader = ocr_pool._preloaded
+    else:
+        ocr_pool._local.reader = FakeReader()
+
+
+@pytest.fixture
+def fake_reader(monkeypatch):
+    preloads = []
+
+    def fake_preload(*args):
+        preloads.append(args)
+        ocr_pool._preloaded = FakeReader()
+
+    monkeypatch.setattr(ocr_pool, "_init_worker", fake_init)
+    monkeypatch.setattr(ocr_pool, "_preload", fake_preload)
+    monkeypatch.setattr(ocr_pool, "_preloaded", None)
+    return preloads
+
+
+@pytest.mark.parametrize("preload", [False, True])
+def test_killed_worker_restarts_the_pool(fake_reader, preload):
+    # The restart uses the configured start method; fork keeps the fake reader
+    pool = ocr_pool.OcrPool(workers=2, start_method="fork", preload=preload, backend="torch")
+    created = []
+    create_pool = pool._create_pool
+    pool._create_pool = lambda preload: created.append(preload) or create_pool(preload)
+    pool.start()
+
+    async def scenario():
+        assert await pool.readtext("a") == ["a"]
+        with pytest.raises(ocr_pool.OcrSaturated):
+            await pool.readtext("die")
+        return await pool.readtext("c")
+
+    try:
+        assert asyncio.run(scenario()) == ["c"]
+        assert pool.stats()["restarts"] == 1
+        # The reader is preloaded once, and the new pool is never forked from it
+        assert created == [preload, False]
+        assert len(fake_reader) == (1 if preload else 0)
+    finally:
+        pool.shutdown()
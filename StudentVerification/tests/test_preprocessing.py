@@ -0,0 +1,14 @@
+from preprocessing import PreprocessStats
+
+
+def test_legacy_pixels_use_the_full_upload_size():
+    stats = PreprocessStats()
+    # An 8000x5040 JPEG decoded at 1/2 and shrunk for OCR
+    stats.record({"decoded_pixels": 4000 * 2520, "cropped_pixels": 4000 * 2520, "ocr_pixels": 1_835_025},
+                 source_pixels=8000 * 5040)
+    # A PDF page is rendered at its final size
+    stats.record({"decoded_pixels": 2048 * 1290, "cropped_pixels": 2048 * 1290, "ocr_pixels": 1_835_025})
+
+    snapshot = stats.snapshot()
+    assert snapshot["avg_source_pixels"] == (8000 * 5040 + 2048 * 1290) // 2
+    assert snapshot["avg_legacy_ocr_pixels"] == (8000 * 5040 + 2048 * 1290) * 4 // 2
@@ -0,0 +1,309 @@
+# analysis_payloads.py
+"""Risk-level analysis text, and /predict responses pre-encoded per risk level.
+
+A prediction response is mostly static text chosen by one of four risk
+levels.  ``ResponseTemplates`` encodes that text once per level at import
+and renders a response by joining the fragments with the few dynamic values
+(prediction, probability, override reasons).  No analysis dict is built and
+FastAPI's generic encoder is skipped.
+
+``get_detailed_analysis`` still builds the dict form.  The templates are
+checked byte for byte against it, as serialized by FastAPI for ``/predict``
+and by ``json.dumps`` for ``/predict/batch``::
+
+    python analysis_payloads.py
+"""
+import argparse
+import json
+import math
+import random
+import sys
+import time
+from functools import partial
+
+from fastapi.responses import Response
+
+# risk level -> (color, description)
+RISK_LEVELS = {
+    "CRITICAL RISK": (
+        "darkred",
+        "IMMEDIATE PROFESSIONAL INTERVENTION REQUIRED. This assessment indicates severe mental health concerns that require urgent attention.",
+    ),
+    "Low Risk": ("green", "You appear to be managing your mental health well."),
+    "Moderate Risk": ("yellow", "You may be experiencing some mental health challenges that warrant attention."),
+    "High Risk": ("red", "You may be experiencing significant mental health challenges."),
+}
+
+# Detailed suggestions based on risk level
+SUGGESTIONS = {
+    "CRITICAL RISK": [
+        "CALL 911 or go to your nearest emergency room immediately",
+        "Contact the National Suicide Prevention Lifeline: 988",
+        "Do not leave the person alone - stay with them or have someone stay with them",
+        "Remove any potential means of self-harm from the environment",
+        "Contact a mental health crisis team or mobile crisis unit",
+        "Inform trusted family members or friends immediately"
+    ],
+    "Low Risk": [
+        "Continue maintaining healthy sleep patterns (7-9 hours per night)",
+        "Keep up with regular physical activity and social connections",
+        "Practice stress management techniques like meditation or deep breathing",
+        "Maintain a balanced diet and stay hydrated",
+        "Keep a journal to track your mood and identify patterns"
+    ],
+    "Moderate Risk": [
+        "Consider speaking with a mental health counselor or therapist",
+        "Reach out to trusted friends, family members, or support groups",
+        "Prioritize self-care activities that bring you joy and relaxation",
+        "Consider stress reduction techniques like mindfulness or yoga",
+        "Evaluate your workload and academic pressures - consider adjustments if possible",
+        "Maintain regular sleep and eating schedules"
+    ],
+    "High Risk": [
+        "Seek professional mental health support immediately",
+        "Contact your healthcare provider or a mental health crisis line",
+        "Inform trusted family members or friends about how you're feeling",
+        "Consider campus counseling services if you're a student",
+        "Avoid isolation - stay connected with your support network",
+        "If having thoughts of self-harm, contact emergency services or crisis helpline immediately"
+    ]
+}
+
+# Professional resources
+PROFESSIONAL_RESOURCES = {
+    "crisis_lines": [
+        "National Suicide Prevention Lifeline: 988",
+        "Crisis Text Line: Text HOME to 741741",
+        "SAMHSA National Helpline: 1-800-662-4357",
+        "International Association for Suicide Prevention: https://www.iasp.info/resources/Crisis_Centres/"
+    ],
+    "online_resources": [
+        "Mental Health America: mhanational.org",
+        "National Alliance on Mental Illness: nami.org",
+        "Psychology Today Therapist Finder: psychologytoday.com",
+        "Crisis Text Line: crisistextline.org"
+    ]
+}
+
+NEXT_STEPS = {
+    "CRITICAL RISK": [
+        "IMMEDIATE ACTION: Call 911 or go to emergency room",
+        "Contact crisis helpline: 988 (National Suicide Prevention Lifeline)",
+        "Do not delay - seek help within the next hour",
+        "Have someone stay with you until professional help arrives"
+    ],
+    "Low Risk": [
+        "Continue current positive mental health practices",
+        "Regular self-check-ins monthly",
+        "Maintain healthy lifestyle habits"
+    ],
+    "Moderate Risk": [
+        "Schedule appointment with counselor within 2 weeks",
+        "Start daily mindfulness or meditation practice",
+        "Reduce stressors where possible",
+        "Increase social support activities"
+    ],
+    "High Risk": [
+        "Seek professional help within 24-48 hours",
+        "Create a safety plan with trusted person",
+        "Remove access to means of self-harm if applicable",
+        "Consider intensive outpatient programs or immediate counseling"
+    ]
+}
+
+EMERGENCY_NOTICE = "IMMEDIATE ATTENTION REQUIRED"
+SAFETY_MESSAGE = "This assessment has been flagged for immediate professional attention due to critical risk indicators."
+
+
+def risk_level(probability, is_critical=False):
+    # Special handling for emergency/high-risk cases
+    if is_critical or probability >= 0.9:
+        return "CRITICAL RISK"
+    if probability >= 0.29:
+        return "Low Risk"
+    if probability > 0.26:
+        return "Moderate Risk"
+    return "High Risk"
+
+
+def get_detailed_analysis(probability, prediction, is_critical=False, override_reasons=None):
+    """Provide detailed mental health analysis"""
+    level = risk_level(probability, is_critical)
+    risk_color, description = RISK_LEVELS[level]
+
+    analysis = {
+        "risk_level": level,
+        "risk_color": risk_color,
+        "description": description,
+        "probability_percentage": round(probability * 100, 1),
+        "prediction": int(prediction),
+        "suggestions": list(SUGGESTIONS.get(level, SUGGESTIONS["Moderate Risk"])),
+        "professional_resources": {name: list(lines) for name, lines in PROFESSIONAL_RESOURCES.items()},
+        "next_steps": get_next_steps(level)
+    }
+
+    # Add emergency information for critical cases
+    if is_critical and override_reasons:
+        analysis["emergency_notice"] = EMERGENCY_NOTICE
+        analysis["override_reason"] = override_reasons
+        analysis["safety_message"] = SAFETY_MESSAGE
+
+    return analysis
+
+
+def get_next_steps(risk_level):
+    """Get specific next steps based on risk level"""
+    return list(NEXT_STEPS.get(risk_level, NEXT_STEPS["Moderate Risk"]))
+
+
+def _number(value):
+    value = float(value)
+    if not math.isfinite(value):
+        raise ValueError("Out of range float values are not JSON compliant")
+    return repr(value)
+
+
+class ResponseTemplates:
+    """Pre-encoded prediction results for one JSON layout.
+
+    ``separators`` and ``ensure_ascii`` match the encoder the output must be
+    identical to: FastAPI's ``JSONResponse`` or plain ``json.dumps``.
+    """
+
+    def __init__(self, separators=(",", ":"), ensure_ascii=False):
+        dumps = partial(json.dumps, separators=separators, ensure_ascii=ensure_ascii)
+        item, key = separators
+
+        def field(name):
+            return dumps(name) + key
+
+        self.item = item
+        self.index = "{" + field("index")
+        self.dumps = dumps
+        self.levels = {}
+        for level, (color, description) in RISK_LEVELS.items():
+            # Fragments between the dynamic values: prediction, probability,
+            # probability percentage, prediction again
+            self.levels[level] = (
+                field("success") + "true" + item + field("prediction"),
+                item + field("probability"),
+                item + field("analysis") + "{" + field("risk_level") + dumps(level)
+                + item + field("risk_color") + dumps(color)
+                + item + field("description") + dumps(description)
+                + item + field("probability_percentage"),
+                item + field("prediction"),
+                item + field("suggestions") + dumps(SUGGESTIONS.get(level, SUGGESTIONS["Moderate Risk"]))
+                + item + field("professional_resources") + dumps(PROFESSIONAL_RESOURCES)
+                + item + field("next_steps") + dumps(get_next_steps(level)),
+            )
+        self.override_reason = item + field("emergency_notice") + dumps(EMERGENCY_NOTICE) + item + field("override_reason")
+        self.safety_message = item + field("safety_message") + dumps(SAFETY_MESSAGE)
+        self.safety_override = "}" + item + field("safety_override")
+
+    def render(self, prediction, probability, is_critical=False, override_reasons=None, index=None):
+        """The JSON text of a successful result, optionally with a leading "index"."""
+        head, probability_key, analysis, prediction_key, static = self.levels[risk_level(probability, is_critical)]
+        prediction = str(int(prediction))
+        parts = [
+            "{" if index is None else f"{self.index}{index}{self.item}",
+            head, prediction,
+            probability_key, _number(probability),
+            analysis, _number(round(probability * 100, 1)),
+            prediction_key, prediction,
+            static,
+        ]
+        if is_critical and override_reasons:
+            parts += [self.override_reason, self.dumps(override_reasons), self.safety_message]
+        parts += [self.safety_override, "true" if is_critical else "false", "}"]
+        return "".join(parts)
+
+    def render_result(self, result, index=None):
+        """Render a successful ``score_batch`` result."""
+        critical = result["safety_override"]
+        return self.render(
+            result["prediction"], result["probability"], critical,
+            result["override_reasons"] if critical else None, index,
+        )
+
+
+class PrecomputedJSONResponse(Response):
+    """A response whose body is already JSON text."""
+    media_type = "application/json"
+
+
+# /predict bodies (same bytes as FastAPI's JSONResponse)
+response_templates = ResponseTemplates()
+# /predict/batch items (same bytes as json.dumps)
+stream_templates = ResponseTemplates(separators=(", ", ": "), ensure_ascii=True)
+
+
+# ------------------ Parity check ------------------ #
+def reference_result(prediction, probability, is_critical, override_reasons):
+    return {
+        "success": True,
+        "prediction": prediction,
+        "probability": float(probability),
+        "analysis": get_detailed_analysis(
+            probability, prediction, is_critical=is_critical,
+            override_reasons=override_reasons if is_critical else None
+        ),
+        "safety_override": is_critical
+    }
+
+
+def parity(args):
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+
+    rng = random.Random(args.seed)
+    probabilities = [0.0, 0.1, 0.26, 0.2600000001, 0.27, 0.29, 0.2899999999, 0.3, 0.4, 0.5,
+                     0.8999999999, 0.9, 0.95, 1.0, 1 / 3, 2 / 3, 0.123456789012345678]
+    probabilities += [rng.random() for _ in range(args.random)]
+    reason_sets = [[], ["Suicidal ideation reported"], ["Suicidal ideation reported", "Severely inadequate sleep"],
+                   ["Extreme academic and work pressure"]]
+
+    cases = [
+        (prediction, probability, is_critical, reasons)
+        for probability in probabilities
+        for prediction in (0, 1)
+        for is_critical in (False, True)
+        for reasons in reason_sets
+    ]
+
+    mismatches = 0
+    reference_seconds = template_seconds = 0.0
+    for index, (prediction, probability, is_critical, reasons) in enumerate(cases):
+        started = time.perf_counter()
+        result = reference_result(prediction, probability, is_critical, reasons)
+        expected_body = JSONResponse(jsonable_encoder(result)).body
+        expected_item = json.dumps({"index": index, **result})
+        reference_seconds += time.perf_counter() - started
+
+        started = time.perf_counter()
+        actual_body = response_templates.render(prediction, probability, is_critical, reasons).encode()
+        actual_item = stream_templates.render(prediction, probability, is_critical, reasons, index)
+        template_seconds += time.perf_counter() - started
+
+        if expected_body != actual_body or expected_item != actual_item:
+            mismatches += 1
+            if mismatches <= 3:
+                print(f"❌ Mismatch for {(prediction, probability, is_critical, reasons)}")
+                print(f"   expected {expected_body if expected_body != actual_body else expected_item}")
+                print(f"   actual   {actual_body if expected_body != actual_body else actual_item}")
+
+    print(f"{len(cases)} results checked, /predict body and /predict/batch item each")
+    print(f"dict + encoder: {reference_seconds / len(cases) * 1e6:.1f} µs/result")
+    print(f"templates:      {template_seconds / len(cases) * 1e6:.1f} µs/result "
+          f"({reference_seconds / template_seconds:.0f}x faster)")
+    if mismatches:
+        print(f"❌ {mismatches} mismatches")
+        return 1
+    print("✅ Templates are byte-for-byte identical to the encoded dicts")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the pre-encoded responses against the dict path")
+    parser.add_argument("--random", type=int, default=500, help="random probabilities to add")
+    parser.add_argument("--seed", type=int, default=0)
+    sys.exit(parity(parser.parse_args()))
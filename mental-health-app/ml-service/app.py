@@ -1,61 +1,67 @@
-from fastapi import FastAPI, HTTPException
+import time
+# (phase, time it ended); turned into the startup report once the app is built
+_startup_marks = [("start", time.perf_counter())]
+
+from fastapi import FastAPI, Header, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-import joblib
-import numpy as np
-import pandas as pd
-from typing import List
+from contextlib import asynccontextmanager
+from typing import List, Optional
+import asyncio
+import hmac
+import json
+import logging
 import os
+import sys
 import traceback
+_startup_marks.append(("import_fastapi", time.perf_counter()))
+
+import numpy as np
+_startup_marks.append(("import_numpy", time.perf_counter()))
+
+from analysis_payloads import PrecomputedJSONResponse, response_templates, risk_level, stream_templates
+from micro_batcher import PREDICT_MICROBATCH, MicroBatcher
+from model_registry import FAST_START, MODEL_WATCH_SECONDS, ModelRegistry, activate
+from prediction_cache import PredictionCache
+from service_logging import RequestContextMiddleware, dropped_records, log_payload, setup_logging
+_startup_marks.append(("import_service", time.perf_counter()))
+
+setup_logging()
+logger = logging.getLogger(__name__)
 
 # ------------------ Load model, scaler, and feature columns ------------------ #
+# Candidate model files, most preferred first
+MODEL_FILES = [
+    ("rf_model.pkl", "Random Forest"),
+    ("log_model.pkl", "Logistic Regression"),
+    ("model.pkl", "Main Model"),
+]
+
 def load_best_model():
     """Load the best available model from your files"""
     try:
-        # Check which model files are available
-        available_models = []
-        
-        if os.path.exists("rf_model.pkl"):
-            rf_model = joblib.load("rf_model.pkl")
-            available_models.append(("Random Forest", rf_model))
-            print("✅ Random Forest model found")
-            
-        if os.path.exists("log_model.pkl"):
-            log_model = joblib.load("log_model.pkl")
-            available_models.append(("Logistic Regression", log_model))
-            print("✅ Logistic Regression model found")
-            
-        # Fallback to model.pkl if it exists
-        if os.path.exists("model.pkl"):
-            model = joblib.load("model.pkl")
-            available_models.append(("Main Model", model))
-            print("✅ Main model found")
-            
-        if not available_models:
-            print("❌ No model files found")
+        import joblib
+
+        # Only the selected model is unpickled: Random Forest if available,
+        # otherwise the first file found
+        found = [(path, name) for path, name in MODEL_FILES if os.path.exists(path)]
+        if not found:
+            logger.error("❌ No model files found")
             return None, None, None, None
-            
-        # Use Random Forest if available, otherwise use the first available
-        selected_model = None
-        model_name = "Unknown"
-        for name, model in available_models:
-            if "Random Forest" in name:
-                selected_model = model
-                model_name = name
-                break
-        
-        if selected_model is None:
-            model_name, selected_model = available_models[0]
-            
+        logger.info("✅ Model files found: %s", ", ".join(path for path, _ in found))
+        model_path, model_name = found[0]
+
         # Load scaler and features
         if not os.path.exists("scaler.pkl"):
-            print("❌ scaler.pkl not found")
+            logger.error("❌ scaler.pkl not found")
             return None, None, None, None
             
         if not os.path.exists("features.pkl"):
-            print("❌ features.pkl not found")
+            logger.error("❌ features.pkl not found")
             return None, None, None, None
             
+        selected_model = joblib.load(model_path)
         scaler = joblib.load("scaler.pkl")
         features = joblib.load("features.pkl")
         
@@ -63,24 +69,46 @@ def load_best_model():
         model_info = None
         if os.path.exists("model_info.pkl"):
             model_info = joblib.load("model_info.pkl")
-            print("✅ Model info loaded")
+            logger.info("✅ Model info loaded")
         
-        print(f"✅ Using {model_name}")
-        print(f"✅ Expected features: {len(features)}")
-        print(f"✅ Feature names: {features[:5]}..." if len(features) > 5 else f"✅ Feature names: {features}")
+        logger.info("✅ Using %s", model_name)
+        logger.info("✅ Expected features: %d", len(features))
+        logger.debug("Feature names: %s%s", features[:5], "..." if len(features) > 5 else "")
         
         return selected_model, scaler, features, model_info
         
     except Exception as e:
-        print(f"❌ Error loading model: {e}")
-        traceback.print_exc()
+        logger.exception("❌ Error loading model: %s", e)
         return None, None, None, None
 
-# Load the models
-model, scaler, feature_columns, model_info = load_best_model()
+# Largest number of assessments accepted by /predict/batch
+PREDICT_MAX_BATCH = int(os.getenv("PREDICT_MAX_BATCH", "10000"))
+
+# Token for the /admin/models endpoints; they are disabled when unset
+MODEL_ADMIN_TOKEN = os.getenv("MODEL_ADMIN_TOKEN", "")
+
+# Load the models: the CURRENT version from models/, else the loose .pkl files.
+# Handlers read registry.active once per request, so a reload never mixes
+# one version's scaler with another's model.
+registry = ModelRegistry()
+registry.load_initial(load_best_model)
+_startup_marks.append(("load_model", time.perf_counter()))
+if registry.active.compiled is not None:
+    logger.info("✅ Compiled %s scorer", registry.active.compiled.kind)
+# Model outputs by encoded feature row; emptied when the active version changes
+prediction_cache = PredictionCache()
+# Assessments answered with the 0.3 fallback because the loaded model raised
+model_failures = 0
+
+@asynccontextmanager
+async def lifespan(app):
+    watcher = asyncio.create_task(registry.watch()) if MODEL_WATCH_SECONDS > 0 else None
+    yield
+    if watcher is not None:
+        watcher.cancel()
 
 # ------------------ FastAPI app setup ------------------ #
-app = FastAPI(title="Student Depression Prediction API")
+app = FastAPI(title="Student Depression Prediction API", lifespan=lifespan)
 
 # Enable CORS for multiple ports including 5174
 app.add_middleware(
@@ -99,344 +127,345 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Correlation id on every request's log records and an X-Request-ID response header
+app.add_middleware(RequestContextMiddleware)
 
 # ------------------ Input Schema ------------------ #
 class StudentData(BaseModel):
     responses: List
 
+class StudentBatch(BaseModel):
+    responses: List[List]
+
 # ------------------ Helper functions ------------------ #
-def preprocess_student_data(responses):
+def preprocess_student_data(responses, current):
     """Convert raw responses to model-ready features"""
     try:
-        print(f"Processing {len(responses)} responses: {responses}")
-        
-        # Map responses to expected format based on your training data
-        raw_data = {
-            'id': responses[0] if len(responses) > 0 else 'student123',
-            'Gender': responses[1] if len(responses) > 1 else 'Male',
-            'Age': float(responses[2]) if len(responses) > 2 and str(responses[2]).strip() else 20.0,
-            'City': responses[3] if len(responses) > 3 else 'Unknown',
-            'Profession': responses[4] if len(responses) > 4 else 'Student',
-            'Academic Pressure': float(responses[5]) if len(responses) > 5 and str(responses[5]).strip() else 1.0,
-            'Work Pressure': float(responses[6]) if len(responses) > 6 and str(responses[6]).strip() else 1.0,
-            'CGPA': float(responses[7]) if len(responses) > 7 and str(responses[7]).strip() else 3.0,
-            'Study Satisfaction': float(responses[8]) if len(responses) > 8 and str(responses[8]).strip() else 2.0,
-            'Job Satisfaction': float(responses[9]) if len(responses) > 9 and str(responses[9]).strip() else 2.0,
-            'Sleep Duration': float(responses[10]) if len(responses) > 10 and str(responses[10]).strip() else 7.0,
-            'Dietary Habits': responses[11] if len(responses) > 11 else 'Average',
-            'Degree': responses[12] if len(responses) > 12 else 'Bachelor',
-            'Have you ever had suicidal thoughts ?': responses[13] if len(responses) > 13 else 'No',
-            'Work/Study Hours': float(responses[14]) if len(responses) > 14 and str(responses[14]).strip() else 8.0,
-            'Financial Stress': responses[15] if len(responses) > 15 else 'No',
-            'Family History of Mental Illness': responses[16] if len(responses) > 16 else 'No'
-        }
+        X = current.encoder.encode(responses)
+        log_payload(logger, "Encoded features", first_features=dict(zip(current.feature_columns[:5], X[0, :5].tolist())))
+        return X
 
-        print("Raw data created:", {k: v for k, v in raw_data.items() if k != 'id'})
+    except Exception as e:
+        # The message can quote an answer, so it is only logged as a payload
+        logger.warning("Preprocessing failed: %s", type(e).__name__)
+        log_payload(logger, "Preprocessing error", error=str(e))
+        raise HTTPException(status_code=400, detail=f"Preprocessing failed: {str(e)}")
 
-        # Create DataFrame
-        df = pd.DataFrame([raw_data])
+def check_safety(responses):
+    """Safety rules applied before (and on top of) the model.
 
-        # Handle Dietary Habits encoding properly
-        if 'Dietary Habits' in df.columns:
-            dietary_mapping = {'Healthy': 2, 'Average': 1, 'Unhealthy': 0}
-            df['Dietary Habits'] = df['Dietary Habits'].map(dietary_mapping).fillna(1)
+    Returns ``(high_risk_override, override_reasons)``; only reported
+    suicidal thoughts force the critical override.
+    """
+    high_risk_override = False
+    override_reasons = []
 
-        # Encode categorical features (same as in your training)
-        cat_cols = ['Gender', 'City', 'Profession', 'Degree',
-                    'Have you ever had suicidal thoughts ?',
-                    'Family History of Mental Illness', 'Financial Stress']
-        
-        # Remove columns that don't exist or are already numeric
-        cat_cols = [col for col in cat_cols if col in df.columns and df[col].dtype == 'object']
-        
-        if cat_cols:
-            df_encoded = pd.get_dummies(df, columns=cat_cols, drop_first=True)
-        else:
-            df_encoded = df.copy()
+    if len(responses) > 13 and str(responses[13]).lower().strip() in ['yes', 'true', '1', 'y']:
+        high_risk_override = True
+        override_reasons.append("Suicidal ideation reported")
 
-        print(f"After encoding, columns: {list(df_encoded.columns)}")
+    # Check for extreme academic/work pressure (assuming scale 1-5, >=4 is extreme)
+    if len(responses) > 5 and isinstance(responses[5], (int, float)) and responses[5] >= 4:
+        if len(responses) > 6 and isinstance(responses[6], (int, float)) and responses[6] >= 4:
+            if not high_risk_override:  # Only add if not already critical
+                override_reasons.append("Extreme academic and work pressure")
 
-        # Align with training features
-        for col in feature_columns:
-            if col not in df_encoded.columns:
-                df_encoded[col] = 0
-                print(f"Added missing feature: {col}")
+    # Check for very poor sleep (less than 4 hours)
+    if len(responses) > 10 and isinstance(responses[10], (int, float)) and responses[10] < 4:
+        override_reasons.append("Severely inadequate sleep")
 
-        # Select only the features used in training (in the correct order)
-        X = df_encoded[feature_columns]
-        
-        print("Feature shape after alignment:", X.shape)
-        print("First few feature values:", dict(list(X.iloc[0].items())[:5]))
+    return high_risk_override, override_reasons
 
-        return X.values
+def fallback_prediction(responses):
+    """Simple heuristic used when no model is loaded"""
+    risk_score = sum([float(x) if isinstance(x, (int, float)) else 0.5 for x in responses[:10]]) / 10
+    prediction = 1 if risk_score > 0.5 else 0
+    probability = min(0.9, max(0.1, risk_score))
+    return prediction, probability
 
-    except Exception as e:
-        print(f"Preprocessing error: {e}")
-        traceback.print_exc()
-        raise HTTPException(status_code=400, detail=f"Preprocessing failed: {str(e)}")
+def score_batch(batch):
+    """Score many response lists with one model call.
 
-def get_detailed_analysis(probability, prediction, is_critical=False, override_reasons=None):
-    """Provide detailed mental health analysis"""
-    
-    # Special handling for emergency/high-risk cases
-    if is_critical or probability >= 0.9:
-        risk_level = "CRITICAL RISK"
-        risk_color = "darkred"
-        description = "IMMEDIATE PROFESSIONAL INTERVENTION REQUIRED. This assessment indicates severe mental health concerns that require urgent attention."
-    elif probability >= 0.29:
-        risk_level = "Low Risk"
-        risk_color = "green"
-        description = "You appear to be managing your mental health well."
-    elif probability > 0.26:
-        risk_level = "Moderate Risk"
-        risk_color = "yellow"
-        description = "You may be experiencing some mental health challenges that warrant attention."
-    else:
-        risk_level = "High Risk"
-        risk_color = "red"
-        description = "You may be experiencing significant mental health challenges."
-
-    # Detailed suggestions based on risk level
-    suggestions = {
-        "CRITICAL RISK": [
-            "CALL 911 or go to your nearest emergency room immediately",
-            "Contact the National Suicide Prevention Lifeline: 988",
-            "Do not leave the person alone - stay with them or have someone stay with them",
-            "Remove any potential means of self-harm from the environment",
-            "Contact a mental health crisis team or mobile crisis unit",
-            "Inform trusted family members or friends immediately"
-        ],
-        "Low Risk": [
-            "Continue maintaining healthy sleep patterns (7-9 hours per night)",
-            "Keep up with regular physical activity and social connections",
-            "Practice stress management techniques like meditation or deep breathing",
-            "Maintain a balanced diet and stay hydrated",
-            "Keep a journal to track your mood and identify patterns"
-        ],
-        "Moderate Risk": [
-            "Consider speaking with a mental health counselor or therapist",
-            "Reach out to trusted friends, family members, or support groups",
-            "Prioritize self-care activities that bring you joy and relaxation",
-            "Consider stress reduction techniques like mindfulness or yoga",
-            "Evaluate your workload and academic pressures - consider adjustments if possible",
-            "Maintain regular sleep and eating schedules"
-        ],
-        "High Risk": [
-            "Seek professional mental health support immediately",
-            "Contact your healthcare provider or a mental health crisis line",
-            "Inform trusted family members or friends about how you're feeling",
-            "Consider campus counseling services if you're a student",
-            "Avoid isolation - stay connected with your support network",
-            "If having thoughts of self-harm, contact emergency services or crisis helpline immediately"
-        ]
-    }
+    Returns one result dict per input, in order: ``success``,
+    ``prediction``, ``probability``, ``safety_override`` and
+    ``override_reasons`` (rendered by ``ResponseTemplates.render_result``),
+    or ``{"success": False, "error": ...}`` for a row that could not be
+    preprocessed.
+    """
+    global model_failures
+    current = registry.active
+    count = len(batch)
+    checks = [check_safety(responses) for responses in batch]
+    critical = np.array([override for override, _ in checks], dtype=bool)
+    has_reasons = np.array([bool(reasons) for _, reasons in checks], dtype=bool)
 
-    # Professional resources
-    resources = {
-        "crisis_lines": [
-            "National Suicide Prevention Lifeline: 988",
-            "Crisis Text Line: Text HOME to 741741",
-            "SAMHSA National Helpline: 1-800-662-4357",
-            "International Association for Suicide Prevention: https://www.iasp.info/resources/Crisis_Centres/"
-        ],
-        "online_resources": [
-            "Mental Health America: mhanational.org",
-            "National Alliance on Mental Illness: nami.org",
-            "Psychology Today Therapist Finder: psychologytoday.com",
-            "Crisis Text Line: crisistextline.org"
-        ]
-    }
+    # Critical rows skip the model entirely, like the single-request path
+    prediction = np.ones(count, dtype=int)
+    probability = np.full(count, 0.95)
+    errors = {}
 
-    analysis = {
-        "risk_level": risk_level,
-        "risk_color": risk_color,
-        "description": description,
-        "probability_percentage": round(probability * 100, 1),
-        "prediction": int(prediction),
-        "suggestions": suggestions.get(risk_level, suggestions["Moderate Risk"]),
-        "professional_resources": resources,
-        "next_steps": get_next_steps(risk_level)
-    }
-    
-    # Add emergency information for critical cases
-    if is_critical and override_reasons:
-        analysis["emergency_notice"] = "IMMEDIATE ATTENTION REQUIRED"
-        analysis["override_reason"] = override_reasons
-        analysis["safety_message"] = "This assessment has been flagged for immediate professional attention due to critical risk indicators."
-    
-    return analysis
-
-def get_next_steps(risk_level):
-    """Get specific next steps based on risk level"""
-    steps = {
-        "CRITICAL RISK": [
-            "IMMEDIATE ACTION: Call 911 or go to emergency room",
-            "Contact crisis helpline: 988 (National Suicide Prevention Lifeline)",
-            "Do not delay - seek help within the next hour",
-            "Have someone stay with you until professional help arrives"
-        ],
-        "Low Risk": [
-            "Continue current positive mental health practices",
-            "Regular self-check-ins monthly",
-            "Maintain healthy lifestyle habits"
-        ],
-        "Moderate Risk": [
-            "Schedule appointment with counselor within 2 weeks",
-            "Start daily mindfulness or meditation practice",
-            "Reduce stressors where possible",
-            "Increase social support activities"
-        ],
-        "High Risk": [
-            "Seek professional help within 24-48 hours",
-            "Create a safety plan with trusted person",
-            "Remove access to means of self-harm if applicable",
-            "Consider intensive outpatient programs or immediate counseling"
-        ]
-    }
-    return steps.get(risk_level, steps["Moderate Risk"])
+    needs_model = np.flatnonzero(~critical)
+    if len(needs_model) and not current.has_model:
+        for i in needs_model:
+            prediction[i], probability[i] = fallback_prediction(batch[i])
+    elif len(needs_model):
+        X = np.zeros((len(needs_model), current.encoder.width))
+        encoded = np.ones(len(needs_model), dtype=bool)
+        for row, i in enumerate(needs_model):
+            try:
+                current.encoder.encode_into(batch[i], X[row])
+            except Exception as e:
+                errors[i] = f"Preprocessing failed: {str(e)}"
+                encoded[row] = False
+        needs_model, X = needs_model[encoded], X[encoded]
+
+        try:
+            if len(needs_model):
+                model_prediction, model_probability = prediction_cache.scores(current, X)
+                model_prediction = model_prediction.astype(int)
+                # Concerning indicators lift a low-risk prediction to at least 0.4
+                bump = (model_prediction == 0) & has_reasons[needs_model]
+                prediction[needs_model] = model_prediction
+                probability[needs_model] = np.where(bump, np.maximum(0.4, model_probability), model_probability)
+        except Exception as pred_error:
+            model_failures += len(needs_model)
+            logger.error("Batch model prediction failed: %s", type(pred_error).__name__)
+            log_payload(logger, "Batch model prediction error", error=str(pred_error))
+            prediction[needs_model] = 0
+            probability[needs_model] = 0.3
+
+    results = []
+    for i, (high_risk_override, override_reasons) in enumerate(checks):
+        if i in errors:
+            results.append({"success": False, "error": errors[i]})
+            continue
+        results.append({
+            "success": True,
+            "prediction": int(prediction[i]),
+            "probability": float(probability[i]),
+            "safety_override": high_risk_override,
+            "override_reasons": override_reasons
+        })
+    return results
+
+# Opt-in: concurrent /predict calls share one model call (PREDICT_MICROBATCH=1)
+micro_batcher = MicroBatcher(score_batch) if PREDICT_MICROBATCH else None
 
 # ------------------ API Endpoints ------------------ #
 @app.post("/predict")
 async def predict(data: StudentData):
+    global model_failures
     try:
-        print(f"\n=== NEW PREDICTION REQUEST ===")
-        print(f"Received {len(data.responses)} responses: {data.responses}")
-        
-        # CRITICAL SAFETY CHECK: Check for suicidal thoughts first
-        suicidal_thoughts = False
-        if len(data.responses) > 13:
-            suicidal_response = str(data.responses[13]).lower().strip()
-            if suicidal_response in ['yes', 'true', '1', 'y']:
-                suicidal_thoughts = True
-                print("🚨 CRITICAL: Suicidal thoughts detected - overriding to high risk")
-        
-        # Check for other critical indicators
-        high_risk_override = False
-        override_reasons = []
-        
-        if suicidal_thoughts:
-            high_risk_override = True
-            override_reasons.append("Suicidal ideation reported")
-        
-        # Check for extreme academic/work pressure (assuming scale 1-5, >=4 is extreme)
-        if len(data.responses) > 5 and isinstance(data.responses[5], (int, float)) and data.responses[5] >= 4:
-            if len(data.responses) > 6 and isinstance(data.responses[6], (int, float)) and data.responses[6] >= 4:
-                if not high_risk_override:  # Only add if not already critical
-                    override_reasons.append("Extreme academic and work pressure")
+        logger.debug("Prediction request with %d responses", len(data.responses))
+        log_payload(logger, "Prediction request", responses=data.responses)
+
+        if micro_batcher is not None:
+            result = await micro_batcher.submit(data.responses)
+            if not result["success"]:
+                raise HTTPException(status_code=400, detail=result["error"])
+            return PrecomputedJSONResponse(response_templates.render_result(result))
         
-        # Check for very poor sleep (less than 4 hours)
-        if len(data.responses) > 10 and isinstance(data.responses[10], (int, float)) and data.responses[10] < 4:
-            override_reasons.append("Severely inadequate sleep")
+        current = registry.active
+
+        # CRITICAL SAFETY CHECK: suicidal thoughts first, then other indicators
+        high_risk_override, override_reasons = check_safety(data.responses)
         
         if high_risk_override:
             # SAFETY OVERRIDE: Force critical risk classification
             prediction = 1
             probability = 0.95  # Very high probability for safety
-            print(f"🚨 SAFETY OVERRIDE ACTIVATED: {', '.join(override_reasons)}")
+            logger.debug("🚨 Safety override activated")
+            log_payload(logger, "Safety override reasons", override_reasons=override_reasons)
         else:
             # Proceed with normal model prediction
-            if model is None:
-                print("❌ Model not loaded, using fallback")
-                # Simple fallback prediction
-                risk_score = sum([float(x) if isinstance(x, (int, float)) else 0.5 for x in data.responses[:10]]) / 10
-                prediction = 1 if risk_score > 0.5 else 0
-                probability = min(0.9, max(0.1, risk_score))
+            if not current.has_model:
+                logger.warning("❌ Model not loaded, using fallback")
+                prediction, probability = fallback_prediction(data.responses)
             else:
                 # Preprocess the raw responses
-                features = preprocess_student_data(data.responses)
-                print(f"Preprocessed features shape: {features.shape}")
+                features = preprocess_student_data(data.responses, current)
                 
-                # Scale features
-                if scaler is not None:
-                    features_scaled = scaler.transform(features)
-                    print("Features scaled")
-                else:
-                    features_scaled = features
-                    print("No scaler available, using raw features")
-                
-                # Make prediction
+                # Make prediction (scaling happens inside scores; repeats come from the cache)
                 try:
-                    prediction = int(model.predict(features_scaled)[0])
-                    model_probability = float(model.predict_proba(features_scaled)[0][1])
+                    predictions, probabilities = prediction_cache.scores(current, features)
+                    prediction = int(predictions[0])
+                    model_probability = float(probabilities[0])
                     
                     # Additional safety check: if model gives low risk but we have concerning indicators
                     if prediction == 0 and len(override_reasons) > 0:
-                        print(f"⚠️  Model predicted low risk but concerning indicators present: {override_reasons}")
+                        logger.debug("⚠️ Model predicted low risk but concerning indicators are present")
+                        log_payload(logger, "Concerning indicators", override_reasons=override_reasons)
                         probability = max(0.4, model_probability)  # Bump up probability
                     else:
                         probability = model_probability
-                        
-                    print(f"Model prediction: {prediction}, Probability: {probability:.3f}")
                 except Exception as pred_error:
-                    print(f"Model prediction failed: {pred_error}")
+                    model_failures += 1
+                    logger.error("Model prediction failed: %s", type(pred_error).__name__)
+                    log_payload(logger, "Model prediction error", error=str(pred_error))
                     # Fallback prediction
                     prediction = 0
                     probability = 0.3
         
-        # Get detailed analysis
-        analysis = get_detailed_analysis(
-            probability, 
-            prediction, 
-            is_critical=high_risk_override,
-            override_reasons=override_reasons if high_risk_override else None
-        )
-        
         result = {
             "success": True,
             "prediction": prediction,
             "probability": float(probability),
-            "analysis": analysis,
-            "safety_override": high_risk_override
+            "safety_override": high_risk_override,
+            "override_reasons": override_reasons
         }
         
-        print(f"=== RETURNING RESULT ===")
-        print(f"Prediction: {prediction}, Probability: {probability:.3f}, Risk: {analysis['risk_level']}")
-        if high_risk_override:
-            print(f"🚨 SAFETY OVERRIDE ACTIVE: {override_reasons}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Prediction %s, probability %.3f, risk %s, safety override %s", prediction, probability,
+                         risk_level(probability, high_risk_override), high_risk_override)
         
-        return result
+        # Detailed analysis comes from the risk level's pre-encoded template
+        return PrecomputedJSONResponse(response_templates.render_result(result))
         
+    except HTTPException as e:
+        logger.warning("Prediction failed with status %s", e.status_code)
+        raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
     except Exception as e:
-        print(f"❌ Prediction error: {e}")
-        traceback.print_exc()
+        # Exception messages can echo the assessment, so only sampled requests log them
+        logger.error("❌ Prediction error: %s", type(e).__name__)
+        log_payload(logger, "Prediction error", error=str(e), traceback=traceback.format_exc())
         raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
 
+@app.post("/predict/batch")
+def predict_batch(data: StudentBatch, format: str = "json"):
+    """Score many assessments at once.
+
+    Results stream back in input order, as a JSON array or, with
+    ``?format=ndjson``, one JSON object per line.
+    """
+    if format not in ("json", "ndjson"):
+        raise HTTPException(status_code=400, detail="format must be json or ndjson")
+    if len(data.responses) > PREDICT_MAX_BATCH:
+        raise HTTPException(status_code=413, detail=f"At most {PREDICT_MAX_BATCH} assessments per batch")
+
+    logger.info("Batch prediction request: %d assessments", len(data.responses))
+    results = score_batch(data.responses)
+
+    def item(index, result):
+        if result["success"]:
+            return stream_templates.render_result(result, index)
+        return json.dumps({"index": index, **result})
+
+    def stream():
+        if format == "ndjson":
+            for index, result in enumerate(results):
+                yield item(index, result) + "\n"
+            return
+        yield "["
+        for index, result in enumerate(results):
+            yield ("," if index else "") + item(index, result)
+        yield "]"
+
+    media_type = "application/x-ndjson" if format == "ndjson" else "application/json"
+    return StreamingResponse(stream(), media_type=media_type)
+
+@app.get("/predict/batcher")
+async def batcher_stats():
+    if micro_batcher is None:
+        return {"enabled": False}
+    return {"enabled": True, **micro_batcher.stats()}
+
+@app.get("/predict/cache")
+async def cache_stats():
+    return prediction_cache.stats()
+
+def require_admin(token):
+    if not MODEL_ADMIN_TOKEN or not hmac.compare_digest(token, MODEL_ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Model admin is disabled or the token is wrong")
+
+@app.get("/admin/models")
+async def model_versions(x_admin_token: str = Header(default="")):
+    require_admin(x_admin_token)
+    return registry.stats()
+
+@app.post("/admin/models/reload")
+async def reload_model(version: Optional[str] = None, x_admin_token: str = Header(default="")):
+    """Load, validate and swap in ``version`` (default: CURRENT) without a restart.
+
+    A requested version also becomes CURRENT, so the other workers follow.
+    """
+    require_admin(x_admin_token)
+    try:
+        current = await asyncio.to_thread(registry.reload, version)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.error("❌ Model reload failed: %s", e)
+        raise HTTPException(status_code=409, detail=f"Model rejected, still serving {registry.active.version}: {e}")
+    if version:
+        activate(version, registry.directory)
+    return {"success": True, **current.describe()}
+
 @app.get("/health")
 async def health_check():
+    current = registry.active
     health_status = {
-        "status": "healthy" if model is not None else "degraded",
-        "model_loaded": model is not None,
-        "scaler_loaded": scaler is not None,
-        "features_count": len(feature_columns) if feature_columns else 0,
-        "model_type": type(model).__name__ if model else "None",
+        "status": "healthy" if current.has_model else "degraded",
+        "model_loaded": current.has_model,
+        # With FAST_START a compiled model serves before the sklearn one is unpickled
+        "sklearn_loaded": current.model_loaded,
+        "compiled": current.compiled.kind if current.compiled is not None else None,
+        "scaler_loaded": current.scaler is not None,
+        "features_count": len(current.feature_columns) if current.feature_columns else 0,
+        "model_type": current.model_type,
+        "model_version": current.version,
+        "model_failures": model_failures,
+        "log_records_dropped": dropped_records(),
+        "startup_ms": startup_report["total_ms"],
         "safety_overrides": "enabled"
     }
     
-    if model is None:
+    if not current.has_model:
         health_status["message"] = "Model not loaded - using fallback predictions"
     
-    if model_info:
-        health_status["model_accuracy"] = model_info.get("accuracy", "unknown")
+    if current.model_info:
+        health_status["model_accuracy"] = current.model_info.get("accuracy", "unknown")
     
-    print("Health check:", health_status)
+    logger.debug("Health check: %s", health_status)
     return health_status
 
+@app.get("/health/startup")
+async def startup_timings():
+    return startup_report
+
 @app.get("/")
 async def root():
     return {
         "message": "Student Mental Health Assessment API", 
         "status": "running",
-        "model_status": "loaded" if model else "fallback",
+        "model_status": "loaded" if registry.active.has_model else "fallback",
         "safety_features": "Critical risk override enabled"
     }
 
+# ------------------ Startup report ------------------ #
+def build_startup_report(marks, current):
+    """Milliseconds per import and load phase since this module started importing"""
+    phases = {name: round((end - previous) * 1000, 1) for (_, previous), (name, end) in zip(marks, marks[1:])}
+    return {
+        "fast_start": FAST_START,
+        "total_ms": round((marks[-1][1] - marks[0][1]) * 1000, 1),
+        "phases_ms": phases,
+        "model_version": current.version,
+        "model_load_ms": dict(current.timings),
+        # Anything listed here was imported while starting up
+        "heavy_modules": [name for name in ("joblib", "pandas", "scipy", "sklearn") if name in sys.modules],
+    }
+
+_startup_marks.append(("app_setup", time.perf_counter()))
+startup_report = build_startup_report(_startup_marks, registry.active)
+logger.info("✅ Started in %.0f ms", startup_report["total_ms"], extra={"fields": startup_report})
+
 # ------------------ Run server ------------------ #
 if __name__ == "__main__":
     import uvicorn
     print("🚀 Starting FastAPI ML Service...")
-    print(f"📊 Model loaded: {model is not None}")
-    print(f"🔧 Scaler loaded: {scaler is not None}")
-    print(f"📋 Features loaded: {len(feature_columns) if feature_columns else 0}")
+    print(f"📊 Model loaded: {registry.active.has_model} (version {registry.active.version})")
+    print(f"🔧 Scaler loaded: {registry.active.scaler is not None}")
+    print(f"📋 Features loaded: {len(registry.active.feature_columns or [])}")
     print("🚨 Safety overrides: ENABLED")
     print("🌐 Starting server on http://0.0.0.0:5001")
     uvicorn.run(app, host="0.0.0.0", port=5001, reload=True)
\ No newline at end of file
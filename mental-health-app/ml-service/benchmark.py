@@ -0,0 +1,422 @@
+# benchmark.py
+"""Latency, throughput and allocation benchmark for the prediction API.
+
+Rows of ``student_depression.csv`` are turned into 17-element ``responses``
+lists and replayed against the FastAPI app in-process through an ASGI
+client, in three modes:
+
+* single: one ``/predict`` at a time
+* concurrent: ``/predict`` with several requests in flight (``--concurrency``)
+* batch: ``/predict/batch`` with ``--batch-size`` assessments per call
+
+Each mode reports throughput, p50/p95/p99 latency and errors: failed
+requests plus assessments answered by the fallback because the model
+raised.  A sequential pass with ``tracemalloc`` on measures the memory
+allocated per ``/predict``, and a pass that calls the pipeline pieces
+directly times each phase: validation, encoding, scaling, inference,
+analysis, serialization.
+
+The run refuses to start when the active model cannot score a CSV row, and
+fails (exit 1) when any request errored, so the fallback path is never
+timed in place of the model.
+
+    python benchmark.py --rows 500 --json results.json
+    python benchmark.py --json new.json --baseline results.json --threshold 0.2
+
+Every mode and the phase pass run ``--repeat`` times.  Each metric is the
+median of the runs, and its noise is the median relative distance of the
+runs from that median, so one disturbed run does not widen the gate.
+
+With ``--baseline`` the run fails (exit 1) when p50/p95 latency,
+allocations or a phase time grow, or a throughput drops, by more than
+``--threshold`` or ``--noise-factor`` times the two reports' noise added
+up, whichever is larger; p99 is reported but too noisy to gate on.  The
+prediction cache is off so every request reaches the model, and the app
+logs at WARNING unless ``LOG_LEVEL`` says otherwise.
+
+``--cold-start N`` also starts ``N`` fresh interpreters that import the
+app, and reports the median wall time to a served model alongside the
+app's own per-phase startup report (run it with and without
+``FAST_START=1`` to compare).
+Install ``requirements-dev.txt`` for ``httpx``, the in-process client.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault("PREDICT_CACHE_SIZE", "0")
+os.environ.setdefault("MODEL_WATCH_SECONDS", "0")
+# Per-request INFO lines would be timed along with the requests
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+import httpx  # noqa: E402
+
+import app  # noqa: E402
+from analysis_payloads import PrecomputedJSONResponse, response_templates  # noqa: E402
+from feature_encoder import csv_responses  # noqa: E402
+
+# The ASGI client logs every request at INFO
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+MODE_METRICS = ("throughput_rps", "assessments_per_s", "p50_ms", "p95_ms", "p99_ms")
+PHASES = ("validation", "encoding", "scaling", "inference", "analysis", "serialization")
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(mode, latencies, elapsed, items, errors):
+    return {
+        "mode": mode,
+        "requests": len(latencies),
+        "assessments": items,
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+        "assessments_per_s": round(items / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "errors": errors,
+    }
+
+
+def median_of(runs, keys):
+    """The first run's fields with ``keys`` replaced by their median over ``runs``."""
+    result = dict(runs[0])
+    noise = {}
+    for key in keys:
+        values = [run[key] for run in runs]
+        middle = statistics.median(values)
+        result[key] = round(middle, 3)
+        noise[key] = round(statistics.median(abs(value - middle) for value in values) / middle, 4) if middle > 0 else 0.0
+    result["noise"] = noise
+    result["repeats"] = len(runs)
+    return result
+
+
+async def run_predict(client, rows, concurrency, requests):
+    limit = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def one(index):
+        nonlocal errors
+        async with limit:
+            started = time.perf_counter()
+            response = await client.post("/predict", json={"responses": rows[index % len(rows)]})
+            latencies.append(time.perf_counter() - started)
+        errors += response.status_code != 200
+
+    started = time.perf_counter()
+    await asyncio.gather(*[one(i) for i in range(requests)])
+    elapsed = time.perf_counter() - started
+    mode = "single" if concurrency == 1 else f"concurrent_{concurrency}"
+    return summarize(mode, latencies, elapsed, requests, errors)
+
+
+async def run_batch(client, rows, batch_size, requests):
+    latencies = []
+    errors = 0
+    batches = [rows[i:i + batch_size] for i in range(0, len(rows), batch_size)]
+    started = time.perf_counter()
+    for index in range(requests):
+        batch = batches[index % len(batches)]
+        sent = time.perf_counter()
+        response = await client.post("/predict/batch", json={"responses": batch})
+        latencies.append(time.perf_counter() - sent)
+        errors += response.status_code != 200
+    elapsed = time.perf_counter() - started
+    items = sum(len(batches[index % len(batches)]) for index in range(requests))
+    return summarize(f"batch_{batch_size}", latencies, elapsed, items, errors)
+
+
+async def run_allocations(client, rows):
+    """Peak bytes allocated while serving one /predict, and blocks left behind."""
+    peaks = []
+    tracemalloc.start()
+    retained_before = tracemalloc.take_snapshot()
+    for responses in rows:
+        baseline = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        await client.post("/predict", json={"responses": responses})
+        peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    retained = tracemalloc.take_snapshot().compare_to(retained_before, "filename")
+    tracemalloc.stop()
+    return {
+        "alloc_peak_kb_mean": round(statistics.mean(peaks) / 1024, 2),
+        "alloc_peak_kb_p95": round(percentile(peaks, 95) / 1024, 2),
+        "retained_blocks_per_request": round(sum(stat.count_diff for stat in retained) / len(rows), 2),
+    }
+
+
+def run_phases(rows):
+    """Time each step of the /predict pipeline on its own, one row at a time."""
+    current = app.registry.active
+    timings = {phase: [] for phase in PHASES}
+    folded = current.compiled is not None
+    for responses in rows:
+        started = time.perf_counter()
+        data = app.StudentData(responses=responses)
+        app.check_safety(data.responses)
+        timings["validation"].append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        X = current.encoder.encode(data.responses)
+        timings["encoding"].append(time.perf_counter() - started)
+
+        # A compiled scorer has the scaler folded in, so scaling is part of inference
+        started = time.perf_counter()
+        if not folded and current.scaler is not None:
+            current.scaler.transform(X)
+        timings["scaling"].append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        predictions, probabilities = current.scores(X)
+        timings["inference"].append(time.perf_counter() - started)
+
+        result = {
+            "success": True,
+            "prediction": int(predictions[0]),
+            "probability": float(probabilities[0]),
+            "safety_override": False,
+            "override_reasons": [],
+        }
+        started = time.perf_counter()
+        body = response_templates.render_result(result)
+        timings["analysis"].append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        PrecomputedJSONResponse(body)
+        timings["serialization"].append(time.perf_counter() - started)
+
+    report = {
+        phase: {
+            "median_us": round(statistics.median(times) * 1e6, 2),
+            "mean_us": round(statistics.mean(times) * 1e6, 2),
+            "p95_us": round(percentile(times, 95) * 1e6, 2),
+        }
+        for phase, times in timings.items()
+    }
+    report["scaling"]["folded_into_inference"] = folded
+    return report
+
+
+COLD_START_SCRIPT = """
+import json, time
+started = time.perf_counter()
+import app
+print(json.dumps({"wall_ms": (time.perf_counter() - started) * 1000, **app.startup_report}))
+"""
+
+
+def run_cold_starts(count):
+    """Median import-to-ready time of ``count`` fresh processes, overall and per phase."""
+    env = {**os.environ, "LOG_LEVEL": "WARNING"}
+    reports = []
+    for _ in range(count):
+        output = subprocess.run([sys.executable, "-c", COLD_START_SCRIPT], env=env,
+                                capture_output=True, text=True, check=True).stdout
+        reports.append(json.loads(output.strip().splitlines()[-1]))
+    phases = {name: round(statistics.median(report["phases_ms"][name] for report in reports), 1)
+              for name in reports[0]["phases_ms"]}
+    wall = median_of(reports, ["wall_ms"])
+    return {
+        "runs": count,
+        "fast_start": reports[0]["fast_start"],
+        "wall_ms": round(wall["wall_ms"], 1),
+        "noise": wall["noise"],
+        "phases_ms": phases,
+        "model_load_ms": reports[0]["model_load_ms"],
+        "heavy_modules": reports[0]["heavy_modules"],
+    }
+
+
+def median_phases(rows, repeat):
+    runs = [run_phases(rows) for _ in range(max(1, repeat))]
+    phases = {phase: median_of([run[phase] for run in runs], ["median_us", "mean_us", "p95_us"]) for phase in PHASES}
+    for timing in phases.values():
+        del timing["repeats"]
+    return phases
+
+
+async def benchmark(args):
+    rows = list(csv_responses(args.csv, args.rows))
+    levels = [int(level) for level in args.concurrency.split(",") if level]
+    sizes = [int(size) for size in args.batch_size.split(",") if size]
+    requests = args.requests or len(rows)
+
+    async with app.app.router.lifespan_context(app.app):
+        transport = httpx.ASGITransport(app=app.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            # Warm-up: first-call costs (imports, pydantic schemas) stay out of the numbers
+            await run_predict(client, rows, 1, min(len(rows), 50))
+
+            async def repeated(run, *run_args):
+                runs = []
+                for _ in range(max(1, args.repeat)):
+                    failures = app.model_failures
+                    result = await run(client, rows, *run_args)
+                    # A 200 answered by the fallback did not time the model
+                    result["errors"] += app.model_failures - failures
+                    runs.append(result)
+                result = median_of(runs, MODE_METRICS)
+                result["errors"] = sum(run["errors"] for run in runs)
+                return result
+
+            modes = [await repeated(run_predict, 1, requests)]
+            for level in levels:
+                modes.append(await repeated(run_predict, level, requests))
+            for size in sizes:
+                modes.append(await repeated(run_batch, size, max(1, args.batch_requests)))
+            for result in modes:
+                print(
+                    f"{result['mode']:<16} {result['throughput_rps']:>9.1f} req/s"
+                    f" {result['assessments_per_s']:>10.1f} assessments/s"
+                    f"  p50 {result['p50_ms']:>8.3f} ms  p95 {result['p95_ms']:>8.3f} ms"
+                    f"  p99 {result['p99_ms']:>8.3f} ms  errors {result['errors']}"
+                    f"  noise ±{result['noise']['throughput_rps']:.0%}"
+                )
+
+            allocations = await run_allocations(client, rows[:args.alloc_rows])
+            print(f"Allocations: {allocations['alloc_peak_kb_mean']} KB peak per request (mean), "
+                  f"{allocations['retained_blocks_per_request']} blocks retained per request")
+
+    phases = median_phases(rows, args.repeat)
+    for phase, timing in phases.items():
+        print(f"{phase:<14} median {timing['median_us']:>9.2f} µs  mean {timing['mean_us']:>9.2f} µs"
+              f"  p95 {timing['p95_us']:>9.2f} µs  noise ±{timing['noise']['median_us']:.0%}")
+
+    current = app.registry.active
+    report = {
+        "rows": len(rows),
+        "model": current.describe(),
+        "microbatch": app.micro_batcher is not None,
+        "modes": {result["mode"]: result for result in modes},
+        "allocations": allocations,
+        "phases": phases,
+    }
+    if args.cold_start:
+        report["cold_start"] = cold = run_cold_starts(args.cold_start)
+        print(f"Cold start:     median {cold['wall_ms']:.0f} ms ±{cold['noise']['wall_ms']:.0%} "
+              f"over {cold['runs']} processes (fast start {'on' if cold['fast_start'] else 'off'}), "
+              + ", ".join(f"{name} {ms:.0f} ms" for name, ms in cold["phases_ms"].items()))
+        print(f"                heavy modules imported: {', '.join(cold['heavy_modules']) or 'none'}")
+    return report
+
+
+# ------------------ Baseline comparison ------------------ #
+def metrics(report):
+    """(name, value, higher_is_better, noise) for everything compared against a baseline."""
+    def noise(result, key):
+        # Reports from before the median gate carry no noise
+        return result.get("noise", {}).get(key, 0.0)
+
+    for mode, result in report["modes"].items():
+        yield f"{mode}.throughput_rps", result["throughput_rps"], True, noise(result, "throughput_rps")
+        for key in ("p50_ms", "p95_ms"):
+            yield f"{mode}.{key}", result[key], False, noise(result, key)
+    yield "allocations.alloc_peak_kb_mean", report["allocations"]["alloc_peak_kb_mean"], False, 0.0
+    for phase, timing in report["phases"].items():
+        yield f"phases.{phase}.median_us", timing["median_us"], False, noise(timing, "median_us")
+    if "cold_start" in report:
+        cold = report["cold_start"]
+        yield "cold_start.wall_ms", cold["wall_ms"], False, noise(cold, "wall_ms")
+
+
+def compare(report, baseline, threshold, floor_us, noise_factor):
+    """Regressions of ``report`` against ``baseline`` beyond the allowed change.
+
+    The allowed change is ``threshold``, or ``noise_factor`` times the
+    noise of both reports added up when that is wider.
+    """
+    previous = {name: (value, noise) for name, value, _, noise in metrics(baseline)}
+    regressions = []
+    for name, value, higher_is_better, noise in metrics(report):
+        old, old_noise = previous.get(name, (None, 0.0))
+        if old is None or old <= 0:
+            continue
+        change = (value - old) / old
+        # Sub-microsecond phases jitter by more than any threshold
+        if name.startswith("phases.") and max(value, old) < floor_us:
+            continue
+        allowed = max(threshold, noise_factor * (noise + old_noise))
+        if (higher_is_better and change < -allowed) or (not higher_is_better and change > allowed):
+            regressions.append((name, old, value, change, allowed))
+    return regressions
+
+
+def check_model(args):
+    """Why the active model cannot be benchmarked, or None."""
+    current = app.registry.active
+    if not current.has_model:
+        return "no model is loaded, /predict would only run the fallback"
+    try:
+        current.scores(current.encoder.encode(next(csv_responses(args.csv, 1))))
+    except Exception as e:
+        return f"the model cannot score a CSV row ({type(e).__name__}: {e})"
+    return None
+
+
+def main(args):
+    problem = check_model(args)
+    if problem:
+        print(f"❌ Not benchmarking: {problem}")
+        return 1
+    report = asyncio.run(benchmark(args))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Results written to {args.json}")
+    errors = sum(result["errors"] for result in report["modes"].values())
+    if errors:
+        print(f"❌ {errors} failed requests or fallback answers, the timings do not measure the model")
+        return 1
+    if not args.baseline:
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(report, baseline, args.threshold, args.floor_us, args.noise_factor)
+    if regressions:
+        for name, old, new, change, allowed in regressions:
+            print(f"❌ {name}: {old} -> {new} ({change:+.1%}, allowed ±{allowed:.0%})")
+        print(f"❌ {len(regressions)} regressions beyond {args.threshold:.0%} against {args.baseline}")
+        return 1
+    print(f"✅ No regressions beyond {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark /predict with rows of the training CSV")
+    parser.add_argument("--csv", default="student_depression.csv")
+    parser.add_argument("--rows", type=int, default=500, help="CSV rows to replay")
+    parser.add_argument("--requests", type=int, default=0, help="/predict requests per mode (default: one per row)")
+    parser.add_argument("--concurrency", default="8,32", help="concurrent modes, besides single")
+    parser.add_argument("--batch-size", default="100", help="assessments per /predict/batch call")
+    parser.add_argument("--batch-requests", type=int, default=50, help="/predict/batch calls per batch size")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per mode; the median is kept")
+    parser.add_argument("--alloc-rows", type=int, default=200, help="rows replayed with tracemalloc on")
+    parser.add_argument("--cold-start", type=int, default=0, help="fresh processes to time the app's startup in")
+    parser.add_argument("--json", default="", help="write the full report here")
+    parser.add_argument("--baseline", default="", help="report to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed relative regression")
+    parser.add_argument("--noise-factor", type=float, default=2.0,
+                        help="allow this many times the two reports' noise when that exceeds --threshold")
+    parser.add_argument("--floor-us", type=float, default=5.0,
+                        help="ignore phase changes when both times are below this")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(main(parse_args()))
@@ -0,0 +1,232 @@
+# compiled_model.py
+"""Compiled scorers for the depression model, with the scaler folded in.
+
+``compile_model(model, scaler)`` turns the fitted StandardScaler plus model
+into plain NumPy arrays, so scoring skips sklearn's per-call validation:
+
+* Logistic regression: the scaler is folded into the weights, leaving a
+  single dot product ``x @ w + b`` and a sigmoid.
+* Random forest: every tree is flattened into shared node arrays (feature,
+  threshold, children, leaf probabilities) and all trees are walked
+  together, one level per step, for the whole batch at once; paths that
+  reached a leaf drop out of the next step.  Tree thresholds are compared
+  in float32 on scaled features exactly as sklearn does, so the scaler is
+  applied first instead of being folded into the thresholds, which could
+  flip rows that sit on a split.  Past ``FOREST_MAX_BATCH`` rows sklearn's
+  Cython tree walk is faster, so larger batches are handed back to it
+  (once the model is loaded; a model version started with ``FAST_START``
+  scores every batch here until then).
+
+``score(X)`` takes raw (unscaled) feature rows and returns the predicted
+classes and the probability of class 1 in one call.  Anything else (other
+model types, more than two classes, a scaler that doesn't fit the model)
+compiles to ``None`` and serving keeps using sklearn.
+
+``save_compiled`` writes a scorer's arrays as ``.npy`` files and
+``load_compiled`` maps them back read-only, so every worker loading the
+same model version shares one copy in the page cache.
+
+Check against sklearn and measure the speedup::
+
+    python compiled_model.py --model model.pkl --rows 2000
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+COMPILE_MODEL = os.getenv("COMPILE_MODEL", "1") == "1"
+FOREST_MAX_BATCH = int(os.getenv("FOREST_MAX_BATCH", "512"))
+
+
+class CompiledLogistic:
+    kind = "logistic_regression"
+    arrays = ("weights", "bias", "classes")
+
+    def __init__(self, model, scaler):
+        weights = model.coef_[0].astype(np.float64)
+        bias = float(model.intercept_[0])
+        if scaler is not None:
+            # w . ((x - mean) / scale) + b  ==  (w / scale) . x + (b - w . mean / scale)
+            weights = weights / scaler.scale_
+            bias = bias - float(np.dot(weights, scaler.mean_))
+        self.weights = np.ascontiguousarray(weights)
+        self.bias = np.array(bias)
+        self.classes = model.classes_
+
+    def attach(self, model, scaler):
+        """Nothing to keep: the scaler is already folded into the weights"""
+
+    def score(self, X):
+        z = X @ self.weights + self.bias
+        # exp of a large margin overflows; exp(-|z|) never does
+        e = np.exp(-np.abs(z))
+        probability = np.where(z >= 0, 1.0 / (1.0 + e), e / (1.0 + e))
+        return self.classes[(z > 0).astype(int)], probability
+
+
+class CompiledForest:
+    kind = "random_forest"
+    arrays = ("feature", "threshold", "left", "right", "value", "is_leaf", "roots", "classes")
+
+    def __init__(self, model, scaler):
+        features, thresholds, lefts, rights, values, leaves, roots = [], [], [], [], [], [], []
+        offset = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            count = tree.node_count
+            leaf = tree.children_left == -1
+            nodes = np.arange(count)
+            roots.append(offset)
+            leaves.append(leaf)
+            lefts.append(np.where(leaf, nodes, tree.children_left) + offset)
+            rights.append(np.where(leaf, nodes, tree.children_right) + offset)
+            features.append(np.where(leaf, 0, tree.feature))
+            thresholds.append(tree.threshold)
+            value = tree.value[:, 0, :]
+            values.append(value / value.sum(axis=1, keepdims=True))
+            offset += count
+
+        self.feature = np.concatenate(features).astype(np.intp)
+        self.threshold = np.concatenate(thresholds)
+        self.left = np.concatenate(lefts).astype(np.intp)
+        self.right = np.concatenate(rights).astype(np.intp)
+        self.value = np.concatenate(values)
+        self.is_leaf = np.concatenate(leaves)
+        self.roots = np.array(roots, dtype=np.intp)
+        self.classes = model.classes_
+        self.attach(model, scaler)
+
+    def attach(self, model, scaler):
+        """Keep the model and scaler for the large-batch path"""
+        self.model = model
+        self.scaler = scaler
+        self.mean = scaler.mean_ if scaler is not None else None
+        self.scale = scaler.scale_ if scaler is not None else None
+
+    def score(self, X):
+        if len(X) > FOREST_MAX_BATCH and self.model is not None:
+            X_scaled = self.scaler.transform(X) if self.scaler is not None else X
+            proba = self.model.predict_proba(X_scaled)
+            return self.classes[proba.argmax(axis=1)], proba[:, 1]
+        if self.mean is not None:
+            X = (X - self.mean) / self.scale
+        # sklearn trees compare float32 features against the thresholds
+        X = X.astype(np.float32)
+        trees = len(self.roots)
+        # One entry per (row, tree); only entries not yet at a leaf move on
+        node = np.tile(self.roots, len(X))
+        row = np.repeat(np.arange(len(X)), trees)
+        active = np.flatnonzero(~self.is_leaf[node])
+        while active.size:
+            current = node[active]
+            go_left = X[row[active], self.feature[current]] <= self.threshold[current]
+            node[active] = np.where(go_left, self.left[current], self.right[current])
+            active = active[~self.is_leaf[node[active]]]
+        proba = self.value[node].reshape(len(X), trees, -1).mean(axis=1)
+        return self.classes[proba.argmax(axis=1)], proba[:, 1]
+
+
+def compile_model(model, scaler):
+    """A compiled scorer for ``model``, or ``None`` if it can't be compiled."""
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.linear_model import LogisticRegression
+
+    if len(getattr(model, "classes_", [])) != 2:
+        return None
+    if scaler is not None and getattr(scaler, "n_features_in_", None) != model.n_features_in_:
+        logger.warning("⚠️ Scaler expects %s features but the model %s, not compiling",
+                       scaler.n_features_in_, model.n_features_in_)
+        return None
+    if isinstance(model, LogisticRegression):
+        return CompiledLogistic(model, scaler)
+    if isinstance(model, RandomForestClassifier):
+        return CompiledForest(model, scaler)
+    return None
+
+
+def save_compiled(compiled, directory):
+    os.makedirs(directory, exist_ok=True)
+    for name in compiled.arrays:
+        np.save(os.path.join(directory, f"{name}.npy"), getattr(compiled, name))
+
+
+def load_compiled(kind, directory, model, scaler):
+    """A scorer written by ``save_compiled``, its arrays memory-mapped read-only."""
+    cls = {CompiledLogistic.kind: CompiledLogistic, CompiledForest.kind: CompiledForest}[kind]
+    compiled = cls.__new__(cls)
+    for name in cls.arrays:
+        setattr(compiled, name, np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r"))
+    compiled.attach(model, scaler)
+    return compiled
+
+
+# ------------------ Accuracy and speed check ------------------ #
+def _sklearn_score(model, scaler, X):
+    X_scaled = scaler.transform(X) if scaler is not None else X
+    return model.predict(X_scaled), model.predict_proba(X_scaled)[:, 1]
+
+
+def _per_row_seconds(function, rows):
+    started = time.perf_counter()
+    for row in rows:
+        function(row)
+    return (time.perf_counter() - started) / len(rows)
+
+
+def check(args):
+    import warnings
+
+    import joblib
+    from feature_encoder import FeatureEncoder, csv_responses
+
+    warnings.filterwarnings("ignore")
+    model = joblib.load(args.model)
+    scaler = joblib.load(args.scaler)
+    compiled = compile_model(model, scaler)
+    if compiled is None:
+        print(f"❌ {type(model).__name__} from {args.model} cannot be compiled")
+        return 1
+
+    encoder = FeatureEncoder(joblib.load(args.features), one_hot=args.one_hot)
+    X = encoder.encode_many(list(csv_responses(args.csv, args.rows)))
+
+    expected_class, expected_probability = _sklearn_score(model, scaler, X)
+    actual_class, actual_probability = compiled.score(X)
+    class_mismatches = int((expected_class != actual_class).sum())
+    max_error = float(np.abs(expected_probability - actual_probability).max())
+
+    singles = [X[i:i + 1] for i in range(min(len(X), 500))]
+    sklearn_single = _per_row_seconds(lambda row: _sklearn_score(model, scaler, row), singles)
+    compiled_single = _per_row_seconds(compiled.score, singles)
+    sklearn_batch = _per_row_seconds(lambda batch: _sklearn_score(model, scaler, batch), [X]) / len(X)
+    compiled_batch = _per_row_seconds(compiled.score, [X]) / len(X)
+
+    print(f"{compiled.kind}: {len(X)} rows")
+    print(f"Class mismatches: {class_mismatches}, max probability difference: {max_error:.2e}")
+    print(f"Single row: sklearn {sklearn_single * 1e6:.1f} µs, compiled {compiled_single * 1e6:.1f} µs "
+          f"({sklearn_single / compiled_single:.1f}x)")
+    print(f"Batch of {len(X)}: sklearn {sklearn_batch * 1e6:.2f} µs/row, compiled {compiled_batch * 1e6:.2f} µs/row "
+          f"({sklearn_batch / compiled_batch:.1f}x)")
+    if class_mismatches or max_error > args.tolerance:
+        print("❌ Compiled scorer does not match sklearn")
+        return 1
+    print("✅ Compiled scorer matches sklearn")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check a compiled scorer against sklearn")
+    parser.add_argument("--model", default="model.pkl")
+    parser.add_argument("--scaler", default="scaler.pkl")
+    parser.add_argument("--features", default="features.pkl")
+    parser.add_argument("--csv", default="student_depression.csv")
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--one-hot", action="store_true", help="encode with one-hot slots set (ENCODER_ONE_HOT)")
+    parser.add_argument("--tolerance", type=float, default=1e-9)
+    sys.exit(check(parser.parse_args()))
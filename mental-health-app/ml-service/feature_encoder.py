@@ -0,0 +1,227 @@
+# feature_encoder.py
+"""Turns the 17 raw assessment responses into the model's feature row.
+
+The encoder is compiled once from ``features.pkl``: every numeric column
+and every ``<column>_<category>`` one-hot slot gets a fixed index, and
+``encode`` fills a preallocated NumPy row directly instead of building a
+one-row DataFrame per request.
+
+By default the output matches the previous pandas path exactly.  That path
+ran ``pd.get_dummies(drop_first=True)`` on a single row, which drops every
+dummy, so only the numeric columns were ever set.  ``ENCODER_ONE_HOT=1``
+also sets the one-hot slots the way ``train_model.py`` encodes the training
+data; the model has to be checked against that before it is enabled.
+
+Parity check against the pandas path, over the training CSV::
+
+    python feature_encoder.py --csv student_depression.csv
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+import numpy as np
+
+ENCODER_ONE_HOT = os.getenv("ENCODER_ONE_HOT", "0") == "1"
+
+# (position in responses, column, default when missing or blank)
+NUMERIC_FIELDS = [
+    (2, 'Age', 20.0),
+    (5, 'Academic Pressure', 1.0),
+    (6, 'Work Pressure', 1.0),
+    (7, 'CGPA', 3.0),
+    (8, 'Study Satisfaction', 2.0),
+    (9, 'Job Satisfaction', 2.0),
+    (10, 'Sleep Duration', 7.0),
+    (14, 'Work/Study Hours', 8.0),
+]
+
+CATEGORICAL_FIELDS = [
+    (1, 'Gender'),
+    (3, 'City'),
+    (4, 'Profession'),
+    (11, 'Dietary Habits'),
+    (12, 'Degree'),
+    (13, 'Have you ever had suicidal thoughts ?'),
+    (15, 'Financial Stress'),
+    (16, 'Family History of Mental Illness'),
+]
+
+
+def category(value):
+    """Category label as it appears in the training dummies ("3" -> "3.0")."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(float(value))
+    return str(value).strip()
+
+
+class FeatureEncoder:
+    def __init__(self, feature_columns, one_hot=ENCODER_ONE_HOT):
+        self.feature_columns = list(feature_columns)
+        self.width = len(self.feature_columns)
+        self.one_hot = one_hot
+        index = {column: i for i, column in enumerate(self.feature_columns)}
+
+        # Every numeric field is parsed, even one the model doesn't use, so
+        # bad input fails the same way it always has
+        self.numeric = [(position, index.get(column), default) for position, column, default in NUMERIC_FIELDS]
+
+        self.slots = []
+        for position, column in CATEGORICAL_FIELDS:
+            prefix = f"{column}_"
+            categories = {
+                name[len(prefix):]: i for name, i in index.items() if name.startswith(prefix)
+            }
+            if categories:
+                self.slots.append((position, categories))
+
+    def encode_into(self, responses, row):
+        """Fill ``row`` (zeroed, ``width`` long) from one response list."""
+        count = len(responses)
+        for position, i, default in self.numeric:
+            value = float(responses[position]) if count > position and str(responses[position]).strip() else default
+            if i is not None:
+                row[i] = value
+        if self.one_hot:
+            for position, categories in self.slots:
+                if count > position:
+                    i = categories.get(category(responses[position]))
+                    if i is not None:
+                        row[i] = 1.0
+        return row
+
+    def encode(self, responses):
+        """One ``(1, width)`` feature row, ready for ``scaler.transform``."""
+        X = np.zeros((1, self.width))
+        self.encode_into(responses, X[0])
+        return X
+
+    def encode_many(self, batch):
+        X = np.zeros((len(batch), self.width))
+        for responses, row in zip(batch, X):
+            self.encode_into(responses, row)
+        return X
+
+
+# ------------------ Parity check ------------------ #
+def pandas_reference(responses, feature_columns):
+    """The previous pandas preprocessing, kept only to check the encoder against."""
+    import pandas as pd
+
+    raw_data = {
+        'id': responses[0] if len(responses) > 0 else 'student123',
+        'Gender': responses[1] if len(responses) > 1 else 'Male',
+        'Age': float(responses[2]) if len(responses) > 2 and str(responses[2]).strip() else 20.0,
+        'City': responses[3] if len(responses) > 3 else 'Unknown',
+        'Profession': responses[4] if len(responses) > 4 else 'Student',
+        'Academic Pressure': float(responses[5]) if len(responses) > 5 and str(responses[5]).strip() else 1.0,
+        'Work Pressure': float(responses[6]) if len(responses) > 6 and str(responses[6]).strip() else 1.0,
+        'CGPA': float(responses[7]) if len(responses) > 7 and str(responses[7]).strip() else 3.0,
+        'Study Satisfaction': float(responses[8]) if len(responses) > 8 and str(responses[8]).strip() else 2.0,
+        'Job Satisfaction': float(responses[9]) if len(responses) > 9 and str(responses[9]).strip() else 2.0,
+        'Sleep Duration': float(responses[10]) if len(responses) > 10 and str(responses[10]).strip() else 7.0,
+        'Dietary Habits': responses[11] if len(responses) > 11 else 'Average',
+        'Degree': responses[12] if len(responses) > 12 else 'Bachelor',
+        'Have you ever had suicidal thoughts ?': responses[13] if len(responses) > 13 else 'No',
+        'Work/Study Hours': float(responses[14]) if len(responses) > 14 and str(responses[14]).strip() else 8.0,
+        'Financial Stress': responses[15] if len(responses) > 15 else 'No',
+        'Family History of Mental Illness': responses[16] if len(responses) > 16 else 'No'
+    }
+    df = pd.DataFrame([raw_data])
+    dietary_mapping = {'Healthy': 2, 'Average': 1, 'Unhealthy': 0}
+    df['Dietary Habits'] = df['Dietary Habits'].map(dietary_mapping).fillna(1)
+    cat_cols = ['Gender', 'City', 'Profession', 'Degree',
+                'Have you ever had suicidal thoughts ?',
+                'Family History of Mental Illness', 'Financial Stress']
+    cat_cols = [col for col in cat_cols if col in df.columns and df[col].dtype == 'object']
+    df_encoded = pd.get_dummies(df, columns=cat_cols, drop_first=True) if cat_cols else df.copy()
+    for col in feature_columns:
+        if col not in df_encoded.columns:
+            df_encoded[col] = 0
+    return df_encoded[feature_columns].values
+
+
+def extract_hours(value):
+    """'5-6 hours' -> 5.0, as ``train_model.py`` cleans Sleep Duration."""
+    match = re.search(r"(\d+(\.\d+)?)", str(value))
+    return float(match.group(1)) if match else ''
+
+
+def csv_responses(path, limit=None):
+    """Rows of the training CSV as 17-element ``responses`` lists."""
+    import csv
+
+    with open(path, newline='') as f:
+        for number, row in enumerate(csv.DictReader(f)):
+            if limit is not None and number >= limit:
+                return
+            responses = [row[column] for column in list(row)[:17]]
+            responses[10] = extract_hours(responses[10])
+            yield responses
+
+
+EDGE_CASES = [
+    [],
+    ['s1'],
+    ['s1', 'Female', '', 'Pune', 'Student', ' ', 3],
+    ['s1', 'Male', 21, 'Agra', 'Student', 4, 4, 7.5, 3, 0, 3.5, 'Healthy', 'BSc', 'Yes', 10, 3, 'No'],
+    ['s1', 'Male', '21', 'Agra', 'Student', '4', '4', '7.5', '3', '0', '6', 'Unhealthy', 'BSc', 'No', '10', '?', 'Yes'],
+    ['s1', None, 22.0, None, None, 2.0, 0.0, 8.1, 4.0, 0.0, 7.0, None, None, None, 6.0, None, None],
+    ['s1', 'Male', 'abc'],
+    ['s1', 'Male', None],
+    ['s1', True, True, 'Pune', 'Student', False],
+]
+
+
+def _outcome(function, responses):
+    try:
+        return function(responses), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+
+def parity(args):
+    import joblib
+
+    feature_columns = joblib.load(args.features)
+    encoder = FeatureEncoder(feature_columns, one_hot=False)
+    cases = list(csv_responses(args.csv, args.limit)) + EDGE_CASES
+
+    mismatches = 0
+    reference_seconds = encoder_seconds = 0.0
+    for responses in cases:
+        started = time.perf_counter()
+        expected, expected_error = _outcome(lambda r: pandas_reference(r, feature_columns), responses)
+        reference_seconds += time.perf_counter() - started
+        started = time.perf_counter()
+        actual, actual_error = _outcome(encoder.encode, responses)
+        encoder_seconds += time.perf_counter() - started
+
+        same = expected_error == actual_error if expected_error or actual_error else (
+            expected.shape == actual.shape
+            and np.array_equal(expected.astype(np.float64), actual, equal_nan=True)
+        )
+        if not same:
+            mismatches += 1
+            if mismatches <= 5:
+                print(f"❌ Mismatch for {responses}: {expected_error or expected} vs {actual_error or actual}")
+
+    print(f"{len(cases)} responses checked")
+    print(f"pandas:  {reference_seconds / len(cases) * 1e6:.1f} µs/row")
+    print(f"encoder: {encoder_seconds / len(cases) * 1e6:.1f} µs/row "
+          f"({reference_seconds / encoder_seconds:.0f}x faster)")
+    if mismatches:
+        print(f"❌ {mismatches} mismatches")
+        return 1
+    print("✅ Encoder output is identical to the pandas path")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check FeatureEncoder against the pandas preprocessing")
+    parser.add_argument("--csv", default="student_depression.csv")
+    parser.add_argument("--features", default="features.pkl")
+    parser.add_argument("--limit", type=int, default=None)
+    sys.exit(parity(parser.parse_args()))
@@ -0,0 +1,139 @@
+# micro_batcher.py
+"""Groups concurrent /predict requests into one vectorized model call.
+
+Requests are queued; a single dispatcher takes whatever is waiting (up to
+``max_size``), waits at most ``window`` seconds for more, and scores the
+whole batch in a worker thread so the event loop keeps accepting requests.
+Each request's future is resolved with its own row of the result.
+
+An idle service does not pay the window: when the previous batch held a
+single request and nothing else is queued, a new request is dispatched
+straight away.  Waiting for company only starts once requests overlap.
+"""
+import asyncio
+import contextvars
+import functools
+import os
+import time
+from bisect import bisect_left
+
+PREDICT_MICROBATCH = os.getenv("PREDICT_MICROBATCH", "0") == "1"
+PREDICT_BATCH_WINDOW_MS = float(os.getenv("PREDICT_BATCH_WINDOW_MS", "2"))
+PREDICT_BATCH_MAX = int(os.getenv("PREDICT_BATCH_MAX", "64"))
+
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+class MicroBatcher:
+    def __init__(self, score_batch, window=PREDICT_BATCH_WINDOW_MS / 1000, max_size=PREDICT_BATCH_MAX):
+        """``score_batch(items)`` must return one result per item, in order."""
+        self.score_batch = score_batch
+        self.window = window
+        self.max_size = max(1, max_size)
+        self._queue = None
+        self._dispatcher = None
+        self._last_size = 1
+
+        self.batches = 0
+        self.items = 0
+        self.size_counts = [0] * (len(SIZE_BUCKETS) + 1)
+        self.delay_total = 0.0
+        self.delay_max = 0.0
+
+    async def submit(self, item):
+        if self._dispatcher is None or self._dispatcher.done():
+            # Created on first use so it lives on the server's event loop
+            self._queue = asyncio.Queue()
+            # A fresh context, so the dispatcher doesn't carry this request's log id
+            self._dispatcher = contextvars.Context().run(asyncio.create_task, self._dispatch())
+            self._dispatcher.add_done_callback(functools.partial(self._drain, self._queue))
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((item, future, time.perf_counter()))
+        return await future
+
+    async def _collect(self):
+        batch = [await self._queue.get()]
+        while len(batch) < self.max_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        if len(batch) == 1 and self._last_size == 1:
+            return batch
+
+        deadline = time.perf_counter() + self.window
+        while len(batch) < self.max_size:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+            except BaseException:
+                # Cancelled mid-window: these are off the queue, so _drain won't see them
+                for _, future, _ in batch:
+                    _fail(future, None)
+                raise
+        return batch
+
+    async def _dispatch(self):
+        while True:
+            batch = await self._collect()
+            self._record(batch)
+            items = [item for item, _, _ in batch]
+            try:
+                results = await asyncio.to_thread(self.score_batch, items)
+            except Exception as e:
+                for _, future, _ in batch:
+                    _fail(future, e)
+                continue
+            except BaseException as e:
+                # The dispatcher dies with this; don't leave the batch waiting
+                for _, future, _ in batch:
+                    _fail(future, e)
+                raise
+            for (_, future, _), result in zip(batch, results):
+                # A client that disconnected leaves a cancelled future behind
+                if not future.done():
+                    future.set_result(result)
+
+    @staticmethod
+    def _drain(queue, dispatcher):
+        # Requests queued behind a dead dispatcher would otherwise wait forever;
+        # the next submit starts a new dispatcher on a new queue
+        error = None if dispatcher.cancelled() else dispatcher.exception()
+        while not queue.empty():
+            _, future, _ = queue.get_nowait()
+            _fail(future, error)
+
+    def _record(self, batch):
+        now = time.perf_counter()
+        self._last_size = len(batch)
+        self.batches += 1
+        self.items += len(batch)
+        self.size_counts[bisect_left(SIZE_BUCKETS, len(batch))] += 1
+        for _, _, queued_at in batch:
+            delay = now - queued_at
+            self.delay_total += delay
+            self.delay_max = max(self.delay_max, delay)
+
+    def stats(self):
+        labels = [f"<={size}" for size in SIZE_BUCKETS] + [f">{SIZE_BUCKETS[-1]}"]
+        return {
+            "window_ms": self.window * 1000,
+            "max_size": self.max_size,
+            "batches": self.batches,
+            "requests": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "batch_sizes": {label: count for label, count in zip(labels, self.size_counts) if count},
+            "avg_queue_delay_ms": round(self.delay_total / self.items * 1000, 3) if self.items else 0.0,
+            "max_queue_delay_ms": round(self.delay_max * 1000, 3),
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+        }
+
+
+def _fail(future, error):
+    if future.done():
+        return
+    if error is None or isinstance(error, asyncio.CancelledError):
+        future.cancel()
+    else:
+        future.set_exception(error)
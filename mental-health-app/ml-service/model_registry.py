@@ -0,0 +1,466 @@
+# model_registry.py
+"""Versioned model directory with validated, atomic hot reload.
+
+Each trained model is published as its own version under ``MODEL_DIR``::
+
+    models/
+      CURRENT                  name of the active version
+      20261017-101500/
+        manifest.json          model type, accuracy, feature count, files
+        model.joblib           fitted model (uncompressed, so it can be mapped)
+        scaler.joblib
+        scaler.npz             the scaler's mean and scale as plain arrays
+        model_info.joblib
+        features.json
+        compiled/*.npy         compiled scorer arrays (see compiled_model.py)
+
+Artifacts are loaded with ``mmap_mode="r"``: the compiled arrays and the
+model's NumPy attributes are read-only views of the page cache, so workers
+on one host share a single physical copy instead of each deserializing
+their own.
+
+A new version is loaded and validated in full before ``registry.active`` is
+replaced by one assignment.  Requests already holding the previous version
+finish with it, so nothing is dropped during a swap.  Every worker polls
+``CURRENT`` every ``MODEL_WATCH_SECONDS`` and follows it.
+
+With ``FAST_START=1`` a compiled version is served from the manifest,
+``features.json``, ``scaler.npz`` and the compiled arrays alone: no pickle
+is opened and sklearn (with scipy and pandas) is never imported.  The
+sklearn model is unpickled on first use, which the request path never
+needs; its agreement with the compiled scorer was checked at publish time.
+Versions without ``scaler.npz`` or a compiled scorer load in full.
+
+    python model_registry.py publish --model model.pkl --scaler scaler.pkl
+    python model_registry.py list
+    python model_registry.py activate 20261017-101500
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import shutil
+import sys
+import threading
+import time
+from functools import partial
+
+import numpy as np
+
+from compiled_model import COMPILE_MODEL, compile_model, load_compiled, save_compiled
+from feature_encoder import FeatureEncoder
+
+logger = logging.getLogger(__name__)
+
+MODEL_DIR = os.getenv("MODEL_DIR", "models")
+MODEL_WATCH_SECONDS = float(os.getenv("MODEL_WATCH_SECONDS", "5"))
+# Serve compiled versions without unpickling the model (see above)
+FAST_START = os.getenv("FAST_START", "0") == "1"
+
+# Scored by every candidate version before it is swapped in
+VALIDATION_RESPONSES = [
+    ['validation', 'Male', 21, 'Pune', 'Student', 3, 0, 7.5, 3, 0, 7, 'Healthy', 'BSc', 'No', 8, 2, 'No'],
+    ['validation', 'Female', 24, 'Delhi', 'Student', 5, 0, 6.1, 1, 0, 5, 'Unhealthy', 'MSc', 'No', 12, 5, 'Yes'],
+    [],
+]
+
+
+def _ms(started):
+    return round((time.perf_counter() - started) * 1000, 1)
+
+
+class ArrayScaler:
+    """``StandardScaler.transform`` from the saved mean and scale arrays."""
+
+    def __init__(self, mean, scale):
+        self.mean_ = mean
+        self.scale_ = scale
+        self.n_features_in_ = len(scale)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as arrays:
+            return cls(arrays["mean"], arrays["scale"])
+
+    @staticmethod
+    def save(scaler, path):
+        width = scaler.n_features_in_
+        mean = scaler.mean_ if getattr(scaler, "with_mean", True) else None
+        scale = scaler.scale_ if getattr(scaler, "with_std", True) else None
+        np.savez(
+            path,
+            mean=np.zeros(width) if mean is None else np.asarray(mean, dtype=np.float64),
+            scale=np.ones(width) if scale is None else np.asarray(scale, dtype=np.float64),
+        )
+
+    def transform(self, X):
+        # Same operations, in the same order, as StandardScaler
+        X = np.array(X, dtype=np.float64)
+        X -= self.mean_
+        X /= self.scale_
+        return X
+
+
+def _load_joblib(path):
+    import joblib
+    return joblib.load(path, mmap_mode="r")
+
+
+class ModelVersion:
+    """Everything needed to score with one model version.
+
+    ``model_loader`` defers unpickling the sklearn model until ``model`` is
+    first read.
+    """
+
+    def __init__(self, version, model, scaler, feature_columns, model_info=None, compiled=None,
+                 model_loader=None, model_type=None):
+        self.version = version
+        self._model = model
+        self._model_loader = model_loader
+        self._model_lock = threading.Lock()
+        self.model_type = model_type or (type(model).__name__ if model is not None else "None")
+        self.scaler = scaler
+        self.feature_columns = feature_columns
+        self.model_info = model_info
+        self.compiled = compiled
+        self.encoder = FeatureEncoder(feature_columns) if feature_columns else None
+        self.loaded_at = time.time()
+        # Load phase -> milliseconds
+        self.timings = {}
+
+    @property
+    def has_model(self):
+        return self._model is not None or self._model_loader is not None
+
+    @property
+    def model_loaded(self):
+        return self._model is not None
+
+    @property
+    def model(self):
+        if self._model is None and self._model_loader is not None:
+            with self._model_lock:
+                if self._model is None:
+                    started = time.perf_counter()
+                    model = self._model_loader()
+                    if self.compiled is not None:
+                        self.compiled.attach(model, self.scaler)
+                    self._model = model
+                    logger.info("✅ Model version %s: sklearn model loaded on demand (%.0f ms)",
+                                self.version, _ms(started))
+        return self._model
+
+    def scores(self, X):
+        """Predicted classes and class-1 probabilities for raw feature rows"""
+        if self.compiled is not None:
+            return self.compiled.score(X)
+        return self.sklearn_scores(X)
+
+    def sklearn_scores(self, X):
+        X_scaled = self.scaler.transform(X) if self.scaler is not None else X
+        proba = self.model.predict_proba(X_scaled)
+        return self.model.classes_[proba.argmax(axis=1)], proba[:, 1]
+
+    def describe(self):
+        return {
+            "version": self.version,
+            "model_type": self.model_type,
+            "features_count": len(self.feature_columns) if self.feature_columns else 0,
+            "compiled": self.compiled.kind if self.compiled is not None else None,
+            "model_loaded": self.model_loaded,
+            "loaded_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.loaded_at)),
+        }
+
+
+# ------------------ Directory layout ------------------ #
+def current_version(directory=MODEL_DIR):
+    try:
+        with open(os.path.join(directory, "CURRENT")) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def list_versions(directory=MODEL_DIR):
+    if not os.path.isdir(directory):
+        return []
+    return sorted(
+        name for name in os.listdir(directory)
+        if os.path.isfile(os.path.join(directory, name, "manifest.json"))
+    )
+
+
+def read_manifest(version, directory=MODEL_DIR):
+    path = os.path.join(directory, version, "manifest.json")
+    if not os.path.isfile(path):
+        raise FileNotFoundError(f"Model version {version} not found in {directory}")
+    with open(path) as f:
+        return json.load(f)
+
+
+def activate(version, directory=MODEL_DIR):
+    """Point ``CURRENT`` at ``version``; workers pick it up on their next poll"""
+    read_manifest(version, directory)
+    path = os.path.join(directory, "CURRENT")
+    with open(path + ".tmp", "w") as f:
+        f.write(version + "\n")
+    os.replace(path + ".tmp", path)
+
+
+def publish(model, scaler, feature_columns, model_info=None, directory=MODEL_DIR, version=None, make_active=True):
+    """Validate the model, write it as a new version and return its name.
+
+    The version is written under a temporary name and renamed into place,
+    so a watcher never sees a half-written version.  Raises ``ValueError``
+    without writing anything if the model fails ``validate``.
+    """
+    import joblib
+
+    compiled = compile_model(model, scaler)
+    validate(ModelVersion(version, model, scaler, feature_columns, model_info, compiled))
+
+    os.makedirs(directory, exist_ok=True)
+    if version is None:
+        version = time.strftime("%Y%m%d-%H%M%S")
+        suffix = 1
+        while os.path.exists(os.path.join(directory, version)):
+            suffix += 1
+            version = f"{time.strftime('%Y%m%d-%H%M%S')}-{suffix}"
+    target = os.path.join(directory, version)
+    if os.path.exists(target):
+        raise FileExistsError(f"Model version {version} already exists")
+
+    staging = os.path.join(directory, f".{version}.tmp")
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+    joblib.dump(model, os.path.join(staging, "model.joblib"))
+    joblib.dump(scaler, os.path.join(staging, "scaler.joblib"))
+    if scaler is not None:
+        ArrayScaler.save(scaler, os.path.join(staging, "scaler.npz"))
+    joblib.dump(model_info, os.path.join(staging, "model_info.joblib"))
+    with open(os.path.join(staging, "features.json"), "w") as f:
+        json.dump(list(feature_columns), f)
+
+    if compiled is not None:
+        save_compiled(compiled, os.path.join(staging, "compiled"))
+
+    manifest = {
+        "version": version,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "model_type": type(model).__name__,
+        "model_name": (model_info or {}).get("model_type"),
+        "accuracy": float((model_info or {}).get("accuracy", 0.0)) or None,
+        "features_count": len(feature_columns),
+        "compiled": compiled.kind if compiled is not None else None,
+    }
+    with open(os.path.join(staging, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    os.rename(staging, target)
+    if make_active:
+        activate(version, directory)
+    return version
+
+
+# ------------------ Loading ------------------ #
+def load_version(version, directory=MODEL_DIR, fast=FAST_START):
+    started = time.perf_counter()
+    manifest = read_manifest(version, directory)
+    path = os.path.join(directory, version)
+    with open(os.path.join(path, "features.json")) as f:
+        feature_columns = json.load(f)
+    timings = {"manifest_ms": _ms(started)}
+
+    compiled_kind = manifest.get("compiled") if COMPILE_MODEL else None
+    if fast and compiled_kind and os.path.isfile(os.path.join(path, "scaler.npz")):
+        started = time.perf_counter()
+        scaler = ArrayScaler.load(os.path.join(path, "scaler.npz"))
+        timings["scaler_ms"] = _ms(started)
+        started = time.perf_counter()
+        compiled = load_compiled(compiled_kind, os.path.join(path, "compiled"), None, scaler)
+        timings["compiled_ms"] = _ms(started)
+        model_info = {key: manifest[name] for key, name in (("model_type", "model_name"), ("accuracy", "accuracy"))
+                      if manifest.get(name) is not None}
+        candidate = ModelVersion(
+            version, None, scaler, feature_columns, model_info, compiled,
+            model_loader=partial(_load_joblib, os.path.join(path, "model.joblib")),
+            model_type=manifest.get("model_type"),
+        )
+    else:
+        import joblib
+
+        started = time.perf_counter()
+        model = joblib.load(os.path.join(path, "model.joblib"), mmap_mode="r")
+        timings["model_ms"] = _ms(started)
+        started = time.perf_counter()
+        scaler = joblib.load(os.path.join(path, "scaler.joblib"), mmap_mode="r")
+        model_info = joblib.load(os.path.join(path, "model_info.joblib"))
+        timings["scaler_ms"] = _ms(started)
+        compiled = None
+        if compiled_kind:
+            started = time.perf_counter()
+            compiled = load_compiled(compiled_kind, os.path.join(path, "compiled"), model, scaler)
+            timings["compiled_ms"] = _ms(started)
+        candidate = ModelVersion(version, model, scaler, feature_columns, model_info, compiled)
+    candidate.timings = timings
+    return candidate
+
+
+def validate(candidate):
+    """Raise ``ValueError`` unless ``candidate`` can serve predictions.
+
+    A model that is not unpickled yet (``FAST_START``) is checked through
+    its compiled scorer only.
+    """
+    width = len(candidate.feature_columns or [])
+    if not candidate.has_model or not width:
+        raise ValueError("model or feature list missing")
+    model_width = getattr(candidate.model, "n_features_in_", width) if candidate.model_loaded else width
+    if model_width != width:
+        raise ValueError(f"model expects {model_width} features, the feature list has {width}")
+    if candidate.scaler is not None and candidate.scaler.n_features_in_ != width:
+        raise ValueError(f"scaler expects {candidate.scaler.n_features_in_} features, the feature list has {width}")
+
+    X = candidate.encoder.encode_many(VALIDATION_RESPONSES)
+    classes, probability = candidate.scores(X)
+    if not np.all(np.isfinite(probability)) or ((probability < 0) | (probability > 1)).any():
+        raise ValueError(f"model returned invalid probabilities {probability.tolist()}")
+    if candidate.compiled is not None and candidate.model_loaded:
+        expected_classes, expected_probability = candidate.sklearn_scores(X)
+        if (expected_classes != classes).any() or not np.allclose(expected_probability, probability):
+            raise ValueError("compiled scorer disagrees with the model")
+
+
+class ModelRegistry:
+    def __init__(self, directory=MODEL_DIR):
+        self.directory = directory
+        self.active = None
+        self.reloads = 0
+        self.last_error = None
+        self._lock = threading.Lock()
+
+    def load_initial(self, legacy_loader):
+        """Load ``CURRENT``, or fall back to ``legacy_loader()``'s loose files"""
+        version = current_version(self.directory)
+        if version:
+            try:
+                self.reload(version)
+                return self.active
+            except Exception as e:
+                logger.error("❌ Model version %s failed to load, falling back to loose files: %s", version, e)
+
+        started = time.perf_counter()
+        model, scaler, feature_columns, model_info = legacy_loader()
+        load_ms = _ms(started)
+        started = time.perf_counter()
+        compiled = compile_model(model, scaler) if model is not None and COMPILE_MODEL else None
+        self.active = ModelVersion("legacy", model, scaler, feature_columns, model_info, compiled)
+        self.active.timings = {"legacy_files_ms": load_ms, "compile_ms": _ms(started)}
+        return self.active
+
+    def reload(self, version=None):
+        """Load, validate and swap in ``version`` (default: ``CURRENT``).
+
+        Blocking; run it off the event loop.  On any failure the active
+        version keeps serving and the error is raised.
+        """
+        with self._lock:
+            version = version or current_version(self.directory)
+            if not version:
+                raise FileNotFoundError(f"No CURRENT model version in {self.directory}")
+            if self.active is not None and self.active.version == version:
+                return self.active
+            started = time.perf_counter()
+            try:
+                candidate = load_version(version, self.directory)
+                validating = time.perf_counter()
+                validate(candidate)
+                candidate.timings["validate_ms"] = _ms(validating)
+            except Exception as e:
+                self.last_error = f"{version}: {e}"
+                raise
+            self.active = candidate
+            self.reloads += 1
+            self.last_error = None
+            logger.info("✅ Model version %s active (%s, %.0f ms to load)",
+                        version, candidate.model_type, _ms(started))
+            return candidate
+
+    async def watch(self, interval=MODEL_WATCH_SECONDS):
+        """Load the version ``CURRENT`` names whenever it is not the active one.
+
+        A version that fails (e.g. a half-synced directory) is tried again on
+        every poll, but its failure is logged only once.
+        """
+        failed = None
+        while True:
+            await asyncio.sleep(interval)
+            version = current_version(self.directory)
+            if not version or (self.active is not None and version == self.active.version):
+                continue
+            try:
+                await asyncio.to_thread(self.reload, version)
+            except Exception as e:
+                if version != failed:
+                    logger.error("❌ Model version %s rejected, keeping %s: %s", version, self.active.version, e)
+                failed = version
+            else:
+                failed = None
+
+    def stats(self):
+        return {
+            "active": self.active.describe() if self.active is not None else None,
+            "current": current_version(self.directory),
+            "versions": list_versions(self.directory),
+            "reloads": self.reloads,
+            "last_error": self.last_error,
+        }
+
+
+# ------------------ CLI ------------------ #
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the versioned model directory")
+    parser.add_argument("--dir", default=MODEL_DIR)
+    commands = parser.add_subparsers(dest="command", required=True)
+    publish_parser = commands.add_parser("publish", help="publish trained model files as a new version")
+    publish_parser.add_argument("--model", default="model.pkl")
+    publish_parser.add_argument("--scaler", default="scaler.pkl")
+    publish_parser.add_argument("--features", default="features.pkl")
+    publish_parser.add_argument("--info", default="model_info.pkl")
+    publish_parser.add_argument("--version", default=None)
+    publish_parser.add_argument("--no-activate", action="store_true")
+    commands.add_parser("list", help="list published versions")
+    activate_parser = commands.add_parser("activate", help="make a published version current")
+    activate_parser.add_argument("version")
+    args = parser.parse_args(argv)
+
+    if args.command == "publish":
+        import joblib
+
+        model_info = joblib.load(args.info) if os.path.exists(args.info) else None
+        try:
+            version = publish(
+                joblib.load(args.model), joblib.load(args.scaler), joblib.load(args.features), model_info,
+                directory=args.dir, version=args.version, make_active=not args.no_activate,
+            )
+        except ValueError as e:
+            print(f"❌ {args.model} failed validation, not published: {e}")
+            return 1
+        print(f"✅ Published model version {version}" + ("" if args.no_activate else " (current)"))
+    elif args.command == "list":
+        current = current_version(args.dir)
+        for version in list_versions(args.dir):
+            manifest = read_manifest(version, args.dir)
+            marker = "*" if version == current else " "
+            print(f"{marker} {version}  {manifest['model_type']}  features={manifest['features_count']}  "
+                  f"accuracy={manifest['accuracy']}  compiled={manifest['compiled']}")
+    elif args.command == "activate":
+        activate(args.version, args.dir)
+        print(f"✅ Model version {args.version} is current")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
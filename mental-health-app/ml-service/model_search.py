@@ -0,0 +1,228 @@
+# model_search.py
+"""Cross-validated hyperparameter search over both model families.
+
+Used by ``train_model.py`` when ``TRAIN_SEARCH=1``.  Every candidate in
+``CANDIDATES`` (logistic regression and random forest settings) is scored
+with stratified k-fold cross-validation, and successive halving prunes the
+weak ones early: all candidates are scored on the first fold, the best
+``1/TRAIN_HALVING_FACTOR`` go on to more folds, and so on until the
+survivors have been scored on every fold.
+
+Each (candidate, fold) fit runs in a process pool with one worker per core.
+Random forests get the cores left over per worker as ``n_jobs``.  The folds are
+split and scaled once, with a scaler fitted on each fold's training part,
+and written as ``.npy`` files under ``TRAIN_CACHE_DIR``.  Workers map them
+read-only, and a later run on the same data reuses them.
+
+    TRAIN_SEARCH=1              search instead of the two fixed models
+    TRAIN_CV_FOLDS=5            at least 2
+    TRAIN_HALVING_FACTOR=3      at least 2
+    TRAIN_JOBS=0                worker processes (0: one per core)
+    TRAIN_CACHE_DIR=.search_cache
+"""
+import hashlib
+import math
+import os
+import shutil
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, f1_score, roc_auc_score
+from sklearn.model_selection import StratifiedKFold
+from sklearn.preprocessing import StandardScaler
+
+TRAIN_SEARCH = os.getenv("TRAIN_SEARCH", "0") == "1"
+TRAIN_CV_FOLDS = int(os.getenv("TRAIN_CV_FOLDS", "5"))
+TRAIN_HALVING_FACTOR = int(os.getenv("TRAIN_HALVING_FACTOR", "3"))
+TRAIN_JOBS = int(os.getenv("TRAIN_JOBS", "0"))
+TRAIN_CACHE_DIR = os.getenv("TRAIN_CACHE_DIR", ".search_cache")
+
+LOGISTIC = "Logistic Regression"
+FOREST = "Random Forest"
+
+# (family, hyperparameters); the first of each family is the old fixed model
+CANDIDATES = [(LOGISTIC, {"C": C}) for C in (1.0, 0.01, 0.1, 10.0)] + [
+    (FOREST, {"n_estimators": n_estimators, "max_depth": max_depth,
+              "min_samples_leaf": min_samples_leaf, "max_features": max_features})
+    for n_estimators in (100, 300)
+    for max_depth in (None, 12, 24)
+    for min_samples_leaf in (1, 4)
+    for max_features in ("sqrt", 0.3)
+]
+
+
+def build_model(family, params, class_weight, n_jobs=1):
+    if family == LOGISTIC:
+        return LogisticRegression(max_iter=1000, random_state=42, class_weight=class_weight, **params)
+    return RandomForestClassifier(random_state=42, class_weight=class_weight, n_jobs=n_jobs, **params)
+
+
+def describe(family, params):
+    return f"{family} " + ", ".join(f"{name}={value}" for name, value in params.items())
+
+
+# ------------------ Fold cache ------------------ #
+def cache_folds(X, y, folds, directory=TRAIN_CACHE_DIR, seed=42):
+    """Split and scale the folds once; return ``(fold_dir, reused)``.
+
+    The directory name is a hash of the data and the split, so changed data
+    or a different fold count never reads stale folds.
+    """
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    y = np.ascontiguousarray(y)
+    digest = hashlib.blake2b(digest_size=8)
+    for part in (X.tobytes(), y.tobytes(), f"{X.shape}/{folds}/{seed}".encode()):
+        digest.update(part)
+    fold_dir = os.path.join(directory, digest.hexdigest())
+    if os.path.isdir(fold_dir):
+        return fold_dir, True
+
+    staging = fold_dir + ".tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+    splitter = StratifiedKFold(n_splits=folds, shuffle=True, random_state=seed)
+    for index, (train, valid) in enumerate(splitter.split(X, y)):
+        scaler = StandardScaler().fit(X[train])
+        np.save(os.path.join(staging, f"{index}_X_train.npy"), scaler.transform(X[train]))
+        np.save(os.path.join(staging, f"{index}_y_train.npy"), y[train])
+        np.save(os.path.join(staging, f"{index}_X_valid.npy"), scaler.transform(X[valid]))
+        np.save(os.path.join(staging, f"{index}_y_valid.npy"), y[valid])
+    os.rename(staging, fold_dir)
+    return fold_dir, False
+
+
+# Folds already mapped by this process
+_folds = {}
+
+
+def _load_fold(fold_dir, index):
+    key = (fold_dir, index)
+    if key not in _folds:
+        _folds[key] = tuple(
+            np.load(os.path.join(fold_dir, f"{index}_{name}.npy"), mmap_mode="r")
+            for name in ("X_train", "y_train", "X_valid", "y_valid")
+        )
+    return _folds[key]
+
+
+def _evaluate(task):
+    """Fit one candidate on one fold (runs in a worker process)"""
+    family, params, class_weight, fold_dir, index, n_jobs = task
+    X_train, y_train, X_valid, y_valid = _load_fold(fold_dir, index)
+    started = time.perf_counter()
+    model = build_model(family, params, class_weight, n_jobs).fit(X_train, y_train)
+    proba = model.predict_proba(X_valid)[:, 1]
+    predictions = model.classes_[(proba > 0.5).astype(int)]
+    return {
+        "accuracy": accuracy_score(y_valid, predictions),
+        "f1": f1_score(y_valid, predictions),
+        "roc_auc": roc_auc_score(y_valid, proba),
+        "seconds": time.perf_counter() - started,
+    }
+
+
+# ------------------ Search ------------------ #
+def _fold_budgets(folds, factor):
+    """Folds per halving stage, e.g. 1, 3, 5 for five folds and a factor of 3"""
+    budgets = []
+    budget = 1
+    while budget < folds:
+        budgets.append(budget)
+        budget *= factor
+    return budgets + [folds]
+
+
+def search(X, y, class_weight, candidates=CANDIDATES, folds=TRAIN_CV_FOLDS,
+           factor=TRAIN_HALVING_FACTOR, jobs=TRAIN_JOBS, cache_dir=TRAIN_CACHE_DIR):
+    """Score ``candidates`` with successive halving over CV folds.
+
+    Returns a dict with one entry per candidate (fold scores, mean and std,
+    fit seconds, the stage it was pruned at) and the best candidate.
+    """
+    if factor < 2:
+        raise ValueError(f"halving factor must be at least 2, got {factor}")
+    if folds < 2:
+        raise ValueError(f"cross-validation folds must be at least 2, got {folds}")
+    started = time.perf_counter()
+    cores = os.cpu_count() or 1
+    workers = min(jobs or cores, len(candidates))
+    forest_jobs = max(1, cores // workers)
+    fold_dir, reused = cache_folds(X, y, folds, cache_dir)
+
+    results = [
+        {"family": family, "params": params, "folds": [], "seconds": 0.0, "pruned_at": None}
+        for family, params in candidates
+    ]
+    alive = list(range(len(results)))
+    budgets = _fold_budgets(folds, factor)
+
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        for stage, budget in enumerate(budgets):
+            tasks = [
+                (i, index) for i in alive
+                for index in range(len(results[i]["folds"]), budget)
+            ]
+            # Longest fits first, so the pool doesn't end on one slow forest
+            tasks.sort(key=lambda task: -results[task[0]]["params"].get("n_estimators", 0))
+            arguments = [
+                (results[i]["family"], results[i]["params"], class_weight, fold_dir, index, forest_jobs)
+                for i, index in tasks
+            ]
+            scores = pool.map(_evaluate, arguments) if pool is not None else map(_evaluate, arguments)
+            for (i, index), score in zip(tasks, scores):
+                results[i]["folds"].append(score)
+                results[i]["seconds"] += score["seconds"]
+
+            if budget == folds:
+                break
+            alive.sort(key=lambda i: -_mean(results[i], "accuracy"))
+            keep = max(1, math.ceil(len(alive) / factor))
+            for i in alive[keep:]:
+                results[i]["pruned_at"] = stage
+            alive = alive[:keep]
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    for result in results:
+        for metric in ("accuracy", "f1", "roc_auc"):
+            values = [score[metric] for score in result["folds"]]
+            result[metric] = statistics.mean(values)
+            result[f"{metric}_std"] = statistics.pstdev(values)
+    best = max((results[i] for i in alive), key=lambda result: result["accuracy"])
+    return {
+        "candidates": results,
+        "best": best,
+        "folds": folds,
+        "workers": workers,
+        "fold_cache": fold_dir,
+        "fold_cache_reused": reused,
+        "fit_seconds": sum(result["seconds"] for result in results),
+        "wall_seconds": time.perf_counter() - started,
+    }
+
+
+def _mean(result, metric):
+    return statistics.mean(score[metric] for score in result["folds"])
+
+
+def print_report(report):
+    print(f"\nCross-validated search: {len(report['candidates'])} candidates, {report['folds']} folds, "
+          f"{report['workers']} workers, folds {'reused from' if report['fold_cache_reused'] else 'cached in'} "
+          f"{report['fold_cache']}")
+    ranked = sorted(report["candidates"], key=lambda result: (result["pruned_at"] is not None, -result["accuracy"]))
+    for result in ranked:
+        status = "kept" if result["pruned_at"] is None else f"pruned after stage {result['pruned_at']}"
+        print(f"  {result['accuracy']:.4f} ±{result['accuracy_std']:.4f} acc  {result['f1']:.4f} f1  "
+              f"{result['roc_auc']:.4f} auc  {len(result['folds'])} folds  {result['seconds']:7.1f} s  "
+              f"{status:<22} {describe(result['family'], result['params'])}")
+    print(f"Search took {report['wall_seconds']:.1f} s wall for {report['fit_seconds']:.1f} s of fits "
+          f"({report['fit_seconds'] / report['wall_seconds']:.1f}x parallel)")
+    best = report["best"]
+    print(f"✅ Best: {describe(best['family'], best['params'])} "
+          f"(CV accuracy {best['accuracy']:.4f} ±{best['accuracy_std']:.4f})")
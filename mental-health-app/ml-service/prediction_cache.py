@@ -0,0 +1,126 @@
+# prediction_cache.py
+"""Cache of model outputs keyed on the encoded feature vector.
+
+Students retake the assessment and the frontend retries requests, so the
+same answers reach the model again and again.  The cache sits between the
+feature encoder and the model: the key is a hash of the encoded float64
+row, so ``"5"``, ``5`` and ``5.0`` in the responses all hit the same entry,
+and only rows that miss are scored.
+
+Only the model's class and probability are cached.  The safety checks on
+the raw responses still run on every request.
+
+Entries live in an LRU bounded by ``PREDICT_CACHE_SIZE`` and
+``PREDICT_CACHE_TTL``.  The cache empties itself the first time it is used
+with a different model version, so a hot reload never serves stale scores.
+``PREDICT_CACHE_SIZE=0`` turns it off.
+"""
+import hashlib
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+PREDICT_CACHE_SIZE = int(os.getenv("PREDICT_CACHE_SIZE", "10000"))
+PREDICT_CACHE_TTL = float(os.getenv("PREDICT_CACHE_TTL", "3600"))
+
+
+def row_key(row):
+    # Adding 0.0 turns -0.0 into 0.0, so both encode to the same bytes
+    canonical = np.ascontiguousarray(row, dtype=np.float64) + 0.0
+    return hashlib.blake2b(canonical.tobytes(), digest_size=16).digest()
+
+
+class PredictionCache:
+    def __init__(self, size=PREDICT_CACHE_SIZE, ttl=PREDICT_CACHE_TTL):
+        self.size = size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        # Scores from threads (micro-batcher, /predict/batch) and the event loop
+        self._lock = threading.Lock()
+        self._owner = None
+        self.version = None
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def scores(self, current, X):
+        """``current.scores(X)``, scoring only the rows not already cached."""
+        if self.size <= 0:
+            return current.scores(X)
+        keys = [row_key(row) for row in X]
+        now = time.time()
+        found = [None] * len(keys)
+
+        with self._lock:
+            self._check_version(current)
+            for i, key in enumerate(keys):
+                entry = self._entries.get(key)
+                if entry is not None and now - entry[0] <= self.ttl:
+                    self._entries.move_to_end(key)
+                    found[i] = entry
+                elif entry is not None:
+                    del self._entries[key]
+            missing = [i for i, entry in enumerate(found) if entry is None]
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+
+        if len(missing) == len(keys):
+            classes, probability = current.scores(X)
+            self._store(current, keys, classes, probability, now)
+            return classes, probability
+
+        if missing:
+            classes, probability = current.scores(X[missing])
+            for j, i in enumerate(missing):
+                found[i] = (now, classes[j].item(), float(probability[j]))
+            self._store(current, [keys[i] for i in missing], classes, probability, now)
+        return np.array([entry[1] for entry in found]), np.array([entry[2] for entry in found])
+
+    def _check_version(self, current):
+        if current is not self._owner:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._owner = current
+            self.version = current.version
+
+    def _store(self, current, keys, classes, probability, now):
+        with self._lock:
+            # A reload while we were scoring: these results belong to the old model
+            if current is not self._owner:
+                return
+            for key, prediction, p in zip(keys, classes.tolist(), probability.tolist()):
+                self._entries[key] = (now, prediction, p)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def memory_bytes(self):
+        """Approximate size of the table, keys and entries"""
+        with self._lock:
+            table = sys.getsizeof(self._entries)
+            if not self._entries:
+                return table
+            key, entry = next(iter(self._entries.items()))
+            per_entry = sys.getsizeof(key) + sys.getsizeof(entry) + sum(sys.getsizeof(value) for value in entry)
+            return table + per_entry * len(self._entries)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.size > 0,
+            "entries": len(self._entries),
+            "max_entries": self.size,
+            "ttl_seconds": self.ttl,
+            "model_version": self.version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "memory_kb": round(self.memory_bytes() / 1024, 1),
+        }
@@ -0,0 +1,164 @@
+# service_logging.py
+"""Structured, non-blocking logging for the ML service.
+
+``setup_logging()`` routes the root logger through a ``QueueHandler``: the
+request path only puts a record on a queue, and a background
+``QueueListener`` thread formats it and writes it to stdout.  When the queue
+is full, records are dropped (and counted) instead of slowing requests down.
+
+Every record carries the id of the request it was logged from.  The id comes
+from an ``X-Request-ID`` header, or a new one is generated, and it is echoed
+on the response so a client report can be matched to the log lines.
+
+Assessment answers and feature values are never logged by default.
+``log_payload`` writes them only when ``LOG_PAYLOADS=1``, the level is
+DEBUG, and the request was picked by ``LOG_PAYLOAD_SAMPLE_RATE``.
+
+    LOG_LEVEL=INFO              DEBUG adds per-prediction details
+    LOG_FORMAT=json             or "text" for local development
+    LOG_PAYLOADS=0
+    LOG_PAYLOAD_SAMPLE_RATE=0.01
+    LOG_QUEUE_SIZE=10000
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import re
+import sys
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+LOG_PAYLOADS = os.getenv("LOG_PAYLOADS", "0") == "1"
+LOG_PAYLOAD_SAMPLE_RATE = float(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", "0.01"))
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+_request_id = ContextVar("request_id", default="-")
+_payload_sampled = ContextVar("payload_sampled", default=False)
+# Client-supplied ids are echoed into logs, so only plain tokens are accepted
+_VALID_REQUEST_ID = re.compile(r"[A-Za-z0-9._-]{1,64}")
+
+_handler = None
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "message": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", None) or {})
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s")
+
+    def format(self, record):
+        line = super().format(record)
+        fields = getattr(record, "fields", None)
+        if fields:
+            line += " " + " ".join(f"{name}={value}" for name, value in fields.items())
+        return line
+
+
+class _NonBlockingQueueHandler(QueueHandler):
+    """Queue records with their request id; never block on a full queue."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Resolve everything that depends on the calling thread; formatting
+        # happens on the listener thread
+        record.request_id = _request_id.get()
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def setup_logging(level=LOG_LEVEL, log_format=LOG_FORMAT):
+    """Send the root logger through the background queue (once per process)"""
+    global _handler
+    if _handler is not None:
+        return
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JsonFormatter() if log_format == "json" else TextFormatter())
+    log_queue = queue.Queue(LOG_QUEUE_SIZE)
+    _handler = _NonBlockingQueueHandler(log_queue)
+    listener = QueueListener(log_queue, output)
+    listener.start()
+    atexit.register(listener.stop)
+
+    root = logging.getLogger()
+    root.addHandler(_handler)
+    root.setLevel(level)
+
+
+def dropped_records():
+    return _handler.dropped if _handler is not None else 0
+
+
+@contextmanager
+def request_context(request_id=None, sample_rate=LOG_PAYLOAD_SAMPLE_RATE):
+    """Tag log records inside the block with ``request_id`` (or a new one)"""
+    if not request_id or not _VALID_REQUEST_ID.fullmatch(request_id):
+        request_id = uuid.uuid4().hex[:16]
+    id_token = _request_id.set(request_id)
+    sampled_token = _payload_sampled.set(LOG_PAYLOADS and random.random() < sample_rate)
+    try:
+        yield request_id
+    finally:
+        _request_id.reset(id_token)
+        _payload_sampled.reset(sampled_token)
+
+
+def log_payload(logger, message, **fields):
+    """Log assessment content at DEBUG, only for requests sampled for it"""
+    if _payload_sampled.get() and logger.isEnabledFor(logging.DEBUG):
+        logger.debug(message, extra={"fields": fields})
+
+
+class RequestContextMiddleware:
+    """ASGI middleware giving every HTTP request a correlation id."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        header = dict(scope.get("headers") or []).get(b"x-request-id", b"").decode("latin-1")
+        with request_context(header) as request_id:
+            async def send_with_id(message):
+                if message["type"] == "http.response.start":
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-request-id", request_id.encode()))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            await self.app(scope, receive, send_with_id)
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# The service is a set of flat modules next to this directory
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVICE_DIR)
+# ... and loads its model files relative to the working directory
+os.chdir(SERVICE_DIR)
@@ -0,0 +1,36 @@
+"""The benchmark must time the model, never the fallback."""
+import contextlib
+import io
+from types import SimpleNamespace
+
+import numpy as np
+
+with contextlib.redirect_stdout(io.StringIO()):
+    import benchmark
+import app
+from model_registry import ModelVersion
+
+ARGS = SimpleNamespace(csv="student_depression.csv")
+
+
+def fails_to_score(X):
+    raise ValueError("X has 110 features")
+
+
+def test_refuses_without_a_model(monkeypatch):
+    monkeypatch.setattr(app.registry, "active", ModelVersion("v1", None, None, ["Age"]))
+    assert benchmark.check_model(ARGS) == "no model is loaded, /predict would only run the fallback"
+
+
+def test_refuses_a_model_that_cannot_score(monkeypatch):
+    version = ModelVersion("v1", object(), None, list(app.registry.active.feature_columns))
+    monkeypatch.setattr(version, "scores", fails_to_score)
+    monkeypatch.setattr(app.registry, "active", version)
+    assert benchmark.check_model(ARGS) == "the model cannot score a CSV row (ValueError: X has 110 features)"
+
+
+def test_accepts_a_model_that_scores(monkeypatch):
+    version = ModelVersion("v1", object(), None, list(app.registry.active.feature_columns))
+    monkeypatch.setattr(version, "scores", lambda X: (np.zeros(len(X)), np.zeros(len(X))))
+    monkeypatch.setattr(app.registry, "active", version)
+    assert benchmark.check_model(ARGS) is None
@@ -0,0 +1,29 @@
+"""Compiled scorers must match sklearn, including far from the boundary."""
+import warnings
+
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import StandardScaler
+
+from compiled_model import CompiledLogistic
+
+
+def test_logistic_sigmoid_is_stable_for_large_margins():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(200, 3))
+    y = (X[:, 0] > 0).astype(int)
+    scaler = StandardScaler().fit(X)
+    model = LogisticRegression().fit(scaler.transform(X), y)
+    compiled = CompiledLogistic(model, scaler)
+    # Margins of about ±1e4 overflowed exp() in the plain formula
+    extreme = np.array([[1e4, 0, 0], [-1e4, 0, 0], [0, 0, 0]])
+    rows = np.vstack([X, extreme])
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        classes, probability = compiled.score(rows)
+
+    expected = model.predict_proba(scaler.transform(rows))[:, 1]
+    assert np.allclose(probability, expected, rtol=1e-12, atol=1e-15)
+    assert (classes == model.predict(scaler.transform(rows))).all()
+    assert probability[-3] == 1.0 and probability[-2] == 0.0
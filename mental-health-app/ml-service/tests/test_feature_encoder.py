@@ -0,0 +1,40 @@
+import os
+
+import joblib
+import numpy as np
+
+from feature_encoder import EDGE_CASES, FeatureEncoder, csv_responses, pandas_reference
+
+from conftest import SERVICE_DIR
+
+# The pandas reference takes ~20 ms a row, so only a slice of the CSV is replayed
+CSV_ROWS = 200
+
+FEATURE_COLUMNS = joblib.load(os.path.join(SERVICE_DIR, "features.pkl"))
+CASES = list(csv_responses(os.path.join(SERVICE_DIR, "student_depression.csv"), CSV_ROWS)) + EDGE_CASES
+
+
+def outcome(function, responses):
+    try:
+        return function(responses), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+
+def test_encoder_matches_pandas_preprocessing():
+    # one_hot=True deliberately differs: it sets the dummies pandas never matched
+    encoder = FeatureEncoder(FEATURE_COLUMNS, one_hot=False)
+    for responses in CASES:
+        expected, expected_error = outcome(lambda r: pandas_reference(r, FEATURE_COLUMNS), responses)
+        actual, actual_error = outcome(encoder.encode, responses)
+        assert actual_error == expected_error, responses
+        if expected_error is None:
+            assert actual.shape == expected.shape, responses
+            assert np.array_equal(expected.astype(np.float64), actual, equal_nan=True), responses
+
+
+def test_encode_many_matches_encode():
+    encoder = FeatureEncoder(FEATURE_COLUMNS, one_hot=False)
+    rows = CASES[:CSV_ROWS]
+    X = encoder.encode_many(rows)
+    assert np.array_equal(X, np.vstack([encoder.encode(responses) for responses in rows]))
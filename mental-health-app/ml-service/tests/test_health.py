@@ -0,0 +1,39 @@
+"""/health tells a servable model apart from a loaded sklearn model."""
+import contextlib
+import io
+from types import SimpleNamespace
+
+with contextlib.redirect_stdout(io.StringIO()):
+    import app
+from fastapi.testclient import TestClient
+from model_registry import ModelVersion
+
+
+def health(monkeypatch, version):
+    monkeypatch.setattr(app.registry, "active", version)
+    with TestClient(app.app) as client:
+        return client.get("/health").json()
+
+
+def test_fast_start_reports_sklearn_not_loaded(monkeypatch):
+    def loader():
+        raise AssertionError("/health must not unpickle the model")
+    version = ModelVersion("v1", None, None, ["Age"], compiled=SimpleNamespace(kind="logistic_regression"),
+                           model_loader=loader, model_type="LogisticRegression")
+
+    status = health(monkeypatch, version)
+
+    assert status["status"] == "healthy"
+    assert status["model_loaded"] is True
+    assert status["sklearn_loaded"] is False
+    assert status["compiled"] == "logistic_regression"
+
+
+def test_loaded_model_reports_sklearn_loaded(monkeypatch):
+    version = ModelVersion("v1", object(), None, ["Age"])
+
+    status = health(monkeypatch, version)
+
+    assert status["model_loaded"] is True
+    assert status["sklearn_loaded"] is True
+    assert status["compiled"] is None
@@ -0,0 +1,60 @@
+"""Requests never wait on a dispatcher that has died."""
+import asyncio
+
+from micro_batcher import MicroBatcher
+
+
+class Fatal(BaseException):
+    pass
+
+
+def test_dead_dispatcher_fails_queued_requests():
+    calls = []
+
+    def score_batch(items):
+        calls.append(items)
+        if len(calls) == 1:
+            raise Fatal("worker thread torn down")
+        return [item * 10 for item in items]
+
+    # One item per batch, so the second and third are still queued when the first kills the dispatcher
+    batcher = MicroBatcher(score_batch, window=0, max_size=1)
+
+    async def scenario():
+        results = await asyncio.gather(*(batcher.submit(item) for item in (1, 2, 3)), return_exceptions=True)
+        return results, await batcher.submit(4)
+
+    results, after = asyncio.run(asyncio.wait_for(scenario(), timeout=5))
+
+    assert [type(result) for result in results] == [Fatal] * 3
+    assert after == 40
+    assert calls == [[1], [4]]
+
+
+def test_cancelled_dispatcher_cancels_queued_requests():
+    batcher = MicroBatcher(lambda items: items, window=0, max_size=1)
+
+    async def scenario():
+        waiting = [asyncio.ensure_future(batcher.submit(item)) for item in (1, 2)]
+        await asyncio.sleep(0)
+        batcher._dispatcher.cancel()
+        return await asyncio.gather(*waiting, return_exceptions=True)
+
+    results = asyncio.run(asyncio.wait_for(scenario(), timeout=5))
+
+    assert [type(result) for result in results] == [asyncio.CancelledError] * 2
+
+
+def test_dispatcher_cancelled_mid_window_cancels_its_batch():
+    batcher = MicroBatcher(lambda items: items, window=10, max_size=8)
+    batcher._last_size = 2  # Requests have been overlapping, so the window applies
+
+    async def scenario():
+        waiting = [asyncio.ensure_future(batcher.submit(item)) for item in (1, 2)]
+        await asyncio.sleep(0.01)
+        batcher._dispatcher.cancel()
+        return await asyncio.gather(*waiting, return_exceptions=True)
+
+    results = asyncio.run(asyncio.wait_for(scenario(), timeout=5))
+
+    assert [type(result) for result in results] == [asyncio.CancelledError] * 2
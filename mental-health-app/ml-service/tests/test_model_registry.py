@@ -0,0 +1,37 @@
+"""The watcher keeps retrying a CURRENT version that failed to load."""
+import asyncio
+import logging
+
+import model_registry
+from model_registry import ModelRegistry, ModelVersion
+
+
+def test_watch_retries_a_version_that_failed(tmp_path, monkeypatch, caplog):
+    (tmp_path / "CURRENT").write_text("v2\n")
+    attempts = []
+
+    def load_version(version, directory):
+        attempts.append(version)
+        if len(attempts) < 4:
+            raise FileNotFoundError(f"{version} is still syncing")
+        return ModelVersion(version, object(), None, ["Age"])
+
+    monkeypatch.setattr(model_registry, "load_version", load_version)
+    monkeypatch.setattr(model_registry, "validate", lambda candidate: None)
+    # As after load_initial fell back to the loose files
+    registry = ModelRegistry(str(tmp_path))
+    registry.active = ModelVersion("legacy", object(), None, ["Age"])
+
+    async def watch_until_active():
+        watcher = asyncio.create_task(registry.watch(interval=0.001))
+        while registry.active.version != "v2":
+            await asyncio.sleep(0.001)
+        watcher.cancel()
+
+    with caplog.at_level(logging.ERROR, logger="model_registry"):
+        asyncio.run(asyncio.wait_for(watch_until_active(), timeout=5))
+
+    assert attempts == ["v2"] * 4
+    assert [record.getMessage() for record in caplog.records] == [
+        "❌ Model version v2 rejected, keeping legacy: v2 is still syncing"
+    ]
@@ -0,0 +1,39 @@
+"""Successive halving in the cross-validated model search."""
+import numpy as np
+import pytest
+
+from model_search import LOGISTIC, _fold_budgets, search
+
+CANDIDATES = [(LOGISTIC, {"C": C}) for C in (1.0, 0.1, 0.01, 10.0)]
+
+
+def dataset():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(120, 4))
+    y = (X[:, 0] + 0.5 * rng.normal(size=120) > 0).astype(int)
+    return X, y
+
+
+@pytest.mark.parametrize("factor", [-1, 0, 1])
+def test_factor_below_two_is_rejected(tmp_path, factor):
+    X, y = dataset()
+    with pytest.raises(ValueError, match="at least 2"):
+        search(X, y, None, CANDIDATES, folds=3, factor=factor, jobs=1, cache_dir=str(tmp_path))
+
+
+@pytest.mark.parametrize("folds", [-1, 0, 1])
+def test_folds_below_two_are_rejected(tmp_path, folds):
+    X, y = dataset()
+    with pytest.raises(ValueError, match="folds must be at least 2"):
+        search(X, y, None, CANDIDATES, folds=folds, factor=3, jobs=1, cache_dir=str(tmp_path))
+    assert not any(tmp_path.iterdir())
+
+
+def test_budgets_and_pruning_use_the_same_factor(tmp_path):
+    X, y = dataset()
+    report = search(X, y, None, CANDIDATES, folds=4, factor=2, jobs=1, cache_dir=str(tmp_path))
+
+    assert _fold_budgets(4, 2) == [1, 2, 4]
+    # Four candidates halve to two after one fold, then to one after two folds
+    assert sorted(len(result["folds"]) for result in report["candidates"]) == [1, 1, 2, 4]
+    assert [result["pruned_at"] for result in report["candidates"]].count(None) == 1
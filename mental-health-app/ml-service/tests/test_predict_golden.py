@@ -0,0 +1,73 @@
+"""/predict bodies must stay byte-identical to the ones built from dicts.
+
+The files in ``golden/`` were captured from /predict before the responses
+were rendered from templates.  The model's scores are pinned, so every risk
+level is reached whatever model is on disk.
+"""
+import contextlib
+import io
+import os
+
+import numpy as np
+import pytest
+
+with contextlib.redirect_stdout(io.StringIO()):
+    import app
+from fastapi.testclient import TestClient
+from micro_batcher import MicroBatcher
+
+GOLDEN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden")
+
+
+def responses(academic_pressure=2, work_pressure=0, sleep=7, suicidal="No"):
+    return ['s', 'Male', 20, 'Pune', 'Student', academic_pressure, work_pressure, 7, 3, 0, sleep,
+            'Healthy', 'BSc', suicidal, 8, 2, 'No']
+
+
+# name: (responses, model prediction, model probability)
+CASES = {
+    "high_risk": (responses(), 0, 0.12),
+    "moderate_risk": (responses(), 0, 0.275),
+    "low_risk": (responses(), 1, 0.7312345678901234),
+    "critical_by_probability": (responses(), 1, 0.93),
+    # Concerning indicators bump a low model score, but are not in the body
+    "low_risk_bumped_by_sleep": (responses(sleep=3), 0, 0.18),
+    "high_risk_with_pressure": (responses(academic_pressure=5, work_pressure=4), 1, 0.2),
+    # Suicidal ideation forces the critical override and lists the reasons
+    "critical_suicidal": (responses(suicidal="Yes"), 0, 0.1),
+    "critical_suicidal_and_sleep": (responses(sleep=2, suicidal="Yes"), 0, 0.1),
+    "critical_suicidal_and_pressure": (responses(academic_pressure=5, work_pressure=5, suicidal="Yes"), 0, 0.1),
+}
+
+
+def golden(name):
+    with open(os.path.join(GOLDEN_DIR, f"{name}.json"), "rb") as file:
+        return file.read()
+
+
+def pin_scores(monkeypatch, prediction, probability):
+    def scores(current, X):
+        return np.full(len(X), prediction), np.full(len(X), probability)
+    monkeypatch.setattr(app.prediction_cache, "scores", scores)
+
+
+@pytest.fixture
+def client():
+    with contextlib.redirect_stdout(io.StringIO()), TestClient(app.app) as client:
+        if not app.registry.active.has_model:
+            pytest.skip("no model on disk; /predict takes the fallback path")
+        yield client
+
+
+@pytest.mark.parametrize("micro_batched", [False, True])
+@pytest.mark.parametrize("name", sorted(CASES))
+def test_predict_body_matches_golden(client, monkeypatch, name, micro_batched):
+    answers, prediction, probability = CASES[name]
+    pin_scores(monkeypatch, prediction, probability)
+    monkeypatch.setattr(app, "micro_batcher", MicroBatcher(app.score_batch) if micro_batched else None)
+
+    response = client.post("/predict", json={"responses": answers})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert response.content == golden(name)
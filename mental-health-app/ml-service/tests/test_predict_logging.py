@@ -0,0 +1,27 @@
+"""Prediction errors are logged without the assessment content."""
+import contextlib
+import io
+import logging
+
+with contextlib.redirect_stdout(io.StringIO()):
+    import app
+from fastapi.testclient import TestClient
+
+ANSWERS = ['s', 'Male', 20, 'Pune', 'Student', 2, 0, 7, 3, 0, 7, 'Healthy', 'BSc', 'No', 8, 2, 'No']
+
+
+def test_prediction_error_logs_only_the_exception_type(monkeypatch, caplog):
+    def check_safety(responses):
+        raise ValueError(f"could not read {responses}")
+    monkeypatch.setattr(app, "check_safety", check_safety)
+    monkeypatch.setattr(app, "micro_batcher", None)
+
+    with caplog.at_level(logging.DEBUG), TestClient(app.app) as client:
+        response = client.post("/predict", json={"responses": ANSWERS})
+
+    assert response.status_code == 500
+    errors = [record for record in caplog.records if record.levelno >= logging.ERROR]
+    assert [record.getMessage() for record in errors] == ["❌ Prediction error: ValueError"]
+    assert all(record.exc_info is None for record in errors)
+    logged = "\n".join(record.getMessage() + repr(getattr(record, "fields", "")) for record in caplog.records)
+    assert "Pune" not in logged
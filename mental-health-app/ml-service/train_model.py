@@ -11,6 +11,9 @@ from sklearn.metrics import accuracy_score, classification_report, confusion_mat
 from sklearn.utils.class_weight import compute_class_weight
 import warnings
 
+from model_registry import MODEL_DIR, publish
+from model_search import FOREST, TRAIN_SEARCH, build_model, describe, print_report, search
+
 # Suppress warnings
 warnings.filterwarnings('ignore')
 
@@ -97,41 +100,60 @@ try:
     print("Training set class distribution:")
     print(y_train.value_counts())
     
-    # Train Logistic Regression with class weights
-    log_model = LogisticRegression(
-        max_iter=1000, 
-        random_state=42, 
-        class_weight=class_weight_dict
-    )
-    log_model.fit(X_train, y_train)
-    log_pred = log_model.predict(X_test)
-    log_accuracy = accuracy_score(y_test, log_pred)
-    
-    print(f"\nLogistic Regression Accuracy: {log_accuracy:.4f}")
-    
-    # Train Random Forest with class weights
-    rf_model = RandomForestClassifier(
-        n_estimators=100, 
-        random_state=42,
-        class_weight=class_weight_dict
-    )
-    rf_model.fit(X_train, y_train)
-    rf_pred = rf_model.predict(X_test)
-    rf_accuracy = accuracy_score(y_test, rf_pred)
-    
-    print(f"Random Forest Accuracy: {rf_accuracy:.4f}")
-    
-    # Select best model
-    if rf_accuracy >= log_accuracy:
-        best_model = rf_model
-        best_pred = rf_pred
-        model_name = "Random Forest"
-        print(f"\nSelected Random Forest as best model")
+    if TRAIN_SEARCH:
+        # Cross-validated search on the training split only (each fold is
+        # scaled on its own training part); the winner is refit on the whole
+        # training split and scored on the untouched test set like before
+        report = search(X.loc[X_train.index].to_numpy(dtype=float), y_train.to_numpy(), class_weight_dict)
+        print_report(report)
+        best = report["best"]
+        model_name = best["family"]
+        best_model = build_model(model_name, best["params"], class_weight_dict, n_jobs=-1)
+        best_model.fit(X_train, y_train)
+        if model_name == FOREST:
+            # Serving scores one assessment at a time; don't start a thread pool for it
+            best_model.set_params(n_jobs=None)
+        best_pred = best_model.predict(X_test)
+        best_accuracy = accuracy_score(y_test, best_pred)
+        print(f"\n{describe(model_name, best['params'])} test accuracy: {best_accuracy:.4f}")
     else:
-        best_model = log_model
-        best_pred = log_pred
-        model_name = "Logistic Regression"
-        print(f"\nSelected Logistic Regression as best model")
+        # Train Logistic Regression with class weights
+        log_model = LogisticRegression(
+            max_iter=1000, 
+            random_state=42, 
+            class_weight=class_weight_dict
+        )
+        log_model.fit(X_train, y_train)
+        log_pred = log_model.predict(X_test)
+        log_accuracy = accuracy_score(y_test, log_pred)
+    
+        print(f"\nLogistic Regression Accuracy: {log_accuracy:.4f}")
+    
+        # Train Random Forest with class weights
+        rf_model = RandomForestClassifier(
+            n_estimators=100, 
+            random_state=42,
+            class_weight=class_weight_dict
+        )
+        rf_model.fit(X_train, y_train)
+        rf_pred = rf_model.predict(X_test)
+        rf_accuracy = accuracy_score(y_test, rf_pred)
+    
+        print(f"Random Forest Accuracy: {rf_accuracy:.4f}")
+    
+        # Select best model
+        if rf_accuracy >= log_accuracy:
+            best_model = rf_model
+            best_pred = rf_pred
+            model_name = "Random Forest"
+            best_accuracy = rf_accuracy
+            print(f"\nSelected Random Forest as best model")
+        else:
+            best_model = log_model
+            best_pred = log_pred
+            model_name = "Logistic Regression"
+            best_accuracy = log_accuracy
+            print(f"\nSelected Logistic Regression as best model")
     
     # Detailed evaluation
     print(f"\n{model_name} Classification Report:")
@@ -168,11 +190,15 @@ try:
     # Save additional model info
     model_info = {
         'model_type': model_name,
-        'accuracy': rf_accuracy if model_name == "Random Forest" else log_accuracy,
+        'accuracy': best_accuracy,
         'features_count': len(X.columns),
         'class_weights': class_weight_dict,
         'feature_names': X.columns.tolist()
     }
+    if TRAIN_SEARCH:
+        model_info['params'] = best['params']
+        model_info['cv_accuracy'] = best['accuracy']
+        model_info['cv_accuracy_std'] = best['accuracy_std']
     joblib.dump(model_info, "model_info.pkl")
     
     print(f"\n✅ Model training completed successfully!")
@@ -180,6 +206,10 @@ try:
     print(f"Number of features: {len(X.columns)}")
     print(f"Accuracy: {model_info['accuracy']:.4f}")
     print(f"Files saved: model.pkl, scaler.pkl, features.pkl, model_info.pkl")
+
+    # Publish as a new version; running services pick up models/CURRENT without a restart
+    version = publish(best_model, scaler, X.columns.tolist(), model_info)
+    print(f"✅ Published model version {version} to {MODEL_DIR}/")
     
     # Critical safety check
     print(f"\n🚨 SAFETY CHECK:")